@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Adaptive Concurrency Limiter
+
+Load-aware limit on in-flight requests, complementary to the rate limiters
+in rate_limiting_strategies.py: a rate limit caps how often a client may
+call, a concurrency limit caps how much work the gateway lets through at
+once, and adapts that cap to the latency the backends actually show.
+
+Algorithm (gradient2, with multiplicative backoff on errors):
+- Track a long-term EWMA of request latency (long_rtt, the baseline) and
+  a short-term one (sample_rtt)
+- gradient = clamp(tolerance * long_rtt / sample_rtt, 0.5, 1.0)
+- new_limit = limit * gradient + sqrt(limit), smoothed into the current limit
+- Failed requests (5xx, exceptions) shrink the limit by `backoff`
+
+When queueing pushes latency past tolerance * long_rtt the gradient drops
+below 1 and the limit shrinks; otherwise the sqrt(limit) headroom lets the
+limit grow to probe for more capacity. The limit starts at initial_limit
+and only moves gradually: concurrency is never pinned low to measure the
+baseline.
+
+The baseline learns only from requests that ran with the limit far from
+full (or at min_limit), so sustained overload cannot drag it up with the
+queueing it causes. It decays quickly when latency falls well below it.
+The trade-off: if the backends get slower while demand keeps the limit
+full, the limit settles lower than needed until traffic dips.
+
+Usage:
+    from adaptive_concurrency import AdaptiveConcurrencyLimiter
+
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=20, max_limit=200)
+    if limiter.try_acquire():
+        start = time.perf_counter()
+        try:
+            ...  # handle request
+        finally:
+            limiter.release(time.perf_counter() - start, dropped=False)
+    else:
+        ...  # shed load (503)
+
+    # CLI: simulate a backend whose latency grows with concurrency
+    python adaptive_concurrency.py --capacity 50 --steps 20000
+"""
+
+import argparse
+import math
+import random
+from typing import Dict, Optional
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Gradient-based adaptive concurrency limiter.
+
+    Not thread-safe: meant for one event loop (one gateway worker), where
+    try_acquire() and release() never interleave.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 3,
+        max_limit: int = 1000,
+        smoothing: float = 0.2,
+        tolerance: float = 1.5,
+        backoff: float = 0.9,
+        sample_window: int = 10,
+        long_window: int = 600
+    ):
+        """
+        Initialize adaptive concurrency limiter.
+
+        Args:
+            initial_limit: Limit enforced from the start
+            min_limit: Lower bound for the limit
+            max_limit: Upper bound for the limit
+            smoothing: Weight of each new limit estimate (0-1)
+            tolerance: Latency increase over the baseline tolerated before shrinking
+            backoff: Multiplicative decrease applied on failed requests
+            sample_window: Samples in the short-term latency average
+            long_window: Samples in the long-term (baseline) latency average
+        """
+        if not min_limit <= initial_limit <= max_limit:
+            raise ValueError("initial_limit must be between min_limit and max_limit")
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self._alpha = 2.0 / (sample_window + 1)
+        self._long_alpha = 2.0 / (long_window + 1)
+        self.long_rtt: Optional[float] = None
+        self.sample_rtt: Optional[float] = None
+        self.in_flight = 0
+        self.rejected = 0
+        self.drops = 0
+
+    def current_limit(self) -> int:
+        """In-flight limit currently enforced."""
+        return int(self.limit)
+
+    def try_acquire(self) -> bool:
+        """
+        Admit a request if the in-flight count is under the current limit.
+
+        Returns:
+            True if admitted (call release() when it finishes), False to shed it
+        """
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float, dropped: bool = False):
+        """
+        Record a finished request and adapt the limit.
+
+        Args:
+            latency: Request latency in seconds
+            dropped: True if the request failed in a way that signals overload
+                (5xx, timeout, exception)
+        """
+        in_flight = self.in_flight
+        self.in_flight -= 1
+
+        if dropped:
+            self.drops += 1
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+            return
+
+        if self.long_rtt is None:
+            self.long_rtt = self.sample_rtt = latency
+            return
+        self.sample_rtt += self._alpha * (latency - self.sample_rtt)
+        # The baseline only learns from requests that did not queue behind
+        # the limiter's own load: taken with the limit far from full, or at
+        # min_limit. Learning from a saturated limit would let it follow the
+        # very queueing it has to detect, and the limit would creep up
+        if in_flight < self.limit / 2 or in_flight <= self.min_limit:
+            self.long_rtt += self._long_alpha * (latency - self.long_rtt)
+        # Latency well under the baseline (the backend got faster): decay
+        # the baseline instead of waiting for unloaded samples
+        if self.long_rtt > 2 * self.sample_rtt:
+            self.long_rtt *= 0.95
+
+        # Only adapt when the limit is actually in use; an idle gateway
+        # says nothing about backend capacity
+        if in_flight < self.limit / 2:
+            return
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / self.sample_rtt))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = (1 - self.smoothing) * self.limit + self.smoothing * new_limit
+        self.limit = max(self.min_limit, min(self.max_limit, self.limit))
+
+    def retry_after(self) -> float:
+        """Suggested client back-off in seconds (about one request latency)."""
+        return self.sample_rtt or 1.0
+
+    def stats(self) -> Dict[str, float]:
+        """Return current limit, in-flight count and latency estimates."""
+        return {
+            "limit": self.current_limit(),
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "drops": self.drops,
+            "long_rtt_ms": round((self.long_rtt or 0.0) * 1000, 3),
+            "sample_rtt_ms": round((self.sample_rtt or 0.0) * 1000, 3),
+        }
+
+
+def simulate(limiter: AdaptiveConcurrencyLimiter, capacity: int, base_latency: float, steps: int, seed: int = 42):
+    """
+    Drive the limiter against a simulated backend.
+
+    The backend serves `capacity` requests in parallel at base_latency;
+    beyond that, requests queue and latency grows linearly with the excess.
+    Demand always exceeds the limit: each step fills the limit, then one
+    request completes with the latency of the current concurrency.
+    """
+    rng = random.Random(seed)
+    for step in range(steps):
+        while limiter.try_acquire():
+            pass
+
+        queueing = max(0, limiter.in_flight - capacity) / capacity
+        limiter.release(base_latency * (1 + queueing) * rng.uniform(0.9, 1.1))
+
+        if step % max(1, steps // 10) == 0:
+            stats = limiter.stats()
+            print(
+                f"step {step:>6}: limit={stats['limit']:>4} in_flight={stats['in_flight']:>4} "
+                f"long_rtt={stats['long_rtt_ms']:.1f}ms sample_rtt={stats['sample_rtt_ms']:.1f}ms"
+            )
+
+
+def main():
+    """CLI entry point for simulating the adaptive concurrency limiter."""
+    parser = argparse.ArgumentParser(
+        description="Simulate the adaptive concurrency limiter against a saturating backend",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=50,
+        help="Requests the simulated backend serves in parallel without queueing"
+    )
+
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.02,
+        help="Backend latency in seconds when not saturated"
+    )
+
+    parser.add_argument(
+        "--steps",
+        type=int,
+        default=20000,
+        help="Simulation steps (one completed request each)"
+    )
+
+    parser.add_argument(
+        "--initial-limit",
+        type=int,
+        default=10,
+        help="Starting concurrency limit"
+    )
+
+    parser.add_argument(
+        "--max-limit",
+        type=int,
+        default=1000,
+        help="Upper bound for the concurrency limit"
+    )
+
+    args = parser.parse_args()
+
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=args.initial_limit, max_limit=args.max_limit)
+    simulate(limiter, args.capacity, args.latency, args.steps)
+    print(f"\nFinal limit: {limiter.stats()['limit']} (backend capacity: {args.capacity})")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -3,8 +3,13 @@
 API Gateway Middleware with Rate Limiting
 
 FastAPI middleware implementation for API Gateway with:
-- Rate limiting
-- API key authentication
+- Rate limiting (pure ASGI middleware, no per-response task or stream)
+- Hierarchical quotas (per key, organisation, route and global, all or nothing)
+- Adaptive concurrency limiting (sheds load with 503 when backends slow down)
+- Response caching (TTL + LRU, ETag revalidation, request coalescing)
+- API key authentication (salted hashes, hot reload from file)
+- Warm restarts (in-process limiter state snapshotted at shutdown, restored lazily)
+- Prometheus metrics on /metrics (request latency and status per handler, decision latency)
 - Request/response transformation
 
 Usage:
@@ -13,115 +18,680 @@ Usage:
 
 from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import Headers
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import json
+import logging
+import math
+import os
 import time
-from typing import Dict, Optional
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
 import sys
 from pathlib import Path
 
 # Import rate limiting strategies
 sys.path.insert(0, str(Path(__file__).parent))
-from rate_limiting_strategies import RateLimiter, TokenBucketRateLimiter, SlidingWindowRateLimiter
+from rate_limiting_strategies import (
+    CompositeRateLimiter,
+    IdentifierStore,
+    RateLimiter,
+    TokenBucketRateLimiter,
+    GCRARateLimiter,
+    SlidingWindowRateLimiter,
+    SlidingWindowCounterRateLimiter,
+)
+from rate_limit_backends import RateLimitBackend, RedisBackend, SharedMemoryBackend
+from adaptive_concurrency import AdaptiveConcurrencyLimiter
+from response_cache import CachedResponse, CachePolicy, ResponseCache, etag_matches
+from api_key_registry import ApiKeyRegistry
+from limiter_snapshot import load_snapshot, save_snapshot
+from metrics_registry import CONTENT_TYPE, MICROSECOND_BUCKETS, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Restore limiter state at startup and snapshot it at shutdown."""
+    restore_limiter_snapshots()
+    yield
+    save_limiter_snapshots()
+
 
 app = FastAPI(
     title="API Gateway",
     description="API Gateway with rate limiting and authentication",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 security = HTTPBearer()
 
-# In-memory API key store (use database in production)
+# Demo API keys, used when API_KEYS_FILE is not set (hashed at startup)
 VALID_API_KEYS = {
     "valid-api-key-1": {"user_id": "user1", "tier": "premium"},
     "valid-api-key-2": {"user_id": "user2", "tier": "basic"},
 }
 
-# Rate limiters per tier
+# Hashed key registry; a JSON or SQLite API_KEYS_FILE is reloaded on change
+API_KEYS_FILE = os.getenv("API_KEYS_FILE")
+API_KEYS = (
+    ApiKeyRegistry.from_file(API_KEYS_FILE)
+    if API_KEYS_FILE
+    else ApiKeyRegistry.from_plaintext(VALID_API_KEYS)
+)
+
+
+def parse_api_key(auth_header: Optional[str]) -> Optional[str]:
+    """Extract the API key from an Authorization header (Bearer token or direct)."""
+    if not auth_header:
+        return None
+    scheme, _, token = auth_header.partition(" ")
+    if token and scheme.lower() == "bearer":
+        return token.strip()
+    return auth_header.strip()
+
+
+def request_api_key(scope: Scope) -> Optional[Dict[str, str]]:
+    """
+    Resolve the request's API key once and cache it in the request state.
+    
+    Shared by the rate limit middleware and verify_api_key, so each request
+    hashes and looks up its key exactly once.
+    
+    Returns:
+        User information dictionary, or None for anonymous/unknown keys
+    """
+    state = scope.setdefault("state", {})
+    if "api_key_info" not in state:
+        api_key = parse_api_key(Headers(scope=scope).get("authorization"))
+        state["api_key_info"] = API_KEYS.lookup(api_key)
+    return state["api_key_info"]
+
+# Shared limiter state: "memory" (per worker), "shm" (all workers on this
+# host) or "redis" (all gateway nodes)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+def create_backend(tier: str) -> Optional[RateLimitBackend]:
+    """Create the configured shared state backend for a tier (None = in-process)."""
+    if RATE_LIMIT_BACKEND == "shm":
+        return SharedMemoryBackend(f"api-gateway-{tier}")
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend.from_url(REDIS_URL, prefix=f"ratelimit:{tier}:")
+    return None
+
+
+# Rate limiters per tier: GCRA keeps one float per identifier and gives
+# exact Retry-After / X-RateLimit-Reset values (burst = per-minute quota,
+# refilled evenly over the minute)
 RATE_LIMITERS = {
-    "premium": RateLimiter(max_requests=1000, window_seconds=60),
-    "basic": RateLimiter(max_requests=100, window_seconds=60),
-    "anonymous": RateLimiter(max_requests=10, window_seconds=60),
+    "premium": GCRARateLimiter(
+        capacity=1000,
+        refill_rate=1000 / 60,
+        store=IdentifierStore(max_keys=100_000, ttl_seconds=60),
+        backend=create_backend("premium"),
+    ),
+    "basic": GCRARateLimiter(
+        capacity=100,
+        refill_rate=100 / 60,
+        store=IdentifierStore(max_keys=100_000, ttl_seconds=60),
+        backend=create_backend("basic"),
+    ),
+    # Anonymous traffic is keyed by IP, which attackers can rotate freely
+    "anonymous": GCRARateLimiter(
+        capacity=10,
+        refill_rate=10 / 60,
+        store=IdentifierStore(max_keys=1_000_000, ttl_seconds=60),
+        backend=create_backend("anonymous"),
+    ),
+}
+
+# Per-tenant token buckets for bulk endpoints (one token per record)
+TENANT_RATE_LIMITER = TokenBucketRateLimiter(
+    capacity=10_000,
+    refill_rate=1_000.0,
+    backend=create_backend("tenant"),
+)
+
+# Stacked quotas, checked together with the tier limit (all or nothing)
+ORGANIZATIONS = {"user1": "org-acme", "user2": "org-acme"}  # Demo user -> organisation mapping
+ORG_RATE_LIMITER = GCRARateLimiter(
+    capacity=2_000,
+    refill_rate=2_000 / 60,
+    backend=create_backend("org"),
+)
+ROUTE_RATE_LIMITERS = {
+    "/api/v1/batch": GCRARateLimiter(capacity=100, refill_rate=100 / 60, backend=create_backend("route-batch")),
 }
+GLOBAL_RATE_LIMITER = GCRARateLimiter(
+    capacity=10_000,
+    refill_rate=10_000 / 60,
+    backend=create_backend("global"),
+)
+COMPOSITE_RATE_LIMITER = CompositeRateLimiter()
+
+# Directory for limiter state snapshots (unset = start every worker cold).
+# Only in-process ("memory") limiters are snapshotted; shm and Redis state
+# already survives restarts. Snapshots hold one worker's state, so run a
+# single worker per snapshot directory or use the shm backend instead.
+RATE_LIMIT_SNAPSHOT_DIR = os.getenv("RATE_LIMIT_SNAPSHOT_DIR")
+
+
+def snapshot_limiters() -> Dict[str, Any]:
+    """In-process limiters whose state is snapshotted, by snapshot file name."""
+    limiters = {f"tier-{tier}": limiter for tier, limiter in RATE_LIMITERS.items()}
+    limiters["tenant"] = TENANT_RATE_LIMITER
+    limiters["org"] = ORG_RATE_LIMITER
+    limiters["global"] = GLOBAL_RATE_LIMITER
+    for route, limiter in ROUTE_RATE_LIMITERS.items():
+        limiters["route" + route.replace("/", "-")] = limiter
+    return {name: limiter for name, limiter in limiters.items() if limiter.backend is None}
+
+
+def restore_limiter_snapshots():
+    """Attach the snapshots in RATE_LIMIT_SNAPSHOT_DIR for lazy restore."""
+    if not RATE_LIMIT_SNAPSHOT_DIR:
+        return
+    for name, limiter in snapshot_limiters().items():
+        path = os.path.join(RATE_LIMIT_SNAPSHOT_DIR, f"{name}.rlsnap")
+        try:
+            load_snapshot(limiter, path)
+        except ValueError as e:
+            # Stale format or limiter type changed: start this limiter cold
+            logger.warning("Ignoring limiter snapshot: %s", e)
+
+
+def save_limiter_snapshots():
+    """Write the in-process limiter state to RATE_LIMIT_SNAPSHOT_DIR."""
+    if not RATE_LIMIT_SNAPSHOT_DIR:
+        return
+    os.makedirs(RATE_LIMIT_SNAPSHOT_DIR, exist_ok=True)
+    for name, limiter in snapshot_limiters().items():
+        save_snapshot(limiter, os.path.join(RATE_LIMIT_SNAPSHOT_DIR, f"{name}.rlsnap"))
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+def quota_levels(scope: Scope, user_info: Optional[Dict], client_id: str) -> List[Tuple[str, Any, Optional[str]]]:
     """
-    Middleware for rate limiting requests.
+    Levels checked after the per-key (tier) limit: organisation, route, global.
+    
+    Levels with a None identifier (anonymous callers have no organisation,
+    most routes have no route quota) are skipped.
+    """
+    route_limiter = ROUTE_RATE_LIMITERS.get(scope["path"])
+    return [
+        ("org", ORG_RATE_LIMITER, ORGANIZATIONS.get(client_id) if user_info is not None else None),
+        ("route", route_limiter, scope["path"] if route_limiter is not None else None),
+        ("global", GLOBAL_RATE_LIMITER, "global"),
+    ]
+
+# Adaptive in-flight limits per tier (per worker), adjusted from observed latency
+CONCURRENCY_LIMITERS = {
+    "premium": AdaptiveConcurrencyLimiter(initial_limit=100, max_limit=1000),
+    "basic": AdaptiveConcurrencyLimiter(initial_limit=50, max_limit=500),
+    "anonymous": AdaptiveConcurrencyLimiter(initial_limit=20, max_limit=100),
+}
+
+# Gateway response cache (per worker); hits are still rate limited
+RESPONSE_CACHE = ResponseCache(max_entries=10_000, max_bytes=64 * 2**20)
+CACHE_POLICIES = {
+    # Both example payloads echo the caller (client IP, user id), so they are
+    # cached per client; routes whose payload depends only on the tier can
+    # use per_client=False and share one entry per tier
+    "/api/v1/public": CachePolicy(ttl_seconds=5.0, per_client=True),
+    "/api/v1/data": CachePolicy(ttl_seconds=5.0, per_client=True),
+}
+
+# Gateway metrics (per worker), rendered on /metrics. Request and decision
+# series are recorded by RateLimitMiddleware; the rest is read from the
+# limiters, cache and quotas at scrape time.
+METRICS = MetricsRegistry()
+METRICS.register_callback(
+    "gateway_rate_limit_keys", "Identifiers held by in-process rate limiters", "gauge", ("tier",),
+    lambda: [((tier,), limiter.store.resident_keys) for tier, limiter in RATE_LIMITERS.items() if limiter.backend is None]
+)
+METRICS.register_callback(
+    "gateway_quota_denials_total", "Requests denied by each quota level", "counter", ("level",),
+    lambda: [((level,), count) for level, count in COMPOSITE_RATE_LIMITER.stats()["denials"].items()]
+)
+METRICS.register_callback(
+    "gateway_quota_rollbacks_total", "Quota checks rolled back after a deny", "counter", (),
+    lambda: [((), COMPOSITE_RATE_LIMITER.stats()["rollbacks"])]
+)
+METRICS.register_callback(
+    "gateway_concurrency_limit", "Adaptive in-flight request limit", "gauge", ("tier",),
+    lambda: [((tier,), limiter.current_limit()) for tier, limiter in CONCURRENCY_LIMITERS.items()]
+)
+METRICS.register_callback(
+    "gateway_concurrency_in_flight", "Requests in flight", "gauge", ("tier",),
+    lambda: [((tier,), limiter.in_flight) for tier, limiter in CONCURRENCY_LIMITERS.items()]
+)
+METRICS.register_callback(
+    "gateway_response_cache_entries", "Responses held by the cache", "gauge", (),
+    lambda: [((), len(RESPONSE_CACHE))]
+)
+METRICS.register_callback(
+    "gateway_response_cache_events_total", "Response cache lookups and removals", "counter", ("event",),
+    lambda: [
+        ((event,), count)
+        for event, count in RESPONSE_CACHE.stats().items()
+        if event in ("hits", "misses", "coalesced", "not_modified", "evictions", "expirations")
+    ]
+)
+
+
+def resolve_client(user_info: Optional[Dict], client_host: Optional[str]) -> Tuple[str, str]:
+    """
+    Return (tier, client_id) for a request.
+    
+    Authenticated requests are identified by user id, anonymous ones by IP.
+    """
+    if user_info is None:
+        return "anonymous", client_host or "unknown"
+    return user_info.get("tier", "basic"), user_info["user_id"]
+
+
+def resolve_rate_limit(limiters: Dict, user_info: Optional[Dict], client_host: Optional[str]):
+    """
+    Pick limiter, tier and identifier for a request.
+    
+    Args:
+        limiters: Rate limiters per tier
+        user_info: Resolved API key information, if any
+        client_host: Client IP address, if known
+        
+    Returns:
+        Tuple of (limiter, tier, client_id)
+    """
+    tier, client_id = resolve_client(user_info, client_host)
+    
+    # Determine rate limiter based on authentication
+    if user_info is None:
+        limiter = limiters.get("anonymous")
+    else:
+        limiter = limiters.get(tier, limiters["basic"])
+    
+    return limiter, tier, client_id
+
+
+def rate_limit_headers(decision) -> Dict[str, str]:
+    """Build X-RateLimit-* headers from a RateLimitDecision."""
+    headers = {
+        "X-RateLimit-Limit": str(decision.limit),
+        "X-RateLimit-Remaining": str(decision.remaining),
+        "X-RateLimit-Reset": str(math.ceil(decision.reset_at)),
+    }
+    # Composite decisions report the binding level
+    level = getattr(decision, "level", None)
+    if level:
+        headers["X-RateLimit-Scope"] = level
+    return headers
+
+
+def rate_limit_exceeded_response(decision) -> JSONResponse:
+    """
+    Build the response for a denied RateLimitDecision: 429 with Retry-After,
+    or 413 if the request costs more than the limit and retrying cannot help.
+    """
+    if math.isinf(decision.retry_after):
+        return JSONResponse(
+            status_code=413,
+            content={"error": "Request exceeds the rate limit", "limit": decision.limit},
+            headers=rate_limit_headers(decision)
+        )
+    retry_after = math.ceil(decision.retry_after)
+    
+    return JSONResponse(
+        status_code=429,
+        content={
+            "error": "Rate limit exceeded",
+            "retry_after": retry_after
+        },
+        headers={
+            **rate_limit_headers(decision),
+            "Retry-After": str(retry_after)
+        }
+    )
+
+
+class RateLimitMetrics:
+    """
+    Metric children for one tier, resolved once so that recording a
+    request is one histogram observation.
+    
+    The request histogram carries its own counts (`_count`), so requests
+    are not counted again in a counter; rate limit denials are its
+    status="429" series. Requests are labelled with the route template
+    that handled them (scope["route"], set by the router), so one timer
+    per request gives the latency per tier and per handler; requests
+    answered before routing (429, 503, cache hits) have an empty handler
+    label.
+    
+    Decision latency is sampled: one decision in DECISION_SAMPLE is timed,
+    which is enough for its quantiles and saves a timer read and an
+    observation on the other requests.
+    """
+    
+    DECISION_SAMPLE = 16
+    
+    def __init__(self, registry: MetricsRegistry, tier: str):
+        self.decision_latency = registry.histogram(
+            "gateway_rate_limit_decision_seconds", "Time spent deciding rate limits (all levels; sampled)",
+            ("tier",), MICROSECOND_BUCKETS
+        ).labels(tier)
+        self.until_sample = 0  # Decisions left before the next timed one
+        self.tier = tier
+        self._latency = registry.histogram(
+            "gateway_request_duration_seconds", "Request latency through the gateway",
+            ("tier", "handler", "method", "status")
+        )
+        # (handler, method, status) -> latency histogram child
+        self._series: Dict[Tuple[str, str, int], Any] = {}
+    
+    def finished(self, route: Any, method: str, status: int, elapsed: float):
+        """Record one finished request (route is None when no route handled it)."""
+        handler = getattr(route, "path", "")
+        series = self._series.get((handler, method, status))
+        if series is None:
+            series = self._series[handler, method, status] = self._latency.labels(self.tier, handler, method, status)
+        series.observe(elapsed)
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware for rate limiting requests.
     
     Supports different rate limits based on:
     - API key tier (premium, basic)
     - IP address (for anonymous requests)
+    
+    The 429 decision is made before the app is invoked, and rate limit
+    headers are injected into the response start message through `send`,
+    so response bodies stream straight through without extra buffering.
+    
+    With `levels`, the tier limit is the first level of a composite check:
+    levels(scope, user_info, client_id) returns the extra
+    (level, limiter, identifier) triples, and the request is counted at
+    every level or at none.
+    
+    With `metrics`, end-to-end request latency and status are recorded per
+    tier and handler, and a sample of decision latencies per tier.
     """
     
-    def __init__(self, app, limiters: Dict):
-        super().__init__(app)
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiters: Dict,
+        levels: Optional[Callable[[Scope, Optional[Dict], str], Sequence[Tuple[str, Any, Optional[str]]]]] = None,
+        composite: Optional[CompositeRateLimiter] = None,
+        metrics: Optional[MetricsRegistry] = None
+    ):
+        self.app = app
         self.limiters = limiters
+        self.levels = levels
+        self.composite = composite if composite is not None else CompositeRateLimiter()
+        self.metrics = metrics
+        self._tier_metrics: Dict[str, RateLimitMetrics] = {}
 
-    async def dispatch(self, request: Request, call_next):
-        # Get client identifier
-        client_id = request.client.host if request.client else "unknown"
-        
-        # Determine rate limiter based on authentication
-        limiter = self.limiters.get("anonymous")
-        tier = "anonymous"
-        
-        # Check for API key in header
-        auth_header = request.headers.get("authorization")
-        if auth_header:
-            # Extract API key (Bearer token or direct)
-            api_key = auth_header.replace("Bearer ", "").replace("bearer ", "")
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        client = scope.get("client")
+        user_info = request_api_key(scope)
+        limiter, tier, client_id = resolve_rate_limit(
+            self.limiters,
+            user_info,
+            client[0] if client else None
+        )
+        metrics = None
+        if self.metrics is not None:
+            metrics = self._tier_metrics.get(tier)
+            if metrics is None:
+                metrics = self._tier_metrics[tier] = RateLimitMetrics(self.metrics, tier)
+            start = time.perf_counter()
+        
+        # Check and consume rate limit in one pass
+        if self.levels is None:
+            decision = limiter.acquire(client_id)
+        else:
+            decision = self.composite.acquire(
+                [("key", limiter, client_id), *self.levels(scope, user_info, client_id)]
+            )
+        if metrics is not None:
+            metrics.until_sample -= 1
+            if metrics.until_sample < 0:
+                metrics.until_sample = metrics.DECISION_SAMPLE - 1
+                metrics.decision_latency.observe(time.perf_counter() - start)
+        if not decision.allowed:
+            response = rate_limit_exceeded_response(decision)
+            await response(scope, receive, send)
+            if metrics is not None:
+                metrics.finished(None, scope["method"], 429, time.perf_counter() - start)
+            return
+        
+        extra_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in rate_limit_headers(decision).items()
+        ]
+        extra_headers.append((b"x-ratelimit-tier", tier.encode("latin-1")))
+        status = 500
+        
+        async def send_with_rate_limit_headers(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + extra_headers
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_rate_limit_headers)
+        finally:
+            if metrics is not None:
+                metrics.finished(scope.get("route"), scope["method"], status, time.perf_counter() - start)
+
+
+def concurrency_exceeded_response(limiter: AdaptiveConcurrencyLimiter) -> JSONResponse:
+    """Build the 503 response for a request shed by the concurrency limiter."""
+    retry_after = max(1, math.ceil(limiter.retry_after()))
+    
+    return JSONResponse(
+        status_code=503,
+        content={
+            "error": "Service overloaded",
+            "retry_after": retry_after
+        },
+        headers={
+            "X-Concurrency-Limit": str(limiter.current_limit()),
+            "Retry-After": str(retry_after)
+        }
+    )
+
+
+class AdaptiveConcurrencyMiddleware:
+    """
+    Pure ASGI middleware that caps in-flight requests per tier.
+    
+    Each tier's limit adapts to the latency observed through this gateway
+    (see adaptive_concurrency.py). Requests over the limit get a 503 before
+    reaching the app; 5xx responses and exceptions count as overload.
+    Install it inside RateLimitMiddleware, so requests already rejected by
+    the rate limit never take a concurrency slot or skew the latency.
+    """
+    
+    def __init__(self, app: ASGIApp, limiters: Dict):
+        self.app = app
+        self.limiters = limiters
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        client = scope.get("client")
+        limiter, _, _ = resolve_rate_limit(
+            self.limiters,
+            request_api_key(scope),
+            client[0] if client else None
+        )
+        
+        if not limiter.try_acquire():
+            response = concurrency_exceeded_response(limiter)
+            await response(scope, receive, send)
+            return
+        
+        status = 500
+        
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            limiter.release(time.perf_counter() - start, dropped=status >= 500)
+
+
+class ResponseCacheMiddleware:
+    """
+    Pure ASGI middleware that caches GET responses of selected routes.
+    
+    Responses are keyed by route, normalized query string and tier (plus
+    the client for per-client routes). Concurrent misses for one key run
+    the handler once; If-None-Match matching the cached ETag gets a 304.
+    Install it inside RateLimitMiddleware, so cache hits still count
+    against the client's rate limit.
+    """
+    
+    def __init__(self, app: ASGIApp, cache: ResponseCache, policies: Dict[str, CachePolicy]):
+        self.app = app
+        self.cache = cache
+        self.policies = policies
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        policy = self.policies.get(scope["path"]) if scope["type"] == "http" else None
+        if policy is None or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        
+        client = scope.get("client")
+        tier, client_id = resolve_client(request_api_key(scope), client[0] if client else None)
+        query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)))
+        key = (scope["path"], query, tier, client_id if policy.per_client else None)
+        
+        async def compute() -> CachedResponse:
+            start: Message = {}
+            body = []
             
-            if api_key in VALID_API_KEYS:
-                user_info = VALID_API_KEYS[api_key]
-                tier = user_info.get("tier", "basic")
-                limiter = self.limiters.get(tier, self.limiters["basic"])
-                client_id = user_info.get("user_id", api_key)
-        
-        # Check rate limit
-        if not limiter.is_allowed(client_id):
-            remaining = limiter.get_remaining(client_id)
-            reset_time = int(time.time()) + limiter.window_seconds
+            async def capture(message: Message):
+                if message["type"] == "http.response.start":
+                    start.update(message)
+                elif message["type"] == "http.response.body":
+                    body.append(message.get("body", b""))
             
-            return JSONResponse(
-                status_code=429,
-                content={
-                    "error": "Rate limit exceeded",
-                    "retry_after": limiter.window_seconds
-                },
-                headers={
-                    "X-RateLimit-Limit": str(limiter.max_requests),
-                    "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(reset_time),
-                    "Retry-After": str(limiter.window_seconds)
-                }
+            await self.app(scope, receive, capture)
+            headers = list(start.get("headers", []))
+            cache_control = Headers(raw=headers).get("cache-control", "")
+            return CachedResponse(
+                status=start["status"],
+                headers=headers,
+                body=b"".join(body),
+                cacheable=start["status"] == 200 and "no-store" not in cache_control
             )
         
+        response, source = await self.cache.get_or_compute(key, compute, policy.ttl_seconds)
+        cache_headers = [(b"x-cache", source.upper().encode("latin-1"))]
+        if response.cacheable:
+            age = max(0, int(time.monotonic() - response.stored_at))
+            cache_headers.append((b"age", str(age).encode("latin-1")))
+            
+            if etag_matches(Headers(scope=scope).get("if-none-match"), response.etag):
+                self.cache.not_modified += 1
+                await send({
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [(b"etag", response.etag.encode("latin-1"))] + cache_headers,
+                })
+                await send({"type": "http.response.body", "body": b""})
+                return
+        
+        await send({
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": response.headers + cache_headers,
+        })
+        await send({"type": "http.response.body", "body": response.body})
+
+
+class BaseHTTPRateLimitMiddleware(BaseHTTPMiddleware):
+    """
+    Rate limiting on Starlette's BaseHTTPMiddleware.
+    
+    Same semantics as RateLimitMiddleware, but every response goes through an
+    extra task and memory stream. Kept as the baseline for
+    benchmark_middleware.py; use RateLimitMiddleware instead.
+    """
+    
+    def __init__(self, app, limiters: Dict):
+        super().__init__(app)
+        self.limiters = limiters
+
+    async def dispatch(self, request: Request, call_next):
+        limiter, tier, client_id = resolve_rate_limit(
+            self.limiters,
+            request_api_key(request.scope),
+            request.client.host if request.client else None
+        )
+        
+        # Check and consume rate limit in one pass
+        decision = limiter.acquire(client_id)
+        if not decision.allowed:
+            return rate_limit_exceeded_response(decision)
+        
         # Process request
         response = await call_next(request)
         
         # Add rate limit headers
-        remaining = limiter.get_remaining(client_id)
-        reset_time = int(time.time()) + limiter.window_seconds
-        
-        response.headers["X-RateLimit-Limit"] = str(limiter.max_requests)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(reset_time)
+        response.headers.update(rate_limit_headers(decision))
         response.headers["X-RateLimit-Tier"] = tier
         
         return response
 
 
-# Apply middleware
-app.add_middleware(RateLimitMiddleware, limiters=RATE_LIMITERS)
+# Apply middleware (the last one added runs first: rate limit, cache, concurrency)
+app.add_middleware(AdaptiveConcurrencyMiddleware, limiters=CONCURRENCY_LIMITERS)
+app.add_middleware(ResponseCacheMiddleware, cache=RESPONSE_CACHE, policies=CACHE_POLICIES)
+app.add_middleware(
+    RateLimitMiddleware,
+    limiters=RATE_LIMITERS,
+    levels=quota_levels,
+    composite=COMPOSITE_RATE_LIMITER,
+    metrics=METRICS,
+)
 
 
-def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict:
+def verify_api_key(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Dict:
     """
     Verify API key and return user information.
     
+    Reuses the lookup already done by the rate limit middleware.
+    
     Args:
+        request: Current request
         credentials: HTTP Bearer token credentials
         
     Returns:
@@ -130,16 +700,16 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)
     Raises:
         HTTPException: If API key is invalid
     """
-    api_key = credentials.credentials
+    user_info = request_api_key(request.scope)
     
-    if api_key not in VALID_API_KEYS:
+    if user_info is None:
         raise HTTPException(
             status_code=401,
             detail="Invalid API key",
             headers={"WWW-Authenticate": "Bearer"}
         )
     
-    return VALID_API_KEYS[api_key]
+    return user_info
 
 
 @app.get("/")
@@ -150,7 +720,9 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "data": "/api/v1/data",
-            "health": "/health"
+            "batch": "/api/v1/batch",
+            "health": "/health",
+            "metrics": "/metrics"
         }
     }
 
@@ -158,7 +730,26 @@ async def root():
 @app.get("/health")
 async def health():
     """Health check endpoint (no rate limiting)."""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "rate_limiters": {
+            tier: (limiter.backend or limiter.store).stats()
+            for tier, limiter in RATE_LIMITERS.items()
+        },
+        "concurrency_limits": {
+            tier: limiter.stats()
+            for tier, limiter in CONCURRENCY_LIMITERS.items()
+        },
+        "response_cache": RESPONSE_CACHE.stats(),
+        "quotas": COMPOSITE_RATE_LIMITER.stats(),
+        "api_keys": API_KEYS.stats()
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for this worker (text exposition format)."""
+    return Response(content=METRICS.render(), media_type=CONTENT_TYPE)
 
 
 @app.get("/api/v1/data")
@@ -193,6 +784,90 @@ async def create_data(
     }
 
 
+def _batch_records(raw: bytes) -> List[Dict]:
+    """
+    Parse and validate the records of a batch body.
+    
+    Raises:
+        RequestValidationError: 422 with the location of the first invalid
+            part, in FastAPI's validation error format
+    """
+    def invalid(loc: Tuple, error_type: str, msg: str, value: Any):
+        raise RequestValidationError([{"type": error_type, "loc": loc, "msg": msg, "input": value}])
+    
+    try:
+        body = json.loads(raw) if raw else None
+    except ValueError as e:
+        invalid(("body",), "json_invalid", f"JSON decode error: {e}", None)
+    if not isinstance(body, dict):
+        invalid(("body",), "dict_type", "Input should be an object", body)
+    records = body.get("records", [])
+    if not isinstance(records, list):
+        invalid(("body", "records"), "list_type", "Input should be a valid list", records)
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            invalid(("body", "records", index), "dict_type", "Input should be an object", record)
+        if "tenant_id" not in record:
+            invalid(("body", "records", index, "tenant_id"), "missing", "Field required", record)
+        tenant_id = record["tenant_id"]
+        if isinstance(tenant_id, bool) or not isinstance(tenant_id, (str, int)) or tenant_id == "":
+            invalid(
+                ("body", "records", index, "tenant_id"), "string_type",
+                "Input should be a non-empty string or an integer", tenant_id
+            )
+    return records
+
+
+@app.post("/api/v1/batch")
+async def ingest_batch(
+    request: Request,
+    user_info: Dict = Depends(verify_api_key)
+):
+    """
+    Example bulk endpoint that fans out across tenants.
+    
+    Body: {"records": [{"tenant_id": "...", ...}, ...]}
+    
+    Each tenant is charged one token per record, for all tenants in a
+    single acquire_many() call. Records of tenants over their limit are
+    rejected with the tenant's retry time. A malformed body is rejected
+    with 422, and a batch with more records for one tenant than its bucket
+    holds with 413, before anything is charged: retrying could never
+    admit those records.
+    """
+    records = _batch_records(await request.body())
+    records_per_tenant = Counter(str(record["tenant_id"]) for record in records)
+    
+    capacity = TENANT_RATE_LIMITER.capacity
+    oversized = {tenant_id: count for tenant_id, count in records_per_tenant.items() if count > capacity}
+    if oversized:
+        return JSONResponse(
+            status_code=413,
+            content={
+                "error": f"More than {capacity} records for a tenant in one batch",
+                "limit": capacity,
+                "tenants": oversized
+            }
+        )
+    
+    items = list(records_per_tenant.items())
+    decisions = TENANT_RATE_LIMITER.acquire_many(items)
+    
+    accepted = 0
+    rejected = {}
+    for (tenant_id, count), allowed, retry_after in zip(items, decisions.allowed, decisions.retry_after):
+        if allowed:
+            accepted += count
+        else:
+            rejected[tenant_id] = {"records": count, "retry_after": math.ceil(retry_after)}
+    
+    return {
+        "user_id": user_info.get("user_id"),
+        "accepted": accepted,
+        "rejected": rejected
+    }
+
+
 @app.get("/api/v1/public")
 async def public_endpoint(request: Request):
     """
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+API Key Registry
+
+Salted, hashed API key store for the API Gateway:
+- Keys are stored only as HMAC-SHA256(salt, key) digests
+- Lookups are O(1) and the digest comparison is constant-time
+- Hot reload from a JSON file or a local SQLite file, swapped atomically
+  in every worker without restarting it
+- Changed files are parsed in a background thread, never in a lookup; a
+  file that fails to load is logged and counted, and the previous table
+  keeps serving until a valid file replaces it
+
+File formats:
+    JSON:   {"salt": "<hex>", "keys": [{"key_hash": "<hex>", "user_id": "...", "tier": "..."}]}
+    SQLite: api_key_meta(salt TEXT), api_keys(key_hash TEXT PRIMARY KEY, user_id TEXT, tier TEXT)
+
+Usage:
+    # As a library
+    from api_key_registry import ApiKeyRegistry
+
+    registry = ApiKeyRegistry.from_file("api_keys.db")
+    user_info = registry.lookup("valid-api-key-1")  # {"user_id": ..., "tier": ...} or None
+
+    # CLI: add a key to a registry file (created if missing)
+    python api_key_registry.py add --file api_keys.db --user-id user1 --tier premium my-secret-key
+
+    # CLI: print the hash of a key for a given salt
+    python api_key_registry.py hash --salt 6f1c... my-secret-key
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lookup table: first 8 digest bytes -> (full digest, user_id, tier)
+KeyTable = Dict[int, Tuple[bytes, str, str]]
+
+
+def hash_api_key(api_key: str, salt: bytes) -> bytes:
+    """Return the salted HMAC-SHA256 digest of an API key."""
+    return hmac.new(salt, api_key.encode(), hashlib.sha256).digest()
+
+
+class ApiKeyRegistry:
+    """
+    Registry of API keys stored as salted hashes.
+
+    The table is indexed by a prefix of the keyed digest, which reveals
+    nothing about the key without the salt; the full digest is then checked
+    with hmac.compare_digest. Reloads build a new table and swap it in with
+    a single reference assignment, so concurrent lookups always see either
+    the old or the new table.
+    """
+
+    def __init__(self, salt: bytes, path: Optional[str] = None, check_interval: float = 1.0):
+        """
+        Initialize API key registry.
+
+        Args:
+            salt: HMAC salt used for every key hash
+            path: Optional JSON or SQLite file to load and watch for changes
+            check_interval: Minimum seconds between file change checks
+        """
+        self.salt = salt
+        self.path = path
+        self.check_interval = check_interval
+        self.reloads = 0
+        self.reload_failures = 0
+        self.last_error: Optional[str] = None
+        self._table: KeyTable = {}
+        self._signature: Optional[Tuple[int, ...]] = None
+        self._failed_signature: Optional[Tuple[int, ...]] = None
+        self._reloading = False
+        self._next_check = 0.0
+        self._reload_lock = threading.Lock()
+        if path is not None:
+            self.reload()
+
+    @classmethod
+    def from_plaintext(cls, keys: Dict[str, Dict], salt: Optional[bytes] = None) -> "ApiKeyRegistry":
+        """
+        Build an in-memory registry from a {api_key: {"user_id", "tier"}} dict.
+
+        Plaintext keys are hashed immediately and not kept.
+        """
+        registry = cls(salt if salt is not None else secrets.token_bytes(16))
+        registry._table = registry._build_table(
+            (hash_api_key(api_key, registry.salt), info["user_id"], info.get("tier", "basic"))
+            for api_key, info in keys.items()
+        )
+        return registry
+
+    @classmethod
+    def from_file(cls, path: str, check_interval: float = 1.0) -> "ApiKeyRegistry":
+        """Load a registry from a JSON or SQLite file (the salt is read from the file)."""
+        salt, _ = _read_registry_file(path)
+        return cls(salt, path=path, check_interval=check_interval)
+
+    @staticmethod
+    def _build_table(entries) -> KeyTable:
+        table: KeyTable = {}
+        for digest, user_id, tier in entries:
+            # Interning shares repeated user ids and tiers between entries
+            table[int.from_bytes(digest[:8], "big")] = (digest, sys.intern(user_id), sys.intern(tier))
+        return table
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def lookup(self, api_key: Optional[str]) -> Optional[Dict[str, str]]:
+        """
+        Resolve an API key.
+
+        Args:
+            api_key: Plaintext API key from the request
+
+        Returns:
+            {"user_id": ..., "tier": ...} or None if the key is unknown
+        """
+        if not api_key:
+            return None
+        self.maybe_reload()
+
+        digest = hash_api_key(api_key, self.salt)
+        entry = self._table.get(int.from_bytes(digest[:8], "big"))
+        if entry is None or not hmac.compare_digest(entry[0], digest):
+            return None
+        return {"user_id": entry[1], "tier": entry[2]}
+
+    def _file_signature(self) -> Tuple[int, ...]:
+        """(mtime_ns, size, inode) of the registry file and its SQLite WAL file, if any."""
+        signature = []
+        for path in (self.path, f"{self.path}-wal"):
+            try:
+                st = os.stat(path)
+                signature.extend((st.st_mtime_ns, st.st_size, st.st_ino))
+            except FileNotFoundError:
+                signature.extend((0, 0, 0))
+        return tuple(signature)
+
+    def maybe_reload(self):
+        """
+        Start a background reload if the file changed, checking at most
+        every check_interval seconds.
+
+        Never raises and never parses the file itself: lookups keep using the
+        current table until the new one is swapped in. A version of the file
+        that failed to load is not retried until the file changes again.
+        """
+        if self.path is None or self._reloading:
+            return
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+
+        signature = self._file_signature()
+        if signature == self._signature or signature == self._failed_signature:
+            return
+        self._reloading = True
+        threading.Thread(target=self._background_reload, name="api-key-reload", daemon=True).start()
+
+    def _background_reload(self):
+        try:
+            self.reload()
+        except Exception as e:
+            # Keep serving the previous table; retry when the file changes again
+            self.reload_failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.exception("Reloading API keys from '%s' failed; keeping the previous keys", self.path)
+        finally:
+            self._reloading = False
+
+    def reload(self):
+        """
+        Rebuild the table from the file and swap it in atomically.
+
+        Raises:
+            ValueError: If the salt in the file changed, or the file is malformed
+            OSError, sqlite3.Error: If the file cannot be read
+        """
+        with self._reload_lock:
+            signature = self._file_signature()
+            try:
+                salt, entries = _read_registry_file(self.path)
+                if salt != self.salt:
+                    raise ValueError(f"Salt in '{self.path}' changed; existing hashes would no longer match")
+                table = self._build_table(entries)
+            except Exception:
+                self._failed_signature = signature
+                raise
+            self._table = table
+            self._signature = signature
+            self._failed_signature = None
+            self.last_error = None
+            self.reloads += 1
+
+    def stats(self) -> Dict:
+        """Return key count and reload counters."""
+        return {
+            "keys": len(self._table),
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+            "last_error": self.last_error,
+        }
+
+
+def _is_sqlite(path: str) -> bool:
+    return Path(path).suffix in (".db", ".sqlite", ".sqlite3")
+
+
+def _read_registry_file(path: str):
+    """Return (salt, [(digest, user_id, tier), ...]) from a JSON or SQLite file."""
+    if _is_sqlite(path):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            (salt_hex,) = conn.execute("SELECT salt FROM api_key_meta").fetchone()
+            rows = conn.execute("SELECT key_hash, user_id, tier FROM api_keys").fetchall()
+        finally:
+            conn.close()
+    else:
+        with open(path) as f:
+            data = json.load(f)
+        salt_hex = data["salt"]
+        rows = [(k["key_hash"], k["user_id"], k.get("tier", "basic")) for k in data.get("keys", [])]
+
+    return bytes.fromhex(salt_hex), [(bytes.fromhex(h), user_id, tier) for h, user_id, tier in rows]
+
+
+def add_key(path: str, api_key: str, user_id: str, tier: str):
+    """
+    Add (or replace) a key in a registry file, creating the file if needed.
+
+    JSON files are rewritten to a temp file and renamed, so readers never
+    see a partial file; SQLite writes are transactional.
+    """
+    if _is_sqlite(path):
+        conn = sqlite3.connect(path)
+        try:
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS api_key_meta (salt TEXT NOT NULL)")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS api_keys "
+                    "(key_hash TEXT PRIMARY KEY, user_id TEXT NOT NULL, tier TEXT NOT NULL)"
+                )
+                row = conn.execute("SELECT salt FROM api_key_meta").fetchone()
+                if row is None:
+                    salt_hex = secrets.token_hex(16)
+                    conn.execute("INSERT INTO api_key_meta (salt) VALUES (?)", (salt_hex,))
+                else:
+                    salt_hex = row[0]
+                key_hash = hash_api_key(api_key, bytes.fromhex(salt_hex)).hex()
+                conn.execute(
+                    "INSERT OR REPLACE INTO api_keys (key_hash, user_id, tier) VALUES (?, ?, ?)",
+                    (key_hash, user_id, tier)
+                )
+        finally:
+            conn.close()
+        return
+
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+    else:
+        data = {"salt": secrets.token_hex(16), "keys": []}
+
+    key_hash = hash_api_key(api_key, bytes.fromhex(data["salt"])).hex()
+    data["keys"] = [k for k in data["keys"] if k["key_hash"] != key_hash]
+    data["keys"].append({"key_hash": key_hash, "user_id": user_id, "tier": tier})
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main():
+    """CLI entry point for managing API key registry files."""
+    parser = argparse.ArgumentParser(
+        description="Manage hashed API key registry files",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="Add a key to a JSON or SQLite registry file")
+    add_parser.add_argument("--file", required=True, help="Registry file (.json, .db, .sqlite)")
+    add_parser.add_argument("--user-id", required=True, help="User ID for the key")
+    add_parser.add_argument("--tier", default="basic", help="Rate limit tier (default: basic)")
+    add_parser.add_argument("api_key", help="Plaintext API key")
+
+    hash_parser = subparsers.add_parser("hash", help="Print the salted hash of a key")
+    hash_parser.add_argument("--salt", required=True, help="Salt as hex")
+    hash_parser.add_argument("api_key", help="Plaintext API key")
+
+    args = parser.parse_args()
+
+    if args.command == "add":
+        add_key(args.file, args.api_key, args.user_id, args.tier)
+        print(f"✅ Key for {args.user_id} ({args.tier}) stored in {args.file}")
+    elif args.command == "hash":
+        print(hash_api_key(args.api_key, bytes.fromhex(args.salt)).hex())
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Rate Limit Middleware Benchmark
+
+Measures per-request overhead of the pure ASGI RateLimitMiddleware against
+the BaseHTTPMiddleware variant, by driving small FastAPI apps in-process
+(no sockets, no HTTP client) and comparing against the same app without
+middleware. The pure ASGI variant is also measured with metrics recording
+enabled, through the gateway's real recording path (RateLimitMetrics,
+labelled by the matched route).
+
+Variants run interleaved, in rounds of --block requests each (in a new
+random order every round, with the garbage collector paused), so that
+drift in machine load affects them alike. Overheads are the median over
+rounds of each variant's mean minus the baseline's mean in that round;
+the cost of recording metrics is the same paired difference between the
+pure ASGI variants with and without metrics.
+
+Usage:
+    python benchmark_middleware.py
+    python benchmark_middleware.py --requests 50000 --warmup 2000
+"""
+
+import argparse
+import asyncio
+import gc
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI
+
+sys.path.insert(0, str(Path(__file__).parent))
+from rate_limiting_strategies import SlidingWindowCounterRateLimiter
+from benchmark_rate_limiters import summarize
+from metrics_registry import MetricsRegistry
+from api_gateway_middleware import BaseHTTPRateLimitMiddleware, RateLimitMiddleware
+
+
+def build_app(middleware_class: Optional[type], **options) -> FastAPI:
+    """Build a minimal app, optionally wrapped in a rate limit middleware."""
+    app = FastAPI()
+
+    @app.get("/api/v1/public")
+    async def public_endpoint():
+        return {"message": "Public endpoint"}
+
+    if middleware_class is not None:
+        # Limits high enough that every request takes the allowed path
+        limiters = {
+            tier: SlidingWindowCounterRateLimiter(max_requests=10**12, window_seconds=60)
+            for tier in ("premium", "basic", "anonymous")
+        }
+        app.add_middleware(middleware_class, limiters=limiters, **options)
+    return app
+
+
+async def run_requests(app, num_requests: int) -> List[float]:
+    """Send num_requests GET requests through the ASGI app; return latencies in seconds."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/public",
+        "raw_path": b"/api/v1/public",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    latencies = []
+    for _ in range(num_requests):
+        start = time.perf_counter()
+        await app(dict(scope), receive, send)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    """CLI entry point for the middleware benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark rate limit middleware overhead",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=20000,
+        help="Measured requests per variant"
+    )
+
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=1000,
+        help="Warm-up requests per variant (not measured)"
+    )
+
+    parser.add_argument(
+        "--block",
+        type=int,
+        default=200,
+        help="Requests per variant in each round"
+    )
+
+    args = parser.parse_args()
+
+    variants = {
+        "no middleware": build_app(None),
+        "BaseHTTPMiddleware": build_app(BaseHTTPRateLimitMiddleware),
+        "pure ASGI": build_app(RateLimitMiddleware),
+        "pure ASGI + metrics": build_app(RateLimitMiddleware, metrics=MetricsRegistry()),
+    }
+    rounds = max(1, args.requests // args.block)
+
+    async def run_all():
+        latencies: Dict[str, List[float]] = {name: [] for name in variants}
+        # Per round: variant mean minus the baseline mean of the same round
+        deltas: Dict[str, List[float]] = {name: [] for name in variants}
+        for name, app in variants.items():
+            await run_requests(app, args.warmup)
+        order = list(variants.items())
+        gc.disable()
+        try:
+            for _ in range(rounds):
+                random.shuffle(order)
+                means = {}
+                for name, app in order:
+                    block = await run_requests(app, args.block)
+                    latencies[name].extend(block)
+                    means[name] = sum(block) / len(block)
+                for name in variants:
+                    deltas[name].append(means[name] - means["no middleware"])
+                gc.collect()
+        finally:
+            gc.enable()
+        return latencies, deltas
+
+    latencies, deltas = asyncio.run(run_all())
+
+    print(f"\nRate limit middleware overhead ({rounds * args.block} requests per variant, {rounds} rounds)\n")
+    print(f"{'Variant':<22} {'mean (µs)':>10} {'p50 (µs)':>10} {'p99 (µs)':>10} {'overhead (µs)':>14}")
+    for name in variants:
+        stats = summarize(latencies[name])
+        overhead = statistics.median(deltas[name]) * 1e6
+        print(
+            f"{name:<22} {stats['mean_us']:>10.1f} {stats['p50_us']:>10.1f} "
+            f"{stats['p99_us']:>10.1f} {overhead:>14.1f}"
+        )
+
+    recording = [
+        with_metrics - without
+        for with_metrics, without in zip(deltas["pure ASGI + metrics"], deltas["pure ASGI"])
+    ]
+    quartiles = statistics.quantiles(recording, n=4) if len(recording) > 1 else recording * 3
+    print(
+        f"\nMetrics recording: {statistics.median(recording) * 1e6:.2f} µs per request "
+        f"(median over rounds; quartiles {quartiles[0] * 1e6:.2f} to {quartiles[2] * 1e6:.2f} µs)"
+    )
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Benchmark Suite
+
+Measures every limiter class in rate_limiting_strategies.py:
+- Decisions per second (untimed tight loop)
+- p50/p99 latency per decision
+- Resident memory per million identifiers (tracemalloc, scaled)
+
+Keys are drawn from a uniform or a Zipfian distribution (a few hot keys,
+a long tail of cold ones), which is what gateway traffic looks like. The
+suite can also drive the FastAPI gateway app in-process with client IPs
+drawn from the same distributions.
+
+Usage:
+    python benchmark_rate_limiters.py
+    python benchmark_rate_limiters.py --decisions 500000 --keys 1000000 --zipf-s 1.2
+    python benchmark_rate_limiters.py --app --app-requests 20000
+    python benchmark_rate_limiters.py --output baseline.json
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent))
+from rate_limiting_strategies import (
+    GCRARateLimiter,
+    IdentifierStore,
+    RateLimiter,
+    SlidingWindowCounterRateLimiter,
+    SlidingWindowRateLimiter,
+    TokenBucketRateLimiter,
+)
+
+
+# Limiter factories: (max_keys) -> limiter with comparable limits (100 per minute)
+LIMITERS: Dict[str, Callable[[int], object]] = {
+    "RateLimiter": lambda max_keys: RateLimiter(
+        100, 60, store=IdentifierStore(max_keys=max_keys, ttl_seconds=60)
+    ),
+    "TokenBucketRateLimiter": lambda max_keys: TokenBucketRateLimiter(
+        100, 100 / 60, store=IdentifierStore(max_keys=max_keys, ttl_seconds=60)
+    ),
+    "GCRARateLimiter": lambda max_keys: GCRARateLimiter(
+        100, 100 / 60, store=IdentifierStore(max_keys=max_keys, ttl_seconds=60)
+    ),
+    "SlidingWindowRateLimiter": lambda max_keys: SlidingWindowRateLimiter(
+        100, 60, store=IdentifierStore(max_keys=max_keys, ttl_seconds=60)
+    ),
+    "SlidingWindowCounterRateLimiter": lambda max_keys: SlidingWindowCounterRateLimiter(
+        100, 60, store=IdentifierStore(max_keys=max_keys, ttl_seconds=120)
+    ),
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """Return mean/p50/p99 latency in microseconds."""
+    ordered = sorted(latencies)
+    return {
+        "mean_us": statistics.fmean(ordered) * 1e6,
+        "p50_us": percentile(ordered, 50) * 1e6,
+        "p99_us": percentile(ordered, 99) * 1e6,
+    }
+
+
+def generate_keys(distribution: str, num_keys: int, count: int, zipf_s: float = 1.1, seed: int = 42) -> List[str]:
+    """
+    Draw count identifiers out of num_keys distinct ones.
+
+    Args:
+        distribution: "uniform" or "zipf" (rank k has weight 1 / k**zipf_s)
+        num_keys: Size of the identifier population
+        count: Number of identifiers to draw
+        zipf_s: Zipf exponent (higher = more skewed)
+        seed: Random seed, so runs are comparable
+    """
+    rng = random.Random(seed)
+    population = [f"user-{i}" for i in range(num_keys)]
+    if distribution == "uniform":
+        return rng.choices(population, k=count)
+    if distribution != "zipf":
+        raise ValueError(f"Unknown distribution: {distribution}")
+
+    cum_weights = list(itertools.accumulate(1.0 / rank ** zipf_s for rank in range(1, num_keys + 1)))
+    total = cum_weights[-1]
+    return [population[bisect.bisect_left(cum_weights, rng.random() * total)] for _ in range(count)]
+
+
+def bench_decisions(factory: Callable[[int], object], keys: List[str], max_keys: int) -> Dict[str, float]:
+    """Throughput and per-decision latency of acquire() over keys."""
+    # Throughput: untimed loop, so timer overhead does not count
+    limiter = factory(max_keys)
+    acquire = limiter.acquire
+    start = time.perf_counter()
+    for key in keys:
+        acquire(key)
+    elapsed = time.perf_counter() - start
+
+    # Latency: fresh limiter so both passes see the same allow/deny mix
+    limiter = factory(max_keys)
+    acquire = limiter.acquire
+    perf_counter = time.perf_counter
+    latencies = []
+    denied = 0
+    for key in keys:
+        t0 = perf_counter()
+        decision = acquire(key)
+        latencies.append(perf_counter() - t0)
+        denied += not decision.allowed
+
+    return {
+        "decisions_per_sec": len(keys) / elapsed,
+        **summarize(latencies),
+        "denied_ratio": denied / len(keys),
+    }
+
+
+def bench_memory(factory: Callable[[int], object], num_keys: int) -> Dict[str, float]:
+    """Resident limiter memory for num_keys distinct identifiers, scaled to one million."""
+    keys = [f"user-{i}" for i in range(num_keys)]
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        limiter = factory(num_keys)
+        for key in keys:
+            limiter.acquire(key)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Key strings are owned by the caller here but by the request in production;
+    # they are not counted, only the limiter's own structures are
+    resident = after - before
+    return {
+        "resident_keys": limiter.store.resident_keys,
+        "bytes_per_key": resident / num_keys,
+        "mb_per_million_keys": resident / num_keys * 1_000_000 / 2**20,
+    }
+
+
+def bench_app(keys: List[str]) -> Dict[str, float]:
+    """Drive the gateway app in-process, one anonymous client IP per key."""
+    import asyncio
+    from api_gateway_middleware import RATE_LIMITERS, app
+
+    # Start from empty limiter state so runs do not affect each other
+    for limiter in RATE_LIMITERS.values():
+        limiter.reset()
+    statuses: Dict[int, int] = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses[message["status"]] = statuses.get(message["status"], 0) + 1
+
+    async def run() -> List[float]:
+        latencies = []
+        for key in keys:
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": "/api/v1/public",
+                "raw_path": b"/api/v1/public",
+                "root_path": "",
+                "query_string": b"",
+                "headers": [(b"host", b"localhost")],
+                "client": (key, 50000),
+                "server": ("localhost", 8000),
+            }
+            t0 = time.perf_counter()
+            await app(scope, receive, send)
+            latencies.append(time.perf_counter() - t0)
+        return latencies
+
+    start = time.perf_counter()
+    latencies = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    return {
+        "requests_per_sec": len(keys) / elapsed,
+        **summarize(latencies),
+        "rejected_ratio": statuses.get(429, 0) / len(keys),
+    }
+
+
+def main():
+    """CLI entry point for the limiter benchmark suite."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark rate limiter throughput, latency and memory",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        "--decisions",
+        type=int,
+        default=200_000,
+        help="Decisions per limiter and distribution"
+    )
+
+    parser.add_argument(
+        "--keys",
+        type=int,
+        default=100_000,
+        help="Distinct identifiers in the key population"
+    )
+
+    parser.add_argument(
+        "--zipf-s",
+        type=float,
+        default=1.1,
+        help="Zipf exponent for the skewed distribution"
+    )
+
+    parser.add_argument(
+        "--memory-keys",
+        type=int,
+        default=100_000,
+        help="Distinct identifiers inserted for the memory measurement"
+    )
+
+    parser.add_argument(
+        "--limiter",
+        choices=sorted(LIMITERS),
+        action="append",
+        help="Limiter class to benchmark (repeatable, default: all)"
+    )
+
+    parser.add_argument(
+        "--app",
+        action="store_true",
+        help="Also drive the FastAPI gateway app in-process (requires fastapi)"
+    )
+
+    parser.add_argument(
+        "--app-requests",
+        type=int,
+        default=20_000,
+        help="Requests per distribution for --app"
+    )
+
+    parser.add_argument(
+        "--output",
+        help="Write results as JSON to this file (for regression tracking)"
+    )
+
+    args = parser.parse_args()
+
+    names = args.limiter or list(LIMITERS)
+    distributions = {
+        "uniform": generate_keys("uniform", args.keys, args.decisions),
+        "zipf": generate_keys("zipf", args.keys, args.decisions, zipf_s=args.zipf_s),
+    }
+    results: Dict[str, Dict] = {"decisions": {}, "memory": {}, "app": {}}
+
+    print(f"\nDecisions ({args.decisions} per run, {args.keys} distinct keys, zipf s={args.zipf_s})\n")
+    print(
+        f"{'Limiter':<32} {'keys':<8} {'decisions/s':>12} {'p50 (µs)':>9} "
+        f"{'p99 (µs)':>9} {'denied':>7}"
+    )
+    for name in names:
+        for distribution, keys in distributions.items():
+            stats = bench_decisions(LIMITERS[name], keys, args.keys)
+            results["decisions"].setdefault(name, {})[distribution] = stats
+            print(
+                f"{name:<32} {distribution:<8} {stats['decisions_per_sec']:>12,.0f} "
+                f"{stats['p50_us']:>9.2f} {stats['p99_us']:>9.2f} {stats['denied_ratio']:>7.1%}"
+            )
+
+    print(f"\nMemory ({args.memory_keys} identifiers, one request each)\n")
+    print(f"{'Limiter':<32} {'bytes/key':>10} {'MB per 1M keys':>15}")
+    for name in names:
+        stats = bench_memory(LIMITERS[name], args.memory_keys)
+        results["memory"][name] = stats
+        print(f"{name:<32} {stats['bytes_per_key']:>10.0f} {stats['mb_per_million_keys']:>15.1f}")
+
+    if args.app:
+        print(f"\nGateway app in-process ({args.app_requests} requests, anonymous tier)\n")
+        print(f"{'keys':<8} {'requests/s':>11} {'p50 (µs)':>9} {'p99 (µs)':>9} {'429':>7}")
+        for distribution, keys in distributions.items():
+            stats = bench_app(keys[:args.app_requests])
+            results["app"][distribution] = stats
+            print(
+                f"{distribution:<8} {stats['requests_per_sec']:>11,.0f} {stats['p50_us']:>9.1f} "
+                f"{stats['p99_us']:>9.1f} {stats['rejected_ratio']:>7.1%}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Limiter State Snapshots
+
+Compact binary snapshot and lazy restore of in-process limiter state, so a
+deploy does not hand every client a fresh full quota at once:
+- save_snapshot() writes the limiter's IdentifierStore to a versioned,
+  memory-mappable file (atomically, via a temp file and rename)
+- load_snapshot() maps the file and attaches it to the store in O(1);
+  each identifier is decoded on its first lookup, so startup time does
+  not depend on the number of keys
+
+Limiters with a shared backend do not need snapshots: shared memory and
+Redis already outlive the worker processes.
+
+File layout (little endian):
+    header  magic "RLSNAP01", version, kind, entry count, created_at, newest last_seen
+    index   count x (key_hash u64, data_offset u64), sorted by key_hash
+    data    per entry: key_len u16, last_seen f64, key bytes, state payload
+
+Usage:
+    from limiter_snapshot import load_snapshot, save_snapshot
+
+    save_snapshot(limiter, "/var/lib/gateway/basic.rlsnap")  # at shutdown
+    load_snapshot(limiter, "/var/lib/gateway/basic.rlsnap")  # at startup
+
+    # CLI: inspect a snapshot file
+    python limiter_snapshot.py /var/lib/gateway/basic.rlsnap
+"""
+
+import argparse
+import bisect
+import mmap
+import os
+import struct
+import time
+from collections import deque
+from typing import Any, Optional, Tuple
+
+from rate_limit_backends import _key_hash
+from rate_limiting_strategies import (
+    GCRARateLimiter,
+    RateLimiter,
+    SlidingWindowCounterRateLimiter,
+    SlidingWindowRateLimiter,
+    TokenBucketRateLimiter,
+)
+
+
+MAGIC = b"RLSNAP01"
+VERSION = 1
+# magic, version, kind, entry count, created_at, newest last_seen
+HEADER = struct.Struct("<8sHHQdd")
+HEADER_SIZE = 64
+INDEX_ENTRY = struct.Struct("<QQ")  # key_hash, data_offset
+ENTRY = struct.Struct("<Hd")  # key_len, last_seen
+
+# Limiter class -> kind code stored in the header (never reuse a code)
+KINDS = {
+    RateLimiter: 1,
+    TokenBucketRateLimiter: 2,
+    GCRARateLimiter: 3,
+    SlidingWindowRateLimiter: 4,
+    SlidingWindowCounterRateLimiter: 5,
+}
+KIND_NAMES = {code: cls.__name__ for cls, code in KINDS.items()}
+
+LOG_COUNT = struct.Struct("<I")
+BUCKET = struct.Struct("<dd")  # tokens, last_refill
+GCRA = struct.Struct("<d")  # theoretical arrival time
+COUNTER = struct.Struct("<qII")  # window_index, current, previous
+
+
+def _limiter_kind(limiter) -> int:
+    kind = KINDS.get(type(limiter))
+    if kind is None:
+        raise ValueError(f"{type(limiter).__name__} has no snapshot format")
+    if limiter.backend is not None:
+        raise ValueError("Limiters with a shared backend keep their state there; nothing to snapshot")
+    return kind
+
+
+def _encode_state(kind: int, state: Any) -> bytes:
+    if kind in (1, 4):
+        return LOG_COUNT.pack(len(state)) + struct.pack(f"<{len(state)}d", *state)
+    if kind == 2:
+        return BUCKET.pack(*state)
+    if kind == 3:
+        return GCRA.pack(state)
+    return COUNTER.pack(*state)
+
+
+def _decode_state(kind: int, buf, offset: int) -> Any:
+    if kind in (1, 4):
+        (count,) = LOG_COUNT.unpack_from(buf, offset)
+        return deque(struct.unpack_from(f"<{count}d", buf, offset + LOG_COUNT.size))
+    if kind == 2:
+        return list(BUCKET.unpack_from(buf, offset))
+    if kind == 3:
+        return GCRA.unpack_from(buf, offset)[0]
+    return list(COUNTER.unpack_from(buf, offset))
+
+
+class _HashColumn:
+    """Sequence view of the sorted key hashes in the index, for bisect."""
+
+    def __init__(self, buf, count: int):
+        self._buf = buf
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> int:
+        return INDEX_ENTRY.unpack_from(self._buf, HEADER_SIZE + index * INDEX_ENTRY.size)[0]
+
+
+class LimiterSnapshot:
+    """
+    Read-only, memory-mapped snapshot attached to an IdentifierStore.
+
+    Lookups binary-search the index and decode only the requested entry;
+    pages of the file are read by the OS on first touch.
+    """
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None):
+        """
+        Map a snapshot file and validate its header.
+
+        Args:
+            path: Snapshot file
+            ttl_seconds: Idle TTL of the target store; once every entry is
+                older than this the snapshot can be dropped
+
+        Raises:
+            ValueError: If the file is not a snapshot of a supported version
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER_SIZE:
+            self.close()
+            raise ValueError(f"'{path}' is too short to be a limiter snapshot")
+        magic, version, kind, count, created_at, newest = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"'{path}' is not a version {VERSION} limiter snapshot")
+
+        self.kind = kind
+        self.count = count
+        self.created_at = created_at
+        self.expires_at = newest + ttl_seconds if ttl_seconds is not None else None
+        self._hashes = _HashColumn(self._mmap, count)
+
+    def lookup(self, identifier: str) -> Optional[Tuple[float, Any]]:
+        """Return (last_seen, state) for identifier, or None if not in the snapshot."""
+        if self._mmap is None:
+            return None
+        key = identifier.encode()
+        key_hash = _key_hash(identifier)
+        buf = self._mmap
+        index = bisect.bisect_left(self._hashes, key_hash)
+
+        # Walk the (rare) run of entries sharing this hash
+        while index < self.count:
+            entry_hash, offset = INDEX_ENTRY.unpack_from(buf, HEADER_SIZE + index * INDEX_ENTRY.size)
+            if entry_hash != key_hash:
+                return None
+            key_len, last_seen = ENTRY.unpack_from(buf, offset)
+            key_start = offset + ENTRY.size
+            if buf[key_start:key_start + key_len] == key:
+                return last_seen, _decode_state(self.kind, buf, key_start + key_len)
+            index += 1
+        return None
+
+    def close(self):
+        """Unmap the file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+def save_snapshot(limiter, path: str) -> int:
+    """
+    Write the limiter's in-process state to path.
+
+    Expired entries are skipped. The file is written next to path and
+    renamed over it, so readers never see a partial snapshot.
+
+    Returns:
+        Number of identifiers written
+    """
+    kind = _limiter_kind(limiter)
+    store = limiter.store
+    now = time.time()
+
+    entries = []
+    for identifier, last_seen, state in store.items(now):
+        entries.append((_key_hash(identifier), identifier.encode(), last_seen, _encode_state(kind, state)))
+    entries.sort(key=lambda entry: entry[0])
+
+    index = bytearray()
+    data = bytearray()
+    data_start = HEADER_SIZE + len(entries) * INDEX_ENTRY.size
+    newest = 0.0
+    for key_hash, key, last_seen, payload in entries:
+        index += INDEX_ENTRY.pack(key_hash, data_start + len(data))
+        data += ENTRY.pack(len(key), last_seen) + key + payload
+        newest = max(newest, last_seen)
+
+    header = HEADER.pack(MAGIC, VERSION, kind, len(entries), now, newest)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        f.write(index)
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+def load_snapshot(limiter, path: str) -> Optional[LimiterSnapshot]:
+    """
+    Attach a snapshot to the limiter's store for lazy restore.
+
+    Returns:
+        The attached snapshot, or None if the file does not exist
+
+    Raises:
+        ValueError: If the file is invalid or was written by another limiter class
+    """
+    kind = _limiter_kind(limiter)
+    if not os.path.exists(path):
+        return None
+
+    snapshot = LimiterSnapshot(path, ttl_seconds=limiter.store.ttl_seconds)
+    if snapshot.kind != kind:
+        snapshot.close()
+        raise ValueError(
+            f"'{path}' holds {KIND_NAMES.get(snapshot.kind, 'unknown')} state, "
+            f"not {type(limiter).__name__}"
+        )
+    limiter.store.attach_snapshot(snapshot)
+    return snapshot
+
+
+def main():
+    """CLI entry point for inspecting snapshot files."""
+    parser = argparse.ArgumentParser(
+        description="Inspect a limiter state snapshot",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("path", help="Snapshot file")
+    parser.add_argument("--identifier", action="append", help="Print the stored state of an identifier")
+    args = parser.parse_args()
+
+    snapshot = LimiterSnapshot(args.path)
+    age = time.time() - snapshot.created_at
+    print(f"Limiter:    {KIND_NAMES.get(snapshot.kind, snapshot.kind)}")
+    print(f"Entries:    {snapshot.count}")
+    print(f"Created:    {age:.0f}s ago")
+    print(f"File size:  {os.path.getsize(args.path)} bytes")
+    for identifier in args.identifier or []:
+        print(f"{identifier}: {snapshot.lookup(identifier)}")
+    snapshot.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Metrics Registry
+
+Minimal in-process metrics for the API Gateway, exposed in the Prometheus
+text exposition format (version 0.0.4) without external dependencies:
+- Counters and fixed-bucket histograms with labels
+- Callback metrics, read from existing stats() methods at scrape time
+- Rendering for a /metrics endpoint
+
+Updates are lock-free: a labelled child is resolved once and recording is
+a plain attribute update (plus a bisect over the bucket bounds for
+histograms). This is safe because each gateway worker runs one event loop
+and all recording happens on it; each worker exposes its own series, as
+with the rest of the in-process state.
+
+Usage:
+    from metrics_registry import CONTENT_TYPE, MetricsRegistry
+
+    metrics = MetricsRegistry()
+    requests = metrics.counter("gateway_requests_total", "Requests", ("tier", "status"))
+    latency = metrics.histogram("gateway_request_duration_seconds", "Request latency", ("tier",))
+
+    requests.labels("basic", "200").inc()
+    latency.labels("basic").observe(0.012)
+    body = metrics.render()
+
+    # CLI: measure the recording work the gateway does per request (the
+    # end-to-end cost is measured by benchmark_middleware.py)
+    python metrics_registry.py --iterations 1000000
+"""
+
+import argparse
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; from sub-millisecond gateway work up to slow backends
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds; for in-process decisions that take microseconds
+MICROSECOND_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2)
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape(value: str) -> str:
+    return _escape_help(value).replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        """Increase the counter by amount (must not be negative)."""
+        self.value += amount
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One count per bucket plus the +Inf bucket; cumulated at render time
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Record one observation."""
+        # Bucket upper bounds are inclusive (le), hence bisect_left
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Metric:
+    """Metric family: one child per distinct label values tuple."""
+
+    metric_type = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values) -> object:
+        """
+        Return the child for these label values, creating it on first use.
+
+        Hot paths should resolve children once and keep them.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            # Non-string values (e.g. status codes) share the child of their
+            # string form and are cached as an alias for the next lookup
+            key = tuple(str(v) for v in values)
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            self._children[values] = child
+        return child
+
+    def _series(self) -> List[Tuple[Tuple[str, ...], object]]:
+        return [
+            (values, child)
+            for values, child in self._children.items()
+            if all(isinstance(v, str) for v in values)
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    metric_type = "counter"
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float = 1):
+        """Increase the unlabelled counter."""
+        self._default.inc(amount)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in self._series()
+        ]
+
+
+class Histogram(_Metric):
+    """Histogram with fixed bucket upper bounds."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        bounds = tuple(sorted(buckets))
+        if not bounds or math.isinf(bounds[-1]):
+            raise ValueError("buckets must be finite upper bounds (+Inf is implicit)")
+        self.bounds = bounds
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.bounds)
+
+    def observe(self, value: float):
+        """Record one observation in the unlabelled histogram."""
+        self._default.observe(value)
+
+    def render(self) -> List[str]:
+        lines = []
+        names = self.labelnames + ("le",)
+        for values, child in self._series():
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), child.counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, values + (_format_value(bound),))} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """
+    Counter or gauge whose samples are read from a callback at scrape time.
+
+    Meant for values other components already track (store sizes, cache
+    hit counters, concurrency limits), so nothing is recorded per request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        metric_type: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[Sequence[str], float]]]
+    ):
+        """
+        Args:
+            name: Metric name
+            help_text: HELP text
+            metric_type: "counter" or "gauge"
+            labelnames: Label names
+            collect: Returns (label values, value) pairs
+        """
+        if metric_type not in ("counter", "gauge"):
+            raise ValueError(f"Unsupported callback metric type: {metric_type}")
+        self.name = name
+        self.help = help_text
+        self.metric_type = metric_type
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, tuple(map(str, values)))} {_format_value(value)}"
+            for values, value in self.collect()
+        ]
+
+
+class MetricsRegistry:
+    """Named metric families rendered together in the text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as {type(metric).__name__}")
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Return the counter called name, registering it on first use."""
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Return the histogram called name, registering it on first use."""
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets)
+
+    def register_callback(
+        self,
+        name: str,
+        help_text: str,
+        metric_type: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[Sequence[str], float]]]
+    ) -> CallbackMetric:
+        """Register (or replace) a metric read from collect() at scrape time."""
+        metric = self._metrics[name] = CallbackMetric(name, help_text, metric_type, labelnames, collect)
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {name} {metric.metric_type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def main():
+    """CLI entry point for measuring the recording overhead."""
+    parser = argparse.ArgumentParser(
+        description="Measure the per-request cost of recording gateway metrics",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=1_000_000,
+        help="Simulated requests per run"
+    )
+
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Runs; the fastest one is reported"
+    )
+
+    args = parser.parse_args()
+
+    metrics = MetricsRegistry()
+    decision_latency = metrics.histogram(
+        "decision_seconds", "Decision latency", ("tier",), MICROSECOND_BUCKETS
+    ).labels("basic")
+    request_latency = metrics.histogram("request_seconds", "Request latency", ("tier", "handler", "method", "status"))
+    series = {("/api/v1/data", "GET", 200): request_latency.labels("basic", "/api/v1/data", "GET", 200)}
+    perf_counter = time.perf_counter
+
+    def baseline():
+        start = perf_counter()
+        for _ in range(args.iterations):
+            pass
+        return perf_counter() - start
+
+    def instrumented():
+        # What the gateway's RateLimitMiddleware records per request: two
+        # timer reads, the lookup of the request's (handler, method, status)
+        # series and its latency observation, plus one decision timing in 16
+        start = perf_counter()
+        until_sample = 0
+        for _ in range(args.iterations):
+            t0 = perf_counter()
+            until_sample -= 1
+            if until_sample < 0:
+                until_sample = 15
+                decision_latency.observe(perf_counter() - t0)
+            series[("/api/v1/data", "GET", 200)].observe(perf_counter() - t0)
+        return perf_counter() - start
+
+    # Best of several runs, so scheduler noise does not count as overhead
+    overhead = (
+        min(instrumented() for _ in range(args.repeat)) - min(baseline() for _ in range(args.repeat))
+    ) / args.iterations
+    print(f"Recording overhead: {overhead * 1e9:.0f} ns per request ({args.iterations} requests)")
+    print(f"Exposition size:    {len(metrics.render())} bytes")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
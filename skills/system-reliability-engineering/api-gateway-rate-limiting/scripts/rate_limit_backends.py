@@ -0,0 +1,781 @@
+#!/usr/bin/env python3
+"""
+Rate Limit Backends
+
+Shared state storage for the limiters in rate_limiting_strategies.py, so that
+every worker process (and every gateway node) enforces one common limit
+instead of N independent ones:
+- SharedMemoryBackend: workers on the same host (POSIX shared memory)
+- RedisBackend: workers on any host (atomic Lua scripts, pipelined batches)
+
+Each backend instance is one keyspace; use one instance per limiter.
+
+Usage:
+    from rate_limit_backends import SharedMemoryBackend, RedisBackend
+    from rate_limiting_strategies import TokenBucketRateLimiter
+
+    # Same host, e.g. uvicorn --workers 4
+    limiter = TokenBucketRateLimiter(100, 10.0, backend=SharedMemoryBackend("gateway-basic"))
+
+    # Any host
+    limiter = TokenBucketRateLimiter(
+        100, 10.0, backend=RedisBackend.from_url("redis://localhost:6379/0", prefix="ratelimit:basic:")
+    )
+
+    # Local stand-in server for tests (any Redis-protocol server with Lua,
+    # e.g. `redis-server --port 6390` or fakeredis[lua])
+    import fakeredis
+    backend = RedisBackend(fakeredis.FakeRedis())
+"""
+
+import hashlib
+import itertools
+import math
+import os
+import struct
+import sys
+import tempfile
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Not on Windows; only SharedMemoryBackend needs it
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+# Backend results, one per algorithm:
+# log:     (allowed, count, retry_after, newest_timestamp)
+# bucket:  (allowed, tokens)
+# counter: (allowed, window_index, current_count, previous_count)
+# gcra:    (allowed, theoretical_arrival_time)
+LogResult = Tuple[bool, int, float, float]
+BucketResult = Tuple[bool, float]
+CounterResult = Tuple[bool, int, int, int]
+GCRAResult = Tuple[bool, float]
+
+
+class RateLimitBackend:
+    """
+    Interface for shared limiter state.
+
+    Each method performs the whole check-and-consume step atomically for one
+    identifier. A cost of 0 only reads the state and never creates entries.
+    A negative cost returns quota consumed earlier (rollback of an allowed
+    request); it is always allowed and never creates entries either.
+    """
+
+    def log_acquire(
+        self, identifier: str, now: float, max_requests: int, window_seconds: float, cost: int
+    ) -> LogResult:
+        """Timestamp log used by RateLimiter and SlidingWindowRateLimiter."""
+        raise NotImplementedError
+
+    def bucket_acquire(
+        self, identifier: str, now: float, capacity: float, refill_rate: float, cost: float
+    ) -> BucketResult:
+        """Token bucket used by TokenBucketRateLimiter."""
+        raise NotImplementedError
+
+    def counter_acquire(
+        self, identifier: str, now: float, max_requests: int, window_seconds: float, cost: int
+    ) -> CounterResult:
+        """Two-counter state used by SlidingWindowCounterRateLimiter."""
+        raise NotImplementedError
+
+    def gcra_acquire(
+        self, identifier: str, now: float, emission_interval: float, tolerance: float, cost: float
+    ) -> GCRAResult:
+        """Theoretical arrival time used by GCRARateLimiter."""
+        raise NotImplementedError
+
+    def bucket_acquire_many(
+        self, items: List[Tuple[str, float]], now: float, capacity: float, refill_rate: float
+    ) -> List[BucketResult]:
+        """bucket_acquire for many (identifier, cost) pairs."""
+        return [self.bucket_acquire(identifier, now, capacity, refill_rate, cost) for identifier, cost in items]
+
+    def counter_acquire_many(
+        self, items: List[Tuple[str, int]], now: float, max_requests: int, window_seconds: float
+    ) -> List[CounterResult]:
+        """counter_acquire for many (identifier, cost) pairs."""
+        return [self.counter_acquire(identifier, now, max_requests, window_seconds, cost) for identifier, cost in items]
+
+    def gcra_acquire_many(
+        self, items: List[Tuple[str, float]], now: float, emission_interval: float, tolerance: float
+    ) -> List[GCRAResult]:
+        """gcra_acquire for many (identifier, cost) pairs."""
+        return [self.gcra_acquire(identifier, now, emission_interval, tolerance, cost) for identifier, cost in items]
+
+    def reset(self, identifier: Optional[str] = None):
+        """Reset state for identifier or all."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """Return backend counters."""
+        return {}
+
+
+def _key_hash(identifier: str) -> int:
+    """Stable 64-bit hash of identifier (never 0, which marks an empty slot)."""
+    digest = hashlib.blake2b(identifier.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") | 1
+
+
+class SharedMemoryBackend(RateLimitBackend):
+    """
+    Shared-memory backend for worker processes on one host.
+
+    State lives in a fixed-size, set-associative table in a named POSIX
+    shared memory segment, so memory is bounded by construction. An
+    identifier hashes to one set of `ways` slots; when the set is full the
+    least recently used slot is replaced. Sets are guarded by byte-range
+    locks on a lock file (fcntl), so workers only contend on the same set.
+
+    The segment outlives the workers (which also keeps limits across
+    restarts); call unlink() from the supervisor to remove it.
+
+    Sizing: the segment takes 64 + sets * ways * (16 + payload) bytes of
+    /dev/shm, where the payload depends on the limiter using it:
+    - token bucket, GCRA: 8 bytes (24 per slot; 3 MB with the defaults)
+    - sliding window counter: 16 bytes (32 per slot; 4 MB)
+    - sliding log: 8 + 8 * max_requests bytes, one timestamp per request
+      (a 1000-request log is ~8 KB per slot: ~1 GB with the defaults)
+    Size the table from the identifiers you expect (max_keys) rather than
+    the default 131072 slots; a segment larger than max_bytes is refused on
+    first use instead of silently taking that memory. Large sliding logs
+    are better served by a counter or GCRA limiter, or by RedisBackend.
+    """
+
+    DEFAULT_SETS = 16384
+    DEFAULT_MAX_BYTES = 256 * 2**20
+
+    MAGIC = b"RLSHM001"
+    # magic, slot_size, sets, ways
+    HEADER = struct.Struct("<8sIII")
+    HEADER_SIZE = 64
+    # key_hash, last_seen
+    SLOT = struct.Struct("<Qd")
+    BUCKET = struct.Struct("<d")  # tokens
+    COUNTER = struct.Struct("<qII")  # window_index, current, previous
+    GCRA = struct.Struct("<d")  # theoretical arrival time
+    LOG = struct.Struct("<II")  # head, count (followed by the timestamp ring)
+
+    def __init__(
+        self,
+        name: str,
+        sets: Optional[int] = None,
+        ways: int = 8,
+        lock_dir: Optional[str] = None,
+        max_keys: Optional[int] = None,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES
+    ):
+        """
+        Initialize shared-memory backend.
+
+        Args:
+            name: Segment name, identical in every worker sharing the limit
+            sets: Number of hash sets (capacity is sets * ways identifiers);
+                default: derived from max_keys, else 16384
+            ways: Slots per set
+            lock_dir: Directory for the lock file (default: system temp dir)
+            max_keys: Expected identifiers; sets = ceil(max_keys / ways)
+            max_bytes: Largest segment allowed (default: 256 MiB; None for no limit)
+
+        Raises:
+            RuntimeError: On platforms without fcntl (Windows)
+        """
+        if fcntl is None:
+            raise RuntimeError("SharedMemoryBackend needs fcntl (POSIX); use RedisBackend on this platform")
+        if sets is None:
+            sets = math.ceil(max_keys / ways) if max_keys else self.DEFAULT_SETS
+        if sets <= 0 or ways <= 0:
+            raise ValueError("sets and ways must be positive")
+        self.name = name
+        self.sets = sets
+        self.ways = ways
+        self.max_bytes = max_bytes
+        self.lock_path = os.path.join(lock_dir or tempfile.gettempdir(), f"{name}.lock")
+        self.evictions = 0
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._slot_size = 0
+        self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        # fcntl locks are per process; threads of one worker also need this
+        self._thread_lock = threading.Lock()
+
+    def _table(self, payload_size: int) -> memoryview:
+        """Create or attach the segment on first use and return its buffer."""
+        slot_size = self.SLOT.size + payload_size
+        if self._shm is not None:
+            if slot_size != self._slot_size:
+                raise ValueError(f"Backend '{self.name}' is already used by a limiter with another layout")
+            return self._shm.buf
+
+        size = self.HEADER_SIZE + self.sets * self.ways * slot_size
+        if self.max_bytes is not None and size > self.max_bytes:
+            raise ValueError(
+                f"Shared memory segment '{self.name}' would take {size / 2**20:.0f} MiB "
+                f"({self.sets * self.ways} slots of {slot_size} bytes), over max_bytes "
+                f"({self.max_bytes / 2**20:.0f} MiB); lower max_keys/sets, use a smaller "
+                "sliding log or another algorithm, or raise max_bytes"
+            )
+        # Byte 0 of the lock file serializes creation against attachment
+        fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 1, 0)
+        try:
+            try:
+                shm = _open_segment(self.name, size, create=True)
+                self.HEADER.pack_into(shm.buf, 0, self.MAGIC, slot_size, self.sets, self.ways)
+            except FileExistsError:
+                shm = _open_segment(self.name, size, create=False)
+                magic, stored_slot, stored_sets, stored_ways = self.HEADER.unpack_from(shm.buf, 0)
+                if (magic, stored_slot, stored_sets, stored_ways) != (self.MAGIC, slot_size, self.sets, self.ways):
+                    shm.close()
+                    raise ValueError(
+                        f"Shared memory segment '{self.name}' has an incompatible layout; "
+                        "unlink it or use another name"
+                    )
+        finally:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 1, 0)
+
+        self._shm = shm
+        self._slot_size = slot_size
+        return shm.buf
+
+    def _lock(self, set_index: int):
+        self._thread_lock.acquire()
+        fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 1, set_index + 1)
+
+    def _unlock(self, set_index: int):
+        fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 1, set_index + 1)
+        self._thread_lock.release()
+
+    def _find(self, buf: memoryview, key: int, now: float, create: bool) -> Tuple[Optional[int], bool]:
+        """
+        Return (slot_offset, is_new) for key within its set.
+
+        The caller holds the set lock. A new slot has a zeroed payload.
+        """
+        set_index = key % self.sets
+        base = self.HEADER_SIZE + set_index * self.ways * self._slot_size
+        free_offset = None
+        lru_offset, lru_seen = base, math.inf
+
+        for way in range(self.ways):
+            offset = base + way * self._slot_size
+            slot_key, last_seen = self.SLOT.unpack_from(buf, offset)
+            if slot_key == key:
+                return offset, False
+            if slot_key == 0:
+                if free_offset is None:
+                    free_offset = offset
+            elif last_seen < lru_seen:
+                lru_offset, lru_seen = offset, last_seen
+
+        if not create:
+            return None, False
+        if free_offset is None:
+            free_offset = lru_offset
+            self.evictions += 1
+
+        # Fresh slot: zeroed payload means "no state"
+        buf[free_offset:free_offset + self._slot_size] = bytes(self._slot_size)
+        self.SLOT.pack_into(buf, free_offset, key, now)
+        return free_offset, True
+
+    def log_acquire(
+        self, identifier: str, now: float, max_requests: int, window_seconds: float, cost: int
+    ) -> LogResult:
+        buf = self._table(self.LOG.size + 8 * max_requests)
+        key = _key_hash(identifier)
+        set_index = key % self.sets
+        self._lock(set_index)
+        try:
+            offset, _ = self._find(buf, key, now, create=cost > 0)
+            if offset is None:
+                return True, 0, 0.0, now
+
+            ring = offset + self.SLOT.size + self.LOG.size
+            head, count = self.LOG.unpack_from(buf, offset + self.SLOT.size)
+
+            def at(i: int) -> float:
+                return struct.unpack_from("<d", buf, ring + 8 * ((head + i) % max_requests))[0]
+
+            # Remove old requests outside window
+            while count and at(0) < now - window_seconds:
+                head = (head + 1) % max_requests
+                count -= 1
+
+            allowed = count + cost <= max_requests
+            retry_after = 0.0
+            if cost < 0:
+                # Refund: drop the newest entries
+                count = max(0, count + cost)
+            elif allowed:
+                for _ in range(cost):
+                    struct.pack_into("<d", buf, ring + 8 * ((head + count) % max_requests), now)
+                    count += 1
+            elif cost <= max_requests:
+                retry_after = at(count - max_requests + cost - 1) + window_seconds - now
+            else:
+                retry_after = math.inf
+            newest = at(count - 1) if count else now
+
+            self.LOG.pack_into(buf, offset + self.SLOT.size, head, count)
+            self.SLOT.pack_into(buf, offset, key, now)
+            return allowed, count, retry_after, newest
+        finally:
+            self._unlock(set_index)
+
+    def bucket_acquire(
+        self, identifier: str, now: float, capacity: float, refill_rate: float, cost: float
+    ) -> BucketResult:
+        buf = self._table(self.BUCKET.size)
+        key = _key_hash(identifier)
+        set_index = key % self.sets
+        self._lock(set_index)
+        try:
+            offset, is_new = self._find(buf, key, now, create=cost > 0)
+            if offset is None:
+                return True, float(capacity)
+
+            if is_new:
+                tokens = float(capacity)
+            else:
+                _, last = self.SLOT.unpack_from(buf, offset)
+                (tokens,) = self.BUCKET.unpack_from(buf, offset + self.SLOT.size)
+                tokens = min(capacity, tokens + max(0.0, now - last) * refill_rate)
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens = min(capacity, tokens - cost)
+
+            self.BUCKET.pack_into(buf, offset + self.SLOT.size, tokens)
+            self.SLOT.pack_into(buf, offset, key, now)
+            return allowed, tokens
+        finally:
+            self._unlock(set_index)
+
+    def counter_acquire(
+        self, identifier: str, now: float, max_requests: int, window_seconds: float, cost: int
+    ) -> CounterResult:
+        buf = self._table(self.COUNTER.size)
+        key = _key_hash(identifier)
+        set_index = key % self.sets
+        window_index = int(now // window_seconds)
+        self._lock(set_index)
+        try:
+            offset, _ = self._find(buf, key, now, create=cost > 0)
+            current, previous = 0, 0
+            if offset is not None:
+                index, stored_current, stored_previous = self.COUNTER.unpack_from(buf, offset + self.SLOT.size)
+                if index == window_index:
+                    current, previous = stored_current, stored_previous
+                elif index == window_index - 1:
+                    previous = stored_current
+
+            elapsed = (now % window_seconds) / window_seconds
+            allowed = previous * (1.0 - elapsed) + current + cost <= max_requests
+            if allowed:
+                current = max(0, current + cost)
+
+            if offset is not None:
+                self.COUNTER.pack_into(buf, offset + self.SLOT.size, window_index, current, previous)
+                self.SLOT.pack_into(buf, offset, key, now)
+            return allowed, window_index, current, previous
+        finally:
+            self._unlock(set_index)
+
+    def gcra_acquire(
+        self, identifier: str, now: float, emission_interval: float, tolerance: float, cost: float
+    ) -> GCRAResult:
+        buf = self._table(self.GCRA.size)
+        key = _key_hash(identifier)
+        set_index = key % self.sets
+        self._lock(set_index)
+        try:
+            offset, is_new = self._find(buf, key, now, create=cost > 0)
+            tat = now
+            if offset is not None and not is_new:
+                tat = max(now, self.GCRA.unpack_from(buf, offset + self.SLOT.size)[0])
+
+            new_tat = tat + cost * emission_interval
+            allowed = new_tat - tolerance <= now
+            if allowed:
+                tat = new_tat
+
+            if offset is not None:
+                self.GCRA.pack_into(buf, offset + self.SLOT.size, tat)
+                self.SLOT.pack_into(buf, offset, key, now)
+            return allowed, tat
+        finally:
+            self._unlock(set_index)
+
+    def reset(self, identifier: Optional[str] = None):
+        if self._shm is None:
+            return
+        buf = self._shm.buf
+
+        if identifier:
+            key = _key_hash(identifier)
+            set_index = key % self.sets
+            self._lock(set_index)
+            try:
+                offset, _ = self._find(buf, key, 0.0, create=False)
+                if offset is not None:
+                    self.SLOT.pack_into(buf, offset, 0, 0.0)
+            finally:
+                self._unlock(set_index)
+            return
+
+        # Lock every set at once (len 0 locks to end of file)
+        with self._thread_lock:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 0, 1)
+            try:
+                buf[self.HEADER_SIZE:] = bytes(len(buf) - self.HEADER_SIZE)
+            finally:
+                fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 0, 1)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_keys": self.sets * self.ways,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        """Detach from the segment (state is kept for other workers)."""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+        os.close(self._lock_fd)
+
+    def unlink(self):
+        """Remove the segment and lock file (call once, from the supervisor)."""
+        if self._shm is None:
+            try:
+                self._shm = _open_segment(self.name, 0, create=False)
+            except FileNotFoundError:
+                return
+        if sys.version_info < (3, 13):
+            # Balance the unregister done in _open_segment
+            resource_tracker.register(self._shm._name, "shared_memory")
+        self._shm.unlink()
+        try:
+            os.unlink(self.lock_path)
+        except FileNotFoundError:
+            pass
+
+
+def _open_segment(name: str, size: int, create: bool) -> shared_memory.SharedMemory:
+    """Open a shared memory segment that is not unlinked when this process exits."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+    # Older versions register every segment with the resource tracker, which
+    # would destroy it as soon as the first worker exits
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+# Lua scripts run atomically on the server; times are passed in by the
+# gateway so every node uses the same clock source as the in-process limiters.
+LOG_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local member = ARGV[5]
+
+redis.call('ZREMRANGEBYSCORE', key, '-inf', '(' .. (now - window))
+local count = redis.call('ZCARD', key)
+local allowed = 0
+local retry_after = 0
+
+if cost < 0 then
+  -- Refund: drop the newest entries
+  redis.call('ZREMRANGEBYRANK', key, cost, -1)
+  count = math.max(0, count + cost)
+  allowed = 1
+elseif count + cost <= limit then
+  for i = 1, cost do
+    redis.call('ZADD', key, now, member .. ':' .. i)
+  end
+  count = count + cost
+  allowed = 1
+elseif cost <= limit then
+  local index = count - limit + cost - 1
+  local entry = redis.call('ZRANGE', key, index, index, 'WITHSCORES')
+  retry_after = tonumber(entry[2]) + window - now
+else
+  retry_after = 'inf'  -- More than limit never fits; float('inf') in Python
+end
+
+local newest = now
+local last = redis.call('ZRANGE', key, -1, -1, 'WITHSCORES')
+if last[2] then
+  newest = tonumber(last[2])
+end
+if count > 0 then
+  redis.call('PEXPIRE', key, math.ceil(window * 1000))
+end
+
+return {allowed, count, tostring(retry_after), tostring(newest)}
+"""
+
+BUCKET_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local rate = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = capacity
+if state[1] then
+  local elapsed = math.max(0, now - tonumber(state[2]))
+  tokens = math.min(capacity, tonumber(state[1]) + elapsed * rate)
+end
+
+local allowed = 0
+if tokens >= cost then
+  tokens = math.min(capacity, tokens - cost)
+  allowed = 1
+end
+
+if cost > 0 or state[1] then
+  redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+  if rate > 0 then
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+  end
+end
+
+return {allowed, tostring(tokens)}
+"""
+
+COUNTER_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local index = math.floor(now / window)
+local state = redis.call('HMGET', key, 'index', 'current', 'previous')
+local current = 0
+local previous = 0
+if state[1] then
+  local stored = tonumber(state[1])
+  if stored == index then
+    current = tonumber(state[2])
+    previous = tonumber(state[3])
+  elseif stored == index - 1 then
+    previous = tonumber(state[2])
+  end
+end
+
+local elapsed = (now % window) / window
+local allowed = 0
+if previous * (1 - elapsed) + current + cost <= limit then
+  current = math.max(0, current + cost)
+  allowed = 1
+end
+
+if cost > 0 or state[1] then
+  redis.call('HSET', key, 'index', index, 'current', current, 'previous', previous)
+  redis.call('PEXPIRE', key, math.ceil(2 * window * 1000))
+end
+
+return {allowed, index, current, previous}
+"""
+
+# The TAT is the whole state, so it is kept with full double precision
+# (tostring() would round it to 14 significant digits)
+GCRA_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local tolerance = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local stored = redis.call('GET', key)
+local tat = tonumber(stored or now)
+if tat < now then
+  tat = now
+end
+
+local allowed = 0
+local new_tat = tat + cost * interval
+if new_tat - tolerance <= now then
+  tat = new_tat
+  allowed = 1
+  if cost > 0 or (cost < 0 and stored) then
+    -- The key is useless once the TAT is in the past
+    redis.call('SET', key, string.format('%.17g', tat), 'PX', math.max(1, math.ceil((tat - now) * 1000)))
+  end
+end
+
+return {allowed, string.format('%.17g', tat)}
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    Redis-protocol backend for gateways spread over several hosts.
+
+    Every decision is a single EVALSHA of a server-side Lua script, so the
+    check-and-consume step is atomic across all nodes. Batches of decisions
+    are sent in one pipeline (one round trip). Works with any server that
+    speaks the Redis protocol and supports Lua scripting.
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        """
+        Initialize Redis backend.
+
+        Args:
+            client: redis.Redis-compatible client (e.g. redis.Redis, fakeredis.FakeRedis)
+            prefix: Key prefix that namespaces this limiter
+        """
+        self.client = client
+        self.prefix = prefix
+        self.calls = 0
+        self._member_ids = itertools.count()
+        self._member_prefix = f"{os.getpid()}-{os.urandom(4).hex()}"
+        # Script objects use EVALSHA and reload the script on NOSCRIPT
+        self._log = client.register_script(LOG_SCRIPT)
+        self._bucket = client.register_script(BUCKET_SCRIPT)
+        self._counter = client.register_script(COUNTER_SCRIPT)
+        self._gcra = client.register_script(GCRA_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "ratelimit:", **kwargs) -> "RedisBackend":
+        """Create a backend with a pooled redis-py client."""
+        if redis is None:
+            raise ImportError("redis not installed. Install with: pip install redis")
+        return cls(redis.Redis.from_url(url, **kwargs), prefix=prefix)
+
+    def _member(self) -> str:
+        """Unique sorted-set member prefix for one log entry."""
+        return f"{self._member_prefix}-{next(self._member_ids)}"
+
+    @staticmethod
+    def _parse_log(result) -> LogResult:
+        allowed, count, retry_after, newest = result
+        return bool(int(allowed)), int(count), float(retry_after), float(newest)
+
+    @staticmethod
+    def _parse_bucket(result) -> BucketResult:
+        allowed, tokens = result
+        return bool(int(allowed)), float(tokens)
+
+    @staticmethod
+    def _parse_counter(result) -> CounterResult:
+        allowed, index, current, previous = result
+        return bool(int(allowed)), int(index), int(current), int(previous)
+
+    @staticmethod
+    def _parse_gcra(result) -> GCRAResult:
+        allowed, tat = result
+        return bool(int(allowed)), float(tat)
+
+    def log_acquire(
+        self, identifier: str, now: float, max_requests: int, window_seconds: float, cost: int
+    ) -> LogResult:
+        self.calls += 1
+        result = self._log(
+            keys=[self.prefix + identifier],
+            args=[repr(now), max_requests, repr(float(window_seconds)), cost, self._member()]
+        )
+        return self._parse_log(result)
+
+    def bucket_acquire(
+        self, identifier: str, now: float, capacity: float, refill_rate: float, cost: float
+    ) -> BucketResult:
+        self.calls += 1
+        result = self._bucket(
+            keys=[self.prefix + identifier],
+            args=[repr(now), repr(float(capacity)), repr(float(refill_rate)), repr(float(cost))]
+        )
+        return self._parse_bucket(result)
+
+    def counter_acquire(
+        self, identifier: str, now: float, max_requests: int, window_seconds: float, cost: int
+    ) -> CounterResult:
+        self.calls += 1
+        result = self._counter(
+            keys=[self.prefix + identifier],
+            args=[repr(now), max_requests, repr(float(window_seconds)), cost]
+        )
+        return self._parse_counter(result)
+
+    def gcra_acquire(
+        self, identifier: str, now: float, emission_interval: float, tolerance: float, cost: float
+    ) -> GCRAResult:
+        self.calls += 1
+        result = self._gcra(
+            keys=[self.prefix + identifier],
+            args=[repr(now), repr(float(emission_interval)), repr(float(tolerance)), repr(float(cost))]
+        )
+        return self._parse_gcra(result)
+
+    def bucket_acquire_many(
+        self, items: List[Tuple[str, float]], now: float, capacity: float, refill_rate: float
+    ) -> List[BucketResult]:
+        self.calls += 1
+        pipe = self.client.pipeline(transaction=False)
+        for identifier, cost in items:
+            self._bucket(
+                keys=[self.prefix + identifier],
+                args=[repr(now), repr(float(capacity)), repr(float(refill_rate)), repr(float(cost))],
+                client=pipe
+            )
+        return [self._parse_bucket(result) for result in pipe.execute()]
+
+    def counter_acquire_many(
+        self, items: List[Tuple[str, int]], now: float, max_requests: int, window_seconds: float
+    ) -> List[CounterResult]:
+        self.calls += 1
+        pipe = self.client.pipeline(transaction=False)
+        for identifier, cost in items:
+            self._counter(
+                keys=[self.prefix + identifier],
+                args=[repr(now), max_requests, repr(float(window_seconds)), cost],
+                client=pipe
+            )
+        return [self._parse_counter(result) for result in pipe.execute()]
+
+    def gcra_acquire_many(
+        self, items: List[Tuple[str, float]], now: float, emission_interval: float, tolerance: float
+    ) -> List[GCRAResult]:
+        self.calls += 1
+        pipe = self.client.pipeline(transaction=False)
+        for identifier, cost in items:
+            self._gcra(
+                keys=[self.prefix + identifier],
+                args=[repr(now), repr(float(emission_interval)), repr(float(tolerance)), repr(float(cost))],
+                client=pipe
+            )
+        return [self._parse_gcra(result) for result in pipe.execute()]
+
+    def reset(self, identifier: Optional[str] = None):
+        if identifier:
+            self.client.delete(self.prefix + identifier)
+            return
+
+        # Delete the whole keyspace in pipelined batches
+        pipe = self.client.pipeline(transaction=False)
+        for index, key in enumerate(self.client.scan_iter(match=self.prefix + "*", count=1000), start=1):
+            pipe.delete(key)
+            if index % 1000 == 0:
+                pipe.execute()
+        pipe.execute()
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls}
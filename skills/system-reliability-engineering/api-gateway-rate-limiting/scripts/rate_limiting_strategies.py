@@ -5,7 +5,10 @@ Rate Limiting Strategies
 Implementation of different rate limiting algorithms:
 - Fixed Window
 - Sliding Window
+- Sliding Window Counter
 - Token Bucket
+- GCRA (Generic Cell Rate Algorithm)
+- Composite (hierarchical quotas over several limiters, all or nothing)
 
 Usage:
     # As a library
@@ -16,14 +19,268 @@ Usage:
         # Process request
         pass
     
+    # Decision with remaining quota, reset and retry times in one call
+    decision = limiter.acquire("user123", cost=1)
+    
     # CLI testing
     python rate_limiting_strategies.py --strategy fixed --max-requests 10 --window 60
 """
 
 import argparse
+import math
 import time
-from typing import Dict, Optional
-from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from collections import OrderedDict, deque
+
+if TYPE_CHECKING:
+    from rate_limit_backends import RateLimitBackend
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of a single acquire() call."""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_at: float  # Epoch seconds when the identifier is back to a full quota
+    retry_after: float  # Seconds until a request of the same cost may succeed (0 if allowed, math.inf if never)
+
+
+@dataclass
+class BatchRateLimitDecision:
+    """
+    Outcomes of an acquire_many() call, stored column-wise.
+    
+    Each list has one entry per (identifier, cost) item, in input order.
+    Indexing returns a RateLimitDecision for a single item.
+    """
+    limit: int
+    allowed: List[bool]
+    remaining: List[int]
+    reset_at: List[float]
+    retry_after: List[float]
+
+    def __len__(self) -> int:
+        return len(self.allowed)
+
+    def __getitem__(self, index: int) -> RateLimitDecision:
+        return RateLimitDecision(
+            allowed=self.allowed[index],
+            limit=self.limit,
+            remaining=self.remaining[index],
+            reset_at=self.reset_at[index],
+            retry_after=self.retry_after[index]
+        )
+
+    def __iter__(self) -> Iterator[RateLimitDecision]:
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def denied(self) -> int:
+        """Number of denied items."""
+        return len(self.allowed) - sum(self.allowed)
+
+
+class IdentifierStore:
+    """
+    Bounded per-identifier state store shared by all limiters.
+    
+    Keeps entries in least-recently-used order. Entries idle for longer than
+    ttl_seconds are expired, and the least recently used entry is evicted
+    once max_keys is reached, so memory stays bounded even when anonymous
+    traffic comes from many rotating IPs.
+    """
+    
+    def __init__(self, max_keys: int = 100_000, ttl_seconds: Optional[float] = None):
+        """
+        Initialize identifier store.
+        
+        Args:
+            max_keys: Maximum number of identifiers kept in memory
+            ttl_seconds: Idle time after which an identifier is dropped
+                (None disables TTL expiry)
+        """
+        if max_keys <= 0:
+            raise ValueError("max_keys must be positive")
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self.expirations = 0
+        self.restored = 0
+        # identifier -> (last_seen, state), oldest access first
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # Lazily restored snapshot (see limiter_snapshot.py) and identifiers
+        # already restored or removed since it was attached
+        self._snapshot = None
+        self._snapshot_consumed: set = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, identifier: str) -> bool:
+        return identifier in self._entries
+
+    @property
+    def resident_keys(self) -> int:
+        """Number of identifiers currently held."""
+        return len(self._entries)
+
+    def get(self, identifier: str, now: float) -> Any:
+        """
+        Return state for identifier, or None if unknown or expired.
+        
+        Does not create entries and does not refresh the access time, so
+        read-only lookups (e.g. get_remaining) never pin an identifier.
+        """
+        entry = self._entries.get(identifier)
+        if entry is None:
+            if self._snapshot is not None:
+                return self._restore(identifier, now)
+            return None
+        
+        last_seen, state = entry
+        if self.ttl_seconds is not None and now - last_seen > self.ttl_seconds:
+            del self._entries[identifier]
+            self.expirations += 1
+            return None
+        return state
+
+    def set(self, identifier: str, state: Any, now: float):
+        """Store state for identifier and mark it as most recently used."""
+        entries = self._entries
+        if identifier in entries:
+            entries.move_to_end(identifier)
+        entries[identifier] = (now, state)
+        self._expire(now)
+        
+        # Evict least recently used identifiers over capacity
+        while len(entries) > self.max_keys:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, identifiers: Sequence[str], now: float) -> Dict[str, Any]:
+        """
+        Return {identifier: state or None} for the distinct identifiers.
+        
+        Same semantics as get(); meant for batch callers, which update the
+        returned dict and write it back with set_many().
+        """
+        entries = self._entries
+        ttl_seconds = self.ttl_seconds
+        states = {}
+        for identifier in identifiers:
+            if identifier in states:
+                continue
+            entry = entries.get(identifier)
+            if entry is None:
+                states[identifier] = self._restore(identifier, now) if self._snapshot is not None else None
+            elif ttl_seconds is not None and now - entry[0] > ttl_seconds:
+                del entries[identifier]
+                self.expirations += 1
+                states[identifier] = None
+            else:
+                states[identifier] = entry[1]
+        return states
+
+    def set_many(self, states: Dict[str, Any], now: float):
+        """Store every non-None state (in dict order) and mark it as most recently used."""
+        entries = self._entries
+        move_to_end = entries.move_to_end
+        for identifier, state in states.items():
+            if state is None:
+                continue
+            if identifier in entries:
+                move_to_end(identifier)
+            entries[identifier] = (now, state)
+        self._expire(now)
+        
+        # Evict least recently used identifiers over capacity
+        while len(entries) > self.max_keys:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def _expire(self, now: float):
+        """Drop idle entries; they are always at the front in LRU order."""
+        if self.ttl_seconds is None:
+            return
+        
+        entries = self._entries
+        cutoff = now - self.ttl_seconds
+        while entries:
+            identifier, (last_seen, _) = next(iter(entries.items()))
+            if last_seen >= cutoff:
+                break
+            del entries[identifier]
+            self.expirations += 1
+
+    def attach_snapshot(self, snapshot):
+        """
+        Restore state lazily from a snapshot (see limiter_snapshot.py).
+        
+        Identifiers missing from the store are looked up in the snapshot on
+        first access and copied into the store; nothing is decoded upfront.
+        """
+        self.detach_snapshot()
+        self._snapshot = snapshot
+
+    def detach_snapshot(self):
+        """Stop restoring from the attached snapshot, if any."""
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+        self._snapshot_consumed.clear()
+
+    def _restore(self, identifier: str, now: float) -> Any:
+        """Copy identifier's snapshot state into the store; return it or None."""
+        snapshot = self._snapshot
+        if snapshot.expires_at is not None and now > snapshot.expires_at:
+            # Every snapshot entry is past its TTL
+            self.detach_snapshot()
+            return None
+        if identifier in self._snapshot_consumed:
+            return None
+        
+        found = snapshot.lookup(identifier)
+        if found is None:
+            return None
+        # Restore once: after an eviction the snapshot state is stale
+        self._snapshot_consumed.add(identifier)
+        last_seen, state = found
+        if self.ttl_seconds is not None and now - last_seen > self.ttl_seconds:
+            return None
+        
+        self.restored += 1
+        self.set(identifier, state, now)
+        return state
+
+    def items(self, now: float) -> Iterator[Tuple[str, float, Any]]:
+        """Yield (identifier, last_seen, state) for every unexpired identifier in the store."""
+        ttl_seconds = self.ttl_seconds
+        for identifier, (last_seen, state) in self._entries.items():
+            if ttl_seconds is None or now - last_seen <= ttl_seconds:
+                yield identifier, last_seen, state
+
+    def pop(self, identifier: str):
+        """Remove identifier if present."""
+        self._entries.pop(identifier, None)
+        if self._snapshot is not None:
+            self._snapshot_consumed.add(identifier)
+
+    def clear(self):
+        """Remove all identifiers."""
+        self._entries.clear()
+        self.detach_snapshot()
+
+    def stats(self) -> Dict[str, int]:
+        """Return store counters (resident keys, evictions, expirations, restored)."""
+        return {
+            "resident_keys": len(self._entries),
+            "max_keys": self.max_keys,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "restored": self.restored,
+        }
 
 
 class RateLimiter:
@@ -34,60 +291,146 @@ class RateLimiter:
     Good for: Simple use cases, predictable traffic
     """
     
-    def __init__(self, max_requests: int, window_seconds: int):
+    def __init__(
+        self,
+        max_requests: int,
+        window_seconds: int,
+        store: Optional[IdentifierStore] = None,
+        backend: Optional["RateLimitBackend"] = None
+    ):
         """
         Initialize fixed window rate limiter.
         
         Args:
             max_requests: Maximum requests allowed in window
             window_seconds: Time window in seconds
+            store: Identifier store (default: bounded store with window TTL)
+            backend: Shared state backend; when set, state lives there
+                instead of in the in-process store
         """
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests = defaultdict(deque)
+        self.store = store if store is not None else IdentifierStore(ttl_seconds=window_seconds)
+        self.backend = backend
 
-    def is_allowed(self, identifier: str) -> bool:
+    def _apply(self, user_requests: deque, now: float, cost: int) -> Tuple[bool, int, float, float]:
+        """Trim and update a request log; return (allowed, count, retry_after, newest_timestamp)."""
+        # Remove old requests outside window
+        while user_requests and user_requests[0] < now - self.window_seconds:
+            user_requests.popleft()
+        
+        # Check if limit exceeded
+        allowed = len(user_requests) + cost <= self.max_requests
+        retry_after = 0.0
+        if allowed:
+            user_requests.extend([now] * cost)
+        elif cost <= self.max_requests:
+            # Wait until enough of the oldest requests leave the window
+            oldest_needed = user_requests[len(user_requests) - self.max_requests + cost - 1]
+            retry_after = oldest_needed + self.window_seconds - now
+        else:
+            retry_after = math.inf  # More than max_requests never fits in the window
+        
+        return allowed, len(user_requests), retry_after, user_requests[-1] if user_requests else now
+
+    def _consume(self, identifier: str, now: float, cost: int) -> Tuple[bool, int, float, float]:
+        """Return (allowed, count, retry_after, newest_timestamp) using the local store."""
+        user_requests = self.store.get(identifier, now)
+        if user_requests is None:
+            user_requests = deque()
+        
+        result = self._apply(user_requests, now, cost)
+        if cost:
+            self.store.set(identifier, user_requests, now)
+        return result
+
+    def acquire(self, identifier: str, cost: int = 1) -> RateLimitDecision:
         """
-        Check if request is allowed.
+        Check and consume quota in a single pass over the identifier state.
         
         Args:
             identifier: Unique identifier (IP, user ID, API key, etc.)
+            cost: Number of requests to account for (default: 1)
             
         Returns:
-            True if request is allowed, False otherwise
+            RateLimitDecision with allowed flag, remaining, reset and retry times
         """
         now = time.time()
-        user_requests = self.requests[identifier]
+        if self.backend is not None:
+            allowed, count, retry_after, newest = self.backend.log_acquire(
+                identifier, now, self.max_requests, self.window_seconds, cost
+            )
+        else:
+            allowed, count, retry_after, newest = self._consume(identifier, now, cost)
         
-        # Remove old requests outside window
-        while user_requests and user_requests[0] < now - self.window_seconds:
-            user_requests.popleft()
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=self.max_requests,
+            remaining=max(0, self.max_requests - count),
+            reset_at=newest + self.window_seconds,
+            retry_after=retry_after
+        )
+
+    def acquire_many(self, items: Sequence[Tuple[str, int]]) -> BatchRateLimitDecision:
+        """
+        Check and consume quota for many identifiers, one acquire() per item.
         
-        # Check if limit exceeded
-        if len(user_requests) >= self.max_requests:
-            return False
+        Not vectorized: a request log has to be trimmed and extended item by
+        item either way, so this is a plain loop, kept so that every limiter
+        offers the same batch API. Repeated identifiers are applied in input
+        order.
         
-        # Add current request
-        user_requests.append(now)
-        return True
+        Args:
+            items: Sequence of (identifier, cost) pairs
+            
+        Returns:
+            BatchRateLimitDecision with one entry per item
+        """
+        decisions = [self.acquire(identifier, cost) for identifier, cost in items]
+        return BatchRateLimitDecision(
+            limit=self.max_requests,
+            allowed=[d.allowed for d in decisions],
+            remaining=[d.remaining for d in decisions],
+            reset_at=[d.reset_at for d in decisions],
+            retry_after=[d.retry_after for d in decisions]
+        )
+
+    def is_allowed(self, identifier: str) -> bool:
+        """
+        Check if request is allowed.
+        
+        Args:
+            identifier: Unique identifier (IP, user ID, API key, etc.)
+            
+        Returns:
+            True if request is allowed, False otherwise
+        """
+        return self.acquire(identifier).allowed
     
     def get_remaining(self, identifier: str) -> int:
         """Get remaining requests in current window."""
+        return self.acquire(identifier, cost=0).remaining
+    
+    def refund(self, identifier: str, cost: int = 1):
+        """Return quota consumed by an allowed acquire() (used to roll back)."""
         now = time.time()
-        user_requests = self.requests[identifier]
-        
-        # Remove old requests
-        while user_requests and user_requests[0] < now - self.window_seconds:
-            user_requests.popleft()
-        
-        return max(0, self.max_requests - len(user_requests))
+        if self.backend is not None:
+            self.backend.log_acquire(identifier, now, self.max_requests, self.window_seconds, -cost)
+            return
+        log = self.store.get(identifier, now)
+        if log:
+            # Drop the newest entries, which the refunded acquire() appended
+            for _ in range(min(cost, len(log))):
+                log.pop()
     
     def reset(self, identifier: Optional[str] = None):
         """Reset rate limit for identifier or all."""
-        if identifier:
-            self.requests[identifier].clear()
+        if self.backend is not None:
+            self.backend.reset(identifier)
+        elif identifier:
+            self.store.pop(identifier)
         else:
-            self.requests.clear()
+            self.store.clear()
 
 
 class TokenBucketRateLimiter:
@@ -98,18 +441,147 @@ class TokenBucketRateLimiter:
     Good for: Burst traffic, smooth rate limiting
     """
     
-    def __init__(self, capacity: int, refill_rate: float):
+    def __init__(
+        self,
+        capacity: int,
+        refill_rate: float,
+        store: Optional[IdentifierStore] = None,
+        backend: Optional["RateLimitBackend"] = None
+    ):
         """
         Initialize token bucket rate limiter.
         
         Args:
             capacity: Maximum tokens (burst capacity)
             refill_rate: Tokens added per second
+            store: Identifier store (default: bounded store whose TTL is the
+                time needed to refill an empty bucket)
+            backend: Shared state backend; when set, state lives there
+                instead of in the in-process store
         """
         self.capacity = capacity
         self.refill_rate = refill_rate
-        self.tokens = defaultdict(lambda: capacity)
-        self.last_refill = defaultdict(time.time)
+        if store is None:
+            # An idle bucket is full again after this long, so dropping it is lossless
+            store = IdentifierStore(ttl_seconds=capacity / refill_rate if refill_rate > 0 else None)
+        # identifier -> [tokens, last_refill]
+        self.store = store
+        self.backend = backend
+
+    def _refill(self, identifier: str, now: float) -> float:
+        """Return tokens available for identifier at now."""
+        bucket = self.store.get(identifier, now)
+        if bucket is None:
+            return float(self.capacity)
+        
+        tokens, last = bucket
+        elapsed = now - last
+        return min(self.capacity, tokens + elapsed * self.refill_rate)
+
+    def acquire(self, identifier: str, cost: int = 1) -> RateLimitDecision:
+        """
+        Refill, check and consume tokens in a single pass.
+        
+        Args:
+            identifier: Unique identifier
+            cost: Number of tokens to consume (default: 1)
+            
+        Returns:
+            RateLimitDecision with allowed flag, remaining, reset and retry times
+        """
+        now = time.time()
+        if self.backend is not None:
+            allowed, available = self.backend.bucket_acquire(
+                identifier, now, self.capacity, self.refill_rate, cost
+            )
+        else:
+            # Refill tokens based on elapsed time
+            available = self._refill(identifier, now)
+            
+            # Check if enough tokens
+            allowed = available >= cost
+            if allowed:
+                available -= cost
+            self.store.set(identifier, [available, now], now)
+        
+        retry_after = 0.0
+        if not allowed:
+            if cost > self.capacity or self.refill_rate <= 0:
+                retry_after = math.inf  # The bucket never holds enough tokens
+            else:
+                retry_after = (cost - available) / self.refill_rate
+        
+        if self.refill_rate > 0:
+            reset_at = now + (self.capacity - available) / self.refill_rate
+        else:
+            reset_at = now
+        
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=self.capacity,
+            remaining=int(available),
+            reset_at=reset_at,
+            retry_after=retry_after
+        )
+
+    def acquire_many(self, items: Sequence[Tuple[str, float]]) -> BatchRateLimitDecision:
+        """
+        Refill, check and consume tokens for many identifiers in one call.
+        
+        All items share one clock reading, and a backend receives the
+        whole batch at once (a single pipelined round trip for Redis).
+        Repeated identifiers are applied in input order.
+        
+        Args:
+            items: Sequence of (identifier, cost) pairs
+            
+        Returns:
+            BatchRateLimitDecision with one entry per item
+        """
+        now = time.time()
+        capacity = self.capacity
+        refill_rate = self.refill_rate
+        
+        if self.backend is not None:
+            results = self.backend.bucket_acquire_many(items, now, capacity, refill_rate)
+            allowed = [r[0] for r in results]
+            tokens = [r[1] for r in results]
+        else:
+            # One store pass to read, one to write back
+            buckets = self.store.get_many([identifier for identifier, _ in items], now)
+            allowed = []
+            tokens = []
+            for identifier, cost in items:
+                bucket = buckets[identifier]
+                if bucket is None:
+                    available = float(capacity)
+                else:
+                    available = min(capacity, bucket[0] + (now - bucket[1]) * refill_rate)
+                ok = available >= cost
+                if ok:
+                    available -= cost
+                buckets[identifier] = [available, now]
+                allowed.append(ok)
+                tokens.append(available)
+            self.store.set_many(buckets, now)
+        
+        if refill_rate > 0:
+            reset_at = [now + (capacity - t) / refill_rate for t in tokens]
+            retry_after = [
+                0.0 if ok else (cost - t) / refill_rate if cost <= capacity else math.inf
+                for ok, t, (_, cost) in zip(allowed, tokens, items)
+            ]
+        else:
+            reset_at = [now] * len(tokens)
+            retry_after = [0.0 if ok else math.inf for ok in allowed]
+        
+        return BatchRateLimitDecision(
+            limit=capacity,
+            allowed=allowed,
+            remaining=[int(t) for t in tokens],
+            reset_at=reset_at,
+            retry_after=retry_after
+        )
 
     def is_allowed(self, identifier: str, tokens: int = 1) -> bool:
         """
@@ -122,40 +594,211 @@ class TokenBucketRateLimiter:
         Returns:
             True if enough tokens available, False otherwise
         """
+        return self.acquire(identifier, tokens).allowed
+    
+    def get_remaining(self, identifier: str) -> float:
+        """Get remaining tokens."""
+        if self.backend is not None:
+            return self.backend.bucket_acquire(identifier, time.time(), self.capacity, self.refill_rate, 0)[1]
+        return self._refill(identifier, time.time())
+    
+    def refund(self, identifier: str, tokens: int = 1):
+        """Return tokens consumed by an allowed acquire() (used to roll back)."""
         now = time.time()
-        last = self.last_refill[identifier]
+        if self.backend is not None:
+            self.backend.bucket_acquire(identifier, now, self.capacity, self.refill_rate, -tokens)
+            return
+        if self.store.get(identifier, now) is not None:
+            available = min(self.capacity, self._refill(identifier, now) + tokens)
+            self.store.set(identifier, [available, now], now)
+    
+    def reset(self, identifier: Optional[str] = None):
+        """Reset rate limit for identifier or all."""
+        if self.backend is not None:
+            self.backend.reset(identifier)
+        elif identifier:
+            self.store.pop(identifier)
+        else:
+            self.store.clear()
+
+
+class GCRARateLimiter:
+    """
+    Generic Cell Rate Algorithm (GCRA) Rate Limiter.
+    
+    Same burst and steady-rate behaviour as TokenBucketRateLimiter, but the
+    only state per identifier is one float: the theoretical arrival time
+    (TAT) at which the identifier would be back to a full burst. Each
+    request pushes the TAT forward by one emission interval (1/refill_rate);
+    a request is allowed while the TAT stays within the burst tolerance
+    (capacity emission intervals) of now. Retry and reset times follow
+    exactly from the TAT.
+    Good for: Burst traffic, millions of identifiers, exact Retry-After
+    """
+    
+    def __init__(
+        self,
+        capacity: int,
+        refill_rate: float,
+        store: Optional[IdentifierStore] = None,
+        backend: Optional["RateLimitBackend"] = None
+    ):
+        """
+        Initialize GCRA rate limiter.
         
-        # Refill tokens based on elapsed time
-        elapsed = now - last
-        refill_amount = elapsed * self.refill_rate
-        self.tokens[identifier] = min(
-            self.capacity,
-            self.tokens[identifier] + refill_amount
+        Args:
+            capacity: Maximum burst (requests allowed at once from idle)
+            refill_rate: Sustained requests per second
+            store: Identifier store (default: bounded store whose TTL is the
+                burst tolerance, after which any TAT is in the past)
+            backend: Shared state backend; when set, state lives there
+                instead of in the in-process store
+        """
+        if refill_rate <= 0:
+            raise ValueError("refill_rate must be positive")
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.emission_interval = 1.0 / refill_rate
+        self.tolerance = capacity * self.emission_interval
+        # identifier -> theoretical arrival time
+        self.store = store if store is not None else IdentifierStore(ttl_seconds=self.tolerance)
+        self.backend = backend
+
+    def _apply(self, tat: Optional[float], now: float, cost: float) -> Tuple[bool, float]:
+        """Return (allowed, tat_after) for a request of cost at now."""
+        if tat is None or tat < now:
+            tat = now
+        new_tat = tat + cost * self.emission_interval
+        if new_tat - self.tolerance <= now:
+            return True, new_tat
+        return False, tat
+
+    def _decision(self, allowed: bool, tat: float, now: float, cost: float) -> Tuple[int, float, float]:
+        """Return (remaining, reset_at, retry_after) for the TAT after a decision."""
+        interval = self.emission_interval
+        # Small epsilon absorbs float error in (tolerance - k * interval) / interval
+        remaining = max(0, int((now + self.tolerance - tat) / interval + 1e-9))
+        retry_after = 0.0
+        if not allowed:
+            if cost > self.capacity:
+                retry_after = math.inf  # Never fits in the burst tolerance
+            else:
+                retry_after = tat + cost * interval - self.tolerance - now
+        return remaining, tat, retry_after
+
+    def acquire(self, identifier: str, cost: int = 1) -> RateLimitDecision:
+        """
+        Check and consume in a single pass.
+        
+        Args:
+            identifier: Unique identifier
+            cost: Number of requests this call counts as (default: 1)
+            
+        Returns:
+            RateLimitDecision with allowed flag, remaining, reset and retry times
+        """
+        now = time.time()
+        if self.backend is not None:
+            allowed, tat = self.backend.gcra_acquire(
+                identifier, now, self.emission_interval, self.tolerance, cost
+            )
+        else:
+            allowed, tat = self._apply(self.store.get(identifier, now), now, cost)
+            if allowed and cost > 0:
+                self.store.set(identifier, tat, now)
+        
+        remaining, reset_at, retry_after = self._decision(allowed, tat, now, cost)
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=self.capacity,
+            remaining=remaining,
+            reset_at=reset_at,
+            retry_after=retry_after
         )
-        self.last_refill[identifier] = now
+
+    def acquire_many(self, items: Sequence[Tuple[str, int]]) -> BatchRateLimitDecision:
+        """
+        Check and consume for many identifiers in one call.
         
-        # Check if enough tokens
-        if self.tokens[identifier] >= tokens:
-            self.tokens[identifier] -= tokens
-            return True
+        All items share one clock reading, and a backend receives the
+        whole batch at once (a single pipelined round trip for Redis).
+        Repeated identifiers are applied in input order.
         
-        return False
-    
-    def get_remaining(self, identifier: str) -> float:
-        """Get remaining tokens."""
+        Args:
+            items: Sequence of (identifier, cost) pairs
+            
+        Returns:
+            BatchRateLimitDecision with one entry per item
+        """
         now = time.time()
-        last = self.last_refill[identifier]
         
-        # Refill tokens
-        elapsed = now - last
-        refill_amount = elapsed * self.refill_rate
-        current_tokens = min(
-            self.capacity,
-            self.tokens[identifier] + refill_amount
+        if self.backend is not None:
+            results = self.backend.gcra_acquire_many(items, now, self.emission_interval, self.tolerance)
+        else:
+            # One store pass to read, one to write back
+            tats = self.store.get_many([identifier for identifier, _ in items], now)
+            results = []
+            for identifier, cost in items:
+                allowed, tat = self._apply(tats[identifier], now, cost)
+                if allowed and cost > 0:
+                    tats[identifier] = tat
+                results.append((allowed, tat))
+            self.store.set_many(tats, now)
+        
+        allowed = []
+        remaining = []
+        reset_at = []
+        retry_after = []
+        for (ok, tat), (_, cost) in zip(results, items):
+            left, reset, retry = self._decision(ok, tat, now, cost)
+            allowed.append(ok)
+            remaining.append(left)
+            reset_at.append(reset)
+            retry_after.append(retry)
+        
+        return BatchRateLimitDecision(
+            limit=self.capacity,
+            allowed=allowed,
+            remaining=remaining,
+            reset_at=reset_at,
+            retry_after=retry_after
         )
-        self.last_refill[identifier] = now
+
+    def is_allowed(self, identifier: str, tokens: int = 1) -> bool:
+        """
+        Check if request is allowed (consumes quota).
         
-        return current_tokens
+        Args:
+            identifier: Unique identifier
+            tokens: Number of requests this call counts as (default: 1)
+            
+        Returns:
+            True if within the burst tolerance, False otherwise
+        """
+        return self.acquire(identifier, tokens).allowed
+    
+    def get_remaining(self, identifier: str) -> int:
+        """Get remaining burst."""
+        return self.acquire(identifier, cost=0).remaining
+    
+    def refund(self, identifier: str, cost: int = 1):
+        """Return quota consumed by an allowed acquire() (used to roll back)."""
+        now = time.time()
+        if self.backend is not None:
+            self.backend.gcra_acquire(identifier, now, self.emission_interval, self.tolerance, -cost)
+            return
+        tat = self.store.get(identifier, now)
+        if tat is not None:
+            self.store.set(identifier, tat - cost * self.emission_interval, now)
+    
+    def reset(self, identifier: Optional[str] = None):
+        """Reset rate limit for identifier or all."""
+        if self.backend is not None:
+            self.backend.reset(identifier)
+        elif identifier:
+            self.store.pop(identifier)
+        else:
+            self.store.clear()
 
 
 class SlidingWindowRateLimiter:
@@ -166,17 +809,111 @@ class SlidingWindowRateLimiter:
     Good for: Accurate rate limiting, no burst at window boundaries
     """
     
-    def __init__(self, max_requests: int, window_seconds: int):
+    def __init__(
+        self,
+        max_requests: int,
+        window_seconds: int,
+        store: Optional[IdentifierStore] = None,
+        backend: Optional["RateLimitBackend"] = None
+    ):
         """
         Initialize sliding window rate limiter.
         
         Args:
             max_requests: Maximum requests allowed in window
             window_seconds: Time window in seconds
+            store: Identifier store (default: bounded store with window TTL)
+            backend: Shared state backend; when set, state lives there
+                instead of in the in-process store
         """
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.windows = defaultdict(deque)
+        self.store = store if store is not None else IdentifierStore(ttl_seconds=window_seconds)
+        self.backend = backend
+
+    def _apply(self, user_windows: deque, now: float, cost: int) -> Tuple[bool, int, float, float]:
+        """Trim and update a request log; return (allowed, count, retry_after, newest_timestamp)."""
+        window_start = now - self.window_seconds
+        
+        # Remove old requests outside window
+        while user_windows and user_windows[0] < window_start:
+            user_windows.popleft()
+        
+        # Check limit
+        allowed = len(user_windows) + cost <= self.max_requests
+        retry_after = 0.0
+        if allowed:
+            user_windows.extend([now] * cost)
+        elif cost <= self.max_requests:
+            # Wait until enough of the oldest requests slide out
+            oldest_needed = user_windows[len(user_windows) - self.max_requests + cost - 1]
+            retry_after = oldest_needed + self.window_seconds - now
+        else:
+            retry_after = math.inf  # More than max_requests never fits in the window
+        
+        return allowed, len(user_windows), retry_after, user_windows[-1] if user_windows else now
+
+    def _consume(self, identifier: str, now: float, cost: int) -> Tuple[bool, int, float, float]:
+        """Return (allowed, count, retry_after, newest_timestamp) using the local store."""
+        user_windows = self.store.get(identifier, now)
+        if user_windows is None:
+            user_windows = deque()
+        
+        result = self._apply(user_windows, now, cost)
+        if cost:
+            self.store.set(identifier, user_windows, now)
+        return result
+
+    def acquire(self, identifier: str, cost: int = 1) -> RateLimitDecision:
+        """
+        Check and consume quota in a single pass over the identifier state.
+        
+        Args:
+            identifier: Unique identifier
+            cost: Number of requests to account for (default: 1)
+            
+        Returns:
+            RateLimitDecision with allowed flag, remaining, reset and retry times
+        """
+        now = time.time()
+        if self.backend is not None:
+            allowed, count, retry_after, newest = self.backend.log_acquire(
+                identifier, now, self.max_requests, self.window_seconds, cost
+            )
+        else:
+            allowed, count, retry_after, newest = self._consume(identifier, now, cost)
+        
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=self.max_requests,
+            remaining=max(0, self.max_requests - count),
+            reset_at=newest + self.window_seconds,
+            retry_after=retry_after
+        )
+
+    def acquire_many(self, items: Sequence[Tuple[str, int]]) -> BatchRateLimitDecision:
+        """
+        Check and consume quota for many identifiers, one acquire() per item.
+        
+        Not vectorized: a request log has to be trimmed and extended item by
+        item either way, so this is a plain loop, kept so that every limiter
+        offers the same batch API. Repeated identifiers are applied in input
+        order.
+        
+        Args:
+            items: Sequence of (identifier, cost) pairs
+            
+        Returns:
+            BatchRateLimitDecision with one entry per item
+        """
+        decisions = [self.acquire(identifier, cost) for identifier, cost in items]
+        return BatchRateLimitDecision(
+            limit=self.max_requests,
+            allowed=[d.allowed for d in decisions],
+            remaining=[d.remaining for d in decisions],
+            reset_at=[d.reset_at for d in decisions],
+            retry_after=[d.retry_after for d in decisions]
+        )
 
     def is_allowed(self, identifier: str) -> bool:
         """
@@ -188,35 +925,362 @@ class SlidingWindowRateLimiter:
         Returns:
             True if request is allowed, False otherwise
         """
+        return self.acquire(identifier).allowed
+    
+    def get_remaining(self, identifier: str) -> int:
+        """Get remaining requests in current window."""
+        return self.acquire(identifier, cost=0).remaining
+    
+    def refund(self, identifier: str, cost: int = 1):
+        """Return quota consumed by an allowed acquire() (used to roll back)."""
         now = time.time()
-        window_start = now - self.window_seconds
+        if self.backend is not None:
+            self.backend.log_acquire(identifier, now, self.max_requests, self.window_seconds, -cost)
+            return
+        log = self.store.get(identifier, now)
+        if log:
+            # Drop the newest entries, which the refunded acquire() appended
+            for _ in range(min(cost, len(log))):
+                log.pop()
+    
+    def reset(self, identifier: Optional[str] = None):
+        """Reset rate limit for identifier or all."""
+        if self.backend is not None:
+            self.backend.reset(identifier)
+        elif identifier:
+            self.store.pop(identifier)
+        else:
+            self.store.clear()
+
+
+class SlidingWindowCounterRateLimiter:
+    """
+    Sliding Window Counter Rate Limiter.
+    
+    Approximates a sliding window with two fixed-window counters, weighting
+    the previous window by how much of it still overlaps the sliding window.
+    State is two integers and a window index per identifier, so memory and
+    time per decision are constant regardless of the request rate.
+    Good for: Millions of identifiers, high limits per identifier
+    """
+    
+    def __init__(
+        self,
+        max_requests: int,
+        window_seconds: int,
+        store: Optional[IdentifierStore] = None,
+        backend: Optional["RateLimitBackend"] = None
+    ):
+        """
+        Initialize sliding window counter rate limiter.
         
-        # Get user's request timestamps
-        user_windows = self.windows[identifier]
+        Args:
+            max_requests: Maximum requests allowed in window
+            window_seconds: Time window in seconds
+            store: Identifier store (default: bounded store whose TTL covers
+                the current and previous window)
+            backend: Shared state backend; when set, state lives there
+                instead of in the in-process store
+        """
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        # identifier -> [window_index, current_count, previous_count]
+        self.store = store if store is not None else IdentifierStore(ttl_seconds=2 * window_seconds)
+        self.backend = backend
+
+    def _load(self, identifier: str, now: float) -> Tuple[int, int, int]:
+        """Return (window_index, current_count, previous_count) rolled to now."""
+        window_index = int(now // self.window_seconds)
+        state = self.store.get(identifier, now)
+        if state is None:
+            return window_index, 0, 0
         
-        # Remove old requests outside window
-        while user_windows and user_windows[0] < window_start:
-            user_windows.popleft()
+        index, current, previous = state
+        if index == window_index:
+            return window_index, current, previous
+        if index == window_index - 1:
+            # Current window became the previous one
+            return window_index, 0, current
+        return window_index, 0, 0
+
+    def _estimate(self, now: float, current: int, previous: int) -> float:
+        """Weighted request count over the sliding window ending at now."""
+        elapsed = (now % self.window_seconds) / self.window_seconds
+        return previous * (1.0 - elapsed) + current
+
+    def _retry_after(self, now: float, window_index: int, current: int, previous: int, cost: int) -> float:
+        """Seconds until a request of the given cost fits under the estimate."""
+        window = self.window_seconds
+        window_start = window_index * window
+        headroom = self.max_requests - cost
+        if headroom < 0:
+            return math.inf  # More than max_requests never fits under the estimate
         
-        # Check limit
-        if len(user_windows) >= self.max_requests:
-            return False
+        if current <= headroom:
+            # Only the previous window's weight has to decay
+            fraction = 1.0 - (headroom - current) / previous if previous else 0.0
+            return max(0.0, window_start + fraction * window - now)
+        
+        # Current window becomes the previous one; wait until it decays enough
+        fraction = 1.0 - headroom / current
+        return max(0.0, window_start + window + fraction * window - now)
+
+    def acquire(self, identifier: str, cost: int = 1) -> RateLimitDecision:
+        """
+        Check and consume quota in a single pass over the identifier state.
+        
+        Args:
+            identifier: Unique identifier
+            cost: Number of requests to account for (default: 1)
+            
+        Returns:
+            RateLimitDecision with allowed flag, remaining, reset and retry times
+        """
+        now = time.time()
+        if self.backend is not None:
+            allowed, window_index, current, previous = self.backend.counter_acquire(
+                identifier, now, self.max_requests, self.window_seconds, cost
+            )
+        else:
+            window_index, current, previous = self._load(identifier, now)
+            
+            # Check limit
+            allowed = self._estimate(now, current, previous) + cost <= self.max_requests
+            if allowed:
+                current += cost
+            self.store.set(identifier, [window_index, current, previous], now)
+        
+        retry_after = 0.0
+        if not allowed:
+            retry_after = self._retry_after(now, window_index, current, previous, cost)
+        
+        # The estimate reaches zero once every counted request has decayed
+        if current:
+            reset_at = (window_index + 2) * self.window_seconds
+        elif previous:
+            reset_at = (window_index + 1) * self.window_seconds
+        else:
+            reset_at = now
+        
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=self.max_requests,
+            remaining=max(0, int(self.max_requests - self._estimate(now, current, previous))),
+            reset_at=reset_at,
+            retry_after=retry_after
+        )
+
+    def acquire_many(self, items: Sequence[Tuple[str, int]]) -> BatchRateLimitDecision:
+        """
+        Check and consume quota for many identifiers in one call.
+        
+        All items share one clock reading (and so one window index and
+        weight), and a backend receives the whole batch at once (a single
+        pipelined round trip for Redis). Repeated identifiers are applied in
+        input order.
+        
+        Args:
+            items: Sequence of (identifier, cost) pairs
+            
+        Returns:
+            BatchRateLimitDecision with one entry per item
+        """
+        now = time.time()
+        max_requests = self.max_requests
+        window_seconds = self.window_seconds
+        weight = 1.0 - (now % window_seconds) / window_seconds
+        
+        if self.backend is not None:
+            results = self.backend.counter_acquire_many(items, now, max_requests, window_seconds)
+        else:
+            # One store pass to read, one to write back
+            window_index = int(now // window_seconds)
+            counters = self.store.get_many([identifier for identifier, _ in items], now)
+            results = []
+            for identifier, cost in items:
+                state = counters[identifier]
+                current, previous = 0, 0
+                if state is not None:
+                    if state[0] == window_index:
+                        current, previous = state[1], state[2]
+                    elif state[0] == window_index - 1:
+                        previous = state[1]
+                ok = previous * weight + current + cost <= max_requests
+                if ok:
+                    current += cost
+                counters[identifier] = [window_index, current, previous]
+                results.append((ok, window_index, current, previous))
+            self.store.set_many(counters, now)
+        
+        allowed = []
+        remaining = []
+        reset_at = []
+        retry_after = []
+        for (ok, window_index, current, previous), (_, cost) in zip(results, items):
+            allowed.append(ok)
+            remaining.append(max(0, int(max_requests - (previous * weight + current))))
+            if current:
+                reset_at.append((window_index + 2) * window_seconds)
+            elif previous:
+                reset_at.append((window_index + 1) * window_seconds)
+            else:
+                reset_at.append(now)
+            retry_after.append(0.0 if ok else self._retry_after(now, window_index, current, previous, cost))
         
-        # Add current request
-        user_windows.append(now)
-        return True
+        return BatchRateLimitDecision(
+            limit=max_requests,
+            allowed=allowed,
+            remaining=remaining,
+            reset_at=reset_at,
+            retry_after=retry_after
+        )
+
+    def is_allowed(self, identifier: str) -> bool:
+        """
+        Check if request is allowed.
+        
+        Args:
+            identifier: Unique identifier
+            
+        Returns:
+            True if request is allowed, False otherwise
+        """
+        return self.acquire(identifier).allowed
     
     def get_remaining(self, identifier: str) -> int:
         """Get remaining requests in current window."""
         now = time.time()
-        window_start = now - self.window_seconds
-        user_windows = self.windows[identifier]
+        if self.backend is not None:
+            _, _, current, previous = self.backend.counter_acquire(
+                identifier, now, self.max_requests, self.window_seconds, 0
+            )
+        else:
+            _, current, previous = self._load(identifier, now)
         
-        # Remove old requests
-        while user_windows and user_windows[0] < window_start:
-            user_windows.popleft()
+        return max(0, int(self.max_requests - self._estimate(now, current, previous)))
+    
+    def refund(self, identifier: str, cost: int = 1):
+        """Return quota consumed by an allowed acquire() (used to roll back)."""
+        now = time.time()
+        if self.backend is not None:
+            self.backend.counter_acquire(identifier, now, self.max_requests, self.window_seconds, -cost)
+            return
+        if self.store.get(identifier, now) is None:
+            return
+        window_index, current, previous = self._load(identifier, now)
+        # If the window rolled over since acquire(), the cost moved to previous
+        from_current = min(cost, current)
+        self.store.set(
+            identifier,
+            [window_index, current - from_current, max(0, previous - (cost - from_current))],
+            now
+        )
+    
+    def reset(self, identifier: Optional[str] = None):
+        """Reset rate limit for identifier or all."""
+        if self.backend is not None:
+            self.backend.reset(identifier)
+        elif identifier:
+            self.store.pop(identifier)
+        else:
+            self.store.clear()
+
+
+@dataclass
+class CompositeRateLimitDecision(RateLimitDecision):
+    """
+    Outcome of CompositeRateLimiter.acquire().
+    
+    The RateLimitDecision fields are those of the binding level: the level
+    that denied the request, or else the one with the least remaining quota.
+    """
+    level: str = ""
+    levels: Dict[str, RateLimitDecision] = field(default_factory=dict)  # As evaluated, in order
+
+
+class CompositeRateLimiter:
+    """
+    Hierarchical quotas: several (limiter, identifier) levels checked as one.
+    
+    Levels are acquired in order, e.g. per API key, per organisation, per
+    route and global. The first denial stops the evaluation and refunds the
+    levels already consumed, so a request is counted either at every level
+    or at none. Work per request is one acquire() per level (plus one
+    refund() per consumed level on denial), independent of traffic volume;
+    put the most selective levels first so rollbacks stay rare.
+    """
+    
+    def __init__(self):
+        """Initialize composite rate limiter (levels are passed per request)."""
+        self.denials: Dict[str, int] = {}
+        self.rollbacks = 0
+
+    def acquire(self, levels: Sequence[Tuple[str, Any, Optional[str]]], cost: int = 1) -> CompositeRateLimitDecision:
+        """
+        Check and consume quota at every level, all or nothing.
+        
+        Args:
+            levels: Sequence of (level_name, limiter, identifier); levels
+                with a None identifier are skipped
+            cost: Number of requests to account for at each level (default: 1)
+            
+        Returns:
+            CompositeRateLimitDecision for the binding level
+        """
+        decisions: Dict[str, RateLimitDecision] = {}
+        consumed = []
+        for name, limiter, identifier in levels:
+            if identifier is None:
+                continue
+            decision = limiter.acquire(identifier, cost)
+            decisions[name] = decision
+            if not decision.allowed:
+                # Roll back the levels that already counted this request
+                for limiter_consumed, identifier_consumed in reversed(consumed):
+                    limiter_consumed.refund(identifier_consumed, cost)
+                if consumed and cost:
+                    self.rollbacks += 1
+                self.denials[name] = self.denials.get(name, 0) + 1
+                return self._combine(name, decision, decisions)
+            consumed.append((limiter, identifier))
         
-        return max(0, self.max_requests - len(user_windows))
+        if not decisions:
+            raise ValueError("At least one level needs an identifier")
+        binding = min(decisions, key=lambda name: decisions[name].remaining)
+        return self._combine(binding, decisions[binding], decisions)
+
+    @staticmethod
+    def _combine(
+        name: str, decision: RateLimitDecision, decisions: Dict[str, RateLimitDecision]
+    ) -> CompositeRateLimitDecision:
+        return CompositeRateLimitDecision(
+            allowed=decision.allowed,
+            limit=decision.limit,
+            remaining=decision.remaining,
+            reset_at=decision.reset_at,
+            retry_after=decision.retry_after,
+            level=name,
+            levels=decisions
+        )
+
+    def is_allowed(self, levels: Sequence[Tuple[str, Any, Optional[str]]]) -> bool:
+        """
+        Check if request is allowed at every level (consumes quota if so).
+        
+        Args:
+            levels: Sequence of (level_name, limiter, identifier)
+            
+        Returns:
+            True if every level allows the request, False otherwise
+        """
+        return self.acquire(levels).allowed
+
+    def stats(self) -> Dict[str, Any]:
+        """Return rollback count and denials per level."""
+        return {
+            "rollbacks": self.rollbacks,
+            "denials": dict(self.denials),
+        }
 
 
 def test_limiter(limiter, identifier: str = "test", num_requests: int = 15):
@@ -229,14 +1293,13 @@ def test_limiter(limiter, identifier: str = "test", num_requests: int = 15):
     denied = 0
     
     for i in range(num_requests):
-        if limiter.is_allowed(identifier):
+        decision = limiter.acquire(identifier)
+        if decision.allowed:
             allowed += 1
-            remaining = limiter.get_remaining(identifier)
-            print(f"Request {i+1}: ✅ Allowed (remaining: {remaining})")
+            print(f"Request {i+1}: ✅ Allowed (remaining: {decision.remaining})")
         else:
             denied += 1
-            remaining = limiter.get_remaining(identifier)
-            print(f"Request {i+1}: ❌ Denied (remaining: {remaining})")
+            print(f"Request {i+1}: ❌ Denied (retry after: {decision.retry_after:.1f}s)")
         
         time.sleep(0.1)  # Small delay between requests
     
@@ -252,7 +1315,7 @@ def main():
     
     parser.add_argument(
         "--strategy",
-        choices=["fixed", "token-bucket", "sliding"],
+        choices=["fixed", "token-bucket", "gcra", "sliding", "sliding-counter"],
         default="fixed",
         help="Rate limiting strategy"
     )
@@ -268,21 +1331,21 @@ def main():
         "--window",
         type=int,
         default=60,
-        help="Time window in seconds (for fixed/sliding)"
+        help="Time window in seconds (for fixed/sliding/sliding-counter)"
     )
     
     parser.add_argument(
         "--capacity",
         type=int,
         default=10,
-        help="Token bucket capacity"
+        help="Token bucket / GCRA capacity (burst)"
     )
     
     parser.add_argument(
         "--refill-rate",
         type=float,
         default=1.0,
-        help="Token bucket refill rate (tokens/second)"
+        help="Token bucket / GCRA refill rate (requests/second)"
     )
     
     parser.add_argument(
@@ -305,8 +1368,12 @@ def main():
         limiter = RateLimiter(args.max_requests, args.window)
     elif args.strategy == "token-bucket":
         limiter = TokenBucketRateLimiter(args.capacity, args.refill_rate)
+    elif args.strategy == "gcra":
+        limiter = GCRARateLimiter(args.capacity, args.refill_rate)
     elif args.strategy == "sliding":
         limiter = SlidingWindowRateLimiter(args.max_requests, args.window)
+    elif args.strategy == "sliding-counter":
+        limiter = SlidingWindowCounterRateLimiter(args.max_requests, args.window)
     
     # Run test
     test_limiter(limiter, args.identifier, args.num_requests)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Response Cache
+
+In-process response cache for the API Gateway:
+- TTL per entry and LRU eviction, bounded by entry count and total body size
+- Strong ETags for If-None-Match revalidation (304 Not Modified)
+- Request coalescing: concurrent misses for the same key wait for a single
+  computation instead of all running the handler
+
+The cache stores complete responses (status, headers, body); the ASGI
+middleware that captures and replays them lives in api_gateway_middleware.py.
+
+Usage:
+    from response_cache import CachedResponse, CachePolicy, ResponseCache
+
+    cache = ResponseCache(max_entries=10_000, max_bytes=64 * 2**20)
+
+    async def compute() -> CachedResponse:
+        return CachedResponse(status=200, headers=[...], body=b"...")
+
+    response, source = await cache.get_or_compute(key, compute, ttl_seconds=5.0)
+    # source is "hit", "miss" or "coalesced"
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+@dataclass
+class CachedResponse:
+    """A complete response as captured from the app."""
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: str = ""
+    stored_at: float = 0.0
+    expires_at: float = 0.0
+    cacheable: bool = True
+
+    def __post_init__(self):
+        if self.cacheable and not self.etag:
+            for name, value in self.headers:
+                if name == b"etag":
+                    self.etag = value.decode("latin-1")
+                    break
+            else:
+                self.etag = etag_for(self.body)
+                self.headers = self.headers + [(b"etag", self.etag.encode("latin-1"))]
+
+
+@dataclass
+class CachePolicy:
+    """Caching rule for one route."""
+    ttl_seconds: float
+    per_client: bool = False  # Key also by client (user id or IP), for responses that echo the caller
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag derived from the response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison, RFC 9110).
+
+    Args:
+        if_none_match: Raw If-None-Match header value, if any
+        etag: ETag of the cached response
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of complete responses with request coalescing.
+
+    Meant for one event loop (one gateway worker). Entries are kept in
+    least-recently-used order; expired entries are dropped on access and
+    the least recently used ones are evicted past max_entries or max_bytes.
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: Optional[int] = 64 * 2**20):
+        """
+        Initialize response cache.
+
+        Args:
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total body size (None for no byte limit)
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        # key -> future resolved by the request computing that key
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, now: Optional[float] = None) -> Optional[CachedResponse]:
+        """Return the fresh entry for key (marking it recently used), or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if (now if now is not None else time.monotonic()) >= entry.expires_at:
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: Hashable, entry: CachedResponse, ttl_seconds: float, now: Optional[float] = None):
+        """Store entry for ttl_seconds and evict past the size limits."""
+        now = now if now is not None else time.monotonic()
+        entry.stored_at = now
+        entry.expires_at = now + ttl_seconds
+        if self.max_bytes is not None and len(entry.body) > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self.total_bytes += len(entry.body)
+
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self.total_bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self.total_bytes -= len(entry.body)
+
+    def clear(self):
+        """Remove all entries."""
+        self._entries.clear()
+        self.total_bytes = 0
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[CachedResponse]],
+        ttl_seconds: float
+    ) -> Tuple[CachedResponse, str]:
+        """
+        Return the cached response for key, computing it at most once.
+
+        The first miss for a key runs compute(); concurrent misses for the
+        same key wait for that result instead. Only responses marked
+        cacheable are stored and shared: if the result is not cacheable
+        (an error, a shed request, a per-client response) or the computing
+        request fails, each waiter computes on its own.
+
+        Returns:
+            Tuple of (response, source), source being "hit", "miss" or "coalesced"
+        """
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry, "hit"
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            # Shield so a disconnecting waiter does not cancel the shared result
+            shared = await asyncio.shield(pending)
+            if shared is not None:
+                self.coalesced += 1
+                return shared, "coalesced"
+            self.misses += 1
+            return await compute(), "miss"
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await compute()
+        except BaseException:
+            # Waiters fall back to computing themselves
+            future.set_result(None)
+            raise
+        finally:
+            del self._inflight[key]
+
+        if response.cacheable:
+            self.set(key, response, ttl_seconds)
+            future.set_result(response)
+        else:
+            # One failure (a 500, a 503 from load shedding) must not answer every waiter
+            future.set_result(None)
+        return response, "miss"
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters (entries, bytes, hits, misses, coalesced, ...)."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
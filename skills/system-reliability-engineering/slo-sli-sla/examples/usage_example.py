@@ -116,11 +116,37 @@ def example_window_comparison():
               f"Remaining: {status['remaining']:8,} ({status['remaining_percentage']:5.1f}%)")
 
 
+def example_fleet_batch():
+    """Evaluate many SLOs at once with the vectorized batch API (requires NumPy)."""
+    print("\n" + "=" * 60)
+    print("Example 5: Fleet-wide Batch Calculation")
+    print("=" * 60)
+    
+    from error_budget_batch import calculate_budgets
+    
+    # Examples 2 and 4 in one call: every target, then every window
+    slo_targets = [0.99, 0.999, 0.9995, 0.9999] + [0.9995] * 4
+    windows = [30, 30, 30, 30, 7, 14, 30, 90]
+    total_requests = [1_000_000] * 4 + [100_000 * days for days in windows[4:]]
+    error_requests = [500] * 4 + [50 * days for days in windows[4:]]
+    
+    batch = calculate_budgets(slo_targets, total_requests, error_requests, windows)
+    
+    print()
+    for target, window, remaining, pct, status in zip(
+        batch.slo_target, batch.window_days, batch.remaining,
+        batch.remaining_percentage, batch.status_names()
+    ):
+        print(f"{target * 100:7.2f}% / {window:2} days: {status:10} | "
+              f"Remaining: {remaining:8,} ({pct:5.1f}%)")
+
+
 if __name__ == "__main__":
     example_basic_calculation()
     example_different_slos()
     example_budget_statuses()
     example_window_comparison()
+    example_fleet_batch()
     
     print("\n" + "=" * 60)
     print("All examples completed!")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+SLO Aggregation Benchmark
+
+Compares ways of turning a range query result into window availability,
+on synthetic 30- and 90-day results at a 1h step:
+- mean of ratios: the former approach (per-step ratio series concatenated
+  into a Python list and averaged); fast but wrong under uneven traffic
+- weighted (Python): request-weighted from error/total counts, aligned
+  with per-timestamp dicts
+- weighted (NumPy): slo_queries.parse_slo_series + slo_aggregation
+- weighted (NumPy, cached): the same on a RangeQueryCache hit, whose
+  sample values are already floats
+
+Reports time per evaluation and the availability error of each approach
+against the exact request-weighted figure.
+
+Usage:
+    python benchmark_aggregation.py
+    python benchmark_aggregation.py --series 8 --repeat 200
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent))
+from slo_aggregation import evaluate_slo
+from slo_queries import parse_slo_series
+
+
+def synthetic_results(days: int, series: int, seed: int = 1) -> Dict:
+    """Ratio and count results for days of hourly steps, split over series (e.g. instances)."""
+    rng = random.Random(seed)
+    steps = days * 24
+    ratio_result: List[Dict] = []
+    count_result: List[Dict] = []
+    good = total = 0.0
+    for index in range(series):
+        ratios, errors_values, total_values = [], [], []
+        for step in range(steps):
+            timestamp = step * 3600
+            # Diurnal traffic (peak ~20x the trough); errors concentrated at the peak
+            requests = 1000.0 * (1.05 + (step % 24 >= 8) * 20 * rng.random())
+            errors = requests * (0.002 if step % 24 >= 8 else 0.0001) * rng.random() * 2
+            ratios.append([timestamp, repr(1 - errors / requests)])
+            errors_values.append([timestamp, repr(errors)])
+            total_values.append([timestamp, repr(requests)])
+            good += requests - errors
+            total += requests
+        metric = {"service": "payment", "instance": str(index)}
+        ratio_result.append({"metric": metric, "values": ratios})
+        count_result.append({"metric": {**metric, "slo_series": "errors"}, "values": errors_values})
+        count_result.append({"metric": {**metric, "slo_series": "total"}, "values": total_values})
+    cached_result = [
+        {"metric": series["metric"], "values": [[t, float(v)] for t, v in series["values"]]}
+        for series in count_result
+    ]
+    return {"ratios": ratio_result, "counts": count_result, "cached": cached_result, "exact": good / total}
+
+
+def mean_of_ratios(result: List[Dict]) -> float:
+    values = []
+    for series in result:
+        values.extend([float(v[1]) for v in series["values"]])
+    return sum(values) / len(values)
+
+
+def weighted_python(result: List[Dict]) -> float:
+    sums: Dict[str, Dict[float, float]] = {"errors": {}, "total": {}}
+    for series in result:
+        points = sums[series["metric"]["slo_series"]]
+        for timestamp, value in series["values"]:
+            points[timestamp] = points.get(timestamp, 0.0) + float(value)
+    errors = sums["errors"]
+    good = total = 0.0
+    for timestamp, requests in sums["total"].items():
+        if requests > 0:
+            total += requests
+            good += requests - min(requests, errors.get(timestamp, 0.0))
+    return good / total
+
+
+def weighted_numpy(result: List[Dict]) -> float:
+    return evaluate_slo(parse_slo_series(result)["payment"], 0.999, 30).availability
+
+
+def time_per_call(function: Callable, argument, repeat: int) -> float:
+    """Best of 3 runs of repeat calls, in seconds per call."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            function(argument)
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def main():
+    """CLI entry point for the aggregation benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark SLO availability aggregation approaches",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        "--series",
+        type=int,
+        default=1,
+        help="Series per name in the result (e.g. instances not summed by Prometheus)"
+    )
+
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=100,
+        help="Evaluations timed per approach and window"
+    )
+
+    args = parser.parse_args()
+
+    approaches = {
+        "mean of ratios": ("ratios", mean_of_ratios),
+        "weighted (Python)": ("counts", weighted_python),
+        "weighted (NumPy)": ("counts", weighted_numpy),
+        "weighted (NumPy, cached)": ("cached", weighted_numpy),
+    }
+
+    print(f"\nAvailability aggregation ({args.series} series per name, 1h step)\n")
+    print(f"{'Window':<8} {'Approach':<26} {'ms/eval':>9} {'abs error':>11}")
+    for days in (30, 90):
+        results = synthetic_results(days, args.series)
+        for name, (kind, function) in approaches.items():
+            seconds = time_per_call(function, results[kind], args.repeat)
+            error = abs(function(results[kind]) - results["exact"])
+            print(f"{f'{days}d':<8} {name:<26} {seconds * 1000:>9.3f} {error:>11.2e}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
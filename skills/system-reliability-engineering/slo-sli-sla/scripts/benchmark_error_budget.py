@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Fleet Error Budget Benchmark
+
+Compares evaluating many SLOs with the scalar ErrorBudget calculator in
+a Python loop (one instance and one calculate_remaining_budget call per
+SLO, as examples/usage_example.py does) against the vectorized
+error_budget_batch.calculate_budgets, on a synthetic fleet with mixed
+targets and windows:
+- scalar loop: from Python lists, results as dicts
+- batch (lists): from the same Python lists, including the conversion
+- batch (arrays): from NumPy arrays already in memory
+
+Checks that every batch result matches the scalar one and reports time
+per evaluation of the whole fleet.
+
+Usage:
+    python benchmark_error_budget.py
+    python benchmark_error_budget.py --slos 1000 5000 20000 --repeat 20
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from error_budget import ErrorBudget
+from error_budget_batch import calculate_budgets
+
+TARGETS = (0.99, 0.995, 0.999, 0.9995, 0.9999)
+WINDOWS = (7, 14, 28, 30, 90)
+
+
+def synthetic_fleet(size: int, seed: int = 1) -> Dict[str, List]:
+    """Targets, windows and observed counts for size SLOs, about half of them burning budget."""
+    rng = random.Random(seed)
+    fleet = {"targets": [], "windows": [], "totals": [], "errors": []}
+    for _ in range(size):
+        target = rng.choice(TARGETS)
+        total = rng.randint(0, 50_000_000)
+        fleet["targets"].append(target)
+        fleet["windows"].append(rng.choice(WINDOWS))
+        fleet["totals"].append(total)
+        fleet["errors"].append(int(total * (1 - target) * rng.uniform(0, 1.5)))
+    return fleet
+
+
+def scalar_loop(fleet: Dict[str, List]) -> List[Dict]:
+    results = []
+    for target, window, total, errors in zip(fleet["targets"], fleet["windows"], fleet["totals"], fleet["errors"]):
+        error_budget = ErrorBudget(slo_target=target, window_days=window)
+        results.append(error_budget.calculate_remaining_budget(total, errors))
+    return results
+
+
+def batch(fleet: Dict) -> object:
+    return calculate_budgets(fleet["targets"], fleet["totals"], fleet["errors"], fleet["windows"])
+
+
+def time_per_call(function: Callable, argument, repeat: int) -> float:
+    """Best of 3 runs of repeat calls, in seconds per call."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            function(argument)
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def main():
+    """CLI entry point for the fleet error budget benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark scalar vs vectorized fleet error budget calculation",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        "--slos",
+        type=int,
+        nargs="+",
+        default=[1000, 5000, 20000],
+        help="Fleet sizes to benchmark (default: 1000 5000 20000)"
+    )
+
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=20,
+        help="Fleet evaluations timed per approach and size"
+    )
+
+    args = parser.parse_args()
+
+    print(f"\n{'SLOs':>7} {'Approach':<16} {'ms/fleet':>10} {'speedup':>9}")
+    for size in args.slos:
+        fleet = synthetic_fleet(size)
+        arrays = {name: np.asarray(values) for name, values in fleet.items()}
+
+        expected = scalar_loop(fleet)
+        result = batch(fleet)
+        mismatches = sum(result.row(index) != status for index, status in enumerate(expected))
+        if mismatches:
+            print(f"❌ {mismatches} of {size} batch results differ from the scalar calculator")
+            return 1
+
+        baseline = time_per_call(scalar_loop, fleet, args.repeat)
+        for name, function, argument in (
+            ("scalar loop", scalar_loop, fleet),
+            ("batch (lists)", batch, fleet),
+            ("batch (arrays)", batch, arrays),
+        ):
+            seconds = baseline if function is scalar_loop else time_per_call(function, argument, args.repeat)
+            print(f"{size:>7} {name:<16} {seconds * 1000:>10.3f} {baseline / seconds:>8.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Prometheus Client Benchmark
+
+Compares the SLO API's async pooled Prometheus client against blocking
+calls (a new connection per query, made from inside the event loop, as a
+synchronous HTTP client would) by running many concurrent error-budget
+evaluations against a local fake Prometheus with configurable latency.
+The fake runs in a separate process, so it does not compete for the GIL.
+
+Reports, per variant: wall time, evaluations per second, p50/p99 latency
+per evaluation, the worst event loop stall and connections opened.
+
+Usage:
+    python benchmark_prometheus_client.py
+    python benchmark_prometheus_client.py --evaluations 200 --concurrency 50 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlencode
+
+sys.path.insert(0, str(Path(__file__).parent))
+from prometheus_query import PrometheusClient
+from slo_api import SLOService
+
+
+class BlockingSLOService(SLOService):
+    """SLOService issuing blocking HTTP calls with a new connection per query (baseline)."""
+
+    def _get(self, path: str, params: Dict) -> Dict:
+        with urllib.request.urlopen(f"{self.api_url}{path}?{urlencode(params)}", timeout=30) as response:
+            return json.load(response)["data"]
+
+    async def _query_prometheus(self, query: str, start: datetime, end: datetime, step: str = "1h") -> list:
+        params = {"query": query, "start": start.timestamp(), "end": end.timestamp(), "step": step}
+        return self._get("/query_range", params)["result"]
+
+
+def start_fake_prometheus(latency: float) -> "tuple[subprocess.Popen, str]":
+    """Start fake_prometheus.py in a child process; return (process, url) once it answers."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, str(Path(__file__).parent / "fake_prometheus.py"), "--port", str(port), "--latency", str(latency)],
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            fake_stats(url)
+            return process, url
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Fake Prometheus did not start")
+
+
+def fake_stats(url: str) -> Dict[str, int]:
+    """Request and connection counters of a fake Prometheus."""
+    with urllib.request.urlopen(f"{url}/fake/stats", timeout=1) as response:
+        return json.load(response)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_variant(service: SLOService, evaluations: int, concurrency: int) -> Dict[str, float]:
+    """Run evaluations error-budget requests, concurrency at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    max_lag = 0.0
+    done = False
+
+    async def monitor_loop():
+        # Time a short sleep repeatedly; anything beyond it is a stalled loop
+        nonlocal max_lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.001)
+
+    async def evaluate(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await service.get_error_budget_status(f"service-{index % 20}", 0.999, 30)
+            latencies.append(time.perf_counter() - start)
+
+    monitor = asyncio.create_task(monitor_loop())
+    start = time.perf_counter()
+    await asyncio.gather(*(evaluate(i) for i in range(evaluations)))
+    elapsed = time.perf_counter() - start
+    done = True
+    await monitor
+
+    latencies.sort()
+    return {
+        "wall_s": elapsed,
+        "evaluations_per_sec": evaluations / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_loop_stall_ms": max_lag * 1000,
+    }
+
+
+def main():
+    """CLI entry point for the Prometheus client benchmark."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark blocking vs async pooled Prometheus queries",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        "--evaluations",
+        type=int,
+        default=100,
+        help="Error-budget evaluations per variant (one query each)"
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=20,
+        help="Evaluations in flight at once (concurrent API requests)"
+    )
+
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.02,
+        help="Fake Prometheus latency per query in seconds"
+    )
+
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=16,
+        help="Connection pool size (max_concurrency) of the async client"
+    )
+
+    args = parser.parse_args()
+
+    results = {}
+    process, url = start_fake_prometheus(args.latency)
+    try:
+        variants = {
+            "blocking": lambda: BlockingSLOService(url),
+            "async pooled": lambda: SLOService(
+                url, client=PrometheusClient(url, max_concurrency=args.max_connections)
+            ),
+        }
+        for name, factory in variants.items():
+            service = factory()
+            connections_before = fake_stats(url)["connections"]
+
+            async def run():
+                try:
+                    return await run_variant(service, args.evaluations, args.concurrency)
+                finally:
+                    await service.client.aclose()
+
+            results[name] = asyncio.run(run())
+            # Minus the connection used by fake_stats() itself
+            results[name]["connections"] = fake_stats(url)["connections"] - connections_before - 1
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(
+        f"\nPrometheus client ({args.evaluations} evaluations, {args.concurrency} concurrent, "
+        f"{args.latency * 1000:.0f} ms per query)\n"
+    )
+    print(
+        f"{'Variant':<14} {'wall (s)':>9} {'eval/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+        f"{'max stall (ms)':>15} {'connections':>12}"
+    )
+    for name, stats in results.items():
+        print(
+            f"{name:<14} {stats['wall_s']:>9.2f} {stats['evaluations_per_sec']:>8.1f} "
+            f"{stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_loop_stall_ms']:>15.1f} "
+            f"{stats['connections']:>12}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
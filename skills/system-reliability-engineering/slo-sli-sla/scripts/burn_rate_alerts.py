@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Multi-Window, Multi-Burn-Rate Alert Evaluator
+
+Evaluates the standard multiwindow burn-rate alerts for a whole fleet of
+services at once:
+
+    severity  long window  short window  burn rate  (budget spent in long window, 30d SLO)
+    page      1h           5m            14.4x      2%
+    page      6h           30m           6x         5%
+    ticket    3d           6h            1x         10%
+
+An alert fires when both windows burn faster than the threshold: the long
+window makes it significant, the short one makes it reset quickly once
+the problem is fixed.
+
+Counters are maintained incrementally: each cycle fetches only the newest
+5m buckets of error/total counts for every service in one query, and
+appends them to per-service ring buffers. Every window (5m to 3d) is a
+running sum over the same buckets, so overlapping windows are shared
+instead of queried separately, and evaluation is a few vectorized NumPy
+operations over all services.
+
+Usage:
+    from burn_rate_alerts import BurnRateEvaluator
+
+    evaluator = BurnRateEvaluator(default_target=0.9995, targets={"payment": 0.9999})
+    await evaluator.sync(client)        # each cycle
+    report = evaluator.evaluate()
+    print(report.firing())
+
+    # CLI: evaluate against Prometheus, or time a synthetic fleet
+    python burn_rate_alerts.py --prometheus-url http://prometheus:9090
+    python burn_rate_alerts.py --benchmark --services 10000
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from prometheus_query import PrometheusClient, PrometheusError
+from slo_queries import parse_slo_series, slo_series_query
+
+logger = logging.getLogger(__name__)
+
+# Decisions, by increasing severity
+DECISIONS = ("none", "ticket", "page")
+
+
+@dataclass(frozen=True)
+class BurnRateRule:
+    """Fire severity when both windows burn at least burn_rate times the budget rate."""
+    severity: str
+    long_window: int  # Seconds
+    short_window: int
+    burn_rate: float
+
+
+DEFAULT_RULES = (
+    BurnRateRule("page", 3600, 300, 14.4),
+    BurnRateRule("page", 6 * 3600, 1800, 6.0),
+    BurnRateRule("ticket", 3 * 86400, 6 * 3600, 1.0),
+)
+
+
+def window_name(seconds: int) -> str:
+    """Short label for a window ("5m", "6h", "3d")."""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+@dataclass
+class BurnRateReport:
+    """Burn rates and decisions of every service at one bucket."""
+    timestamp: float
+    services: List[str]
+    targets: np.ndarray
+    burn_rates: Dict[int, np.ndarray]  # Window seconds -> burn rate per service
+    fired: Dict[BurnRateRule, np.ndarray]  # Rule -> bool per service
+    decisions: np.ndarray  # Index into DECISIONS per service
+
+    def decision(self, service: str) -> str:
+        return DECISIONS[self.decisions[self.services.index(service)]]
+
+    def firing(self, minimum: str = "ticket") -> List[Dict]:
+        """Services at or above a decision, most severe first."""
+        level = DECISIONS.index(minimum)
+        indices = np.flatnonzero(self.decisions >= level)
+        indices = indices[np.argsort(-self.decisions[indices], kind="stable")]
+        return [self.service_dict(int(i)) for i in indices]
+
+    def service_dict(self, index: int) -> Dict:
+        """Decision, burn rate per window and fired rules of one service."""
+        return {
+            "service": self.services[index],
+            "slo_target": float(self.targets[index]),
+            "decision": DECISIONS[self.decisions[index]],
+            "burn_rates": {window_name(w): float(rates[index]) for w, rates in self.burn_rates.items()},
+            "alerts": [
+                {
+                    "severity": rule.severity,
+                    "long_window": window_name(rule.long_window),
+                    "short_window": window_name(rule.short_window),
+                    "burn_rate": rule.burn_rate,
+                }
+                for rule, fired in self.fired.items()
+                if fired[index]
+            ],
+        }
+
+
+class BurnRateEvaluator:
+    """
+    Incrementally maintained bucketed counters and burn-rate rules for many services.
+
+    Buckets are appended in time order; a service first seen later starts
+    with empty history (its windows cover the buckets seen since).
+    """
+
+    def __init__(
+        self,
+        default_target: float = 0.9995,
+        targets: Optional[Dict[str, float]] = None,
+        rules: Sequence[BurnRateRule] = DEFAULT_RULES,
+        bucket_seconds: int = 300,
+        services: Optional[Sequence[str]] = None,
+        settle_seconds: float = 60.0
+    ):
+        """
+        Initialize burn rate evaluator.
+
+        Args:
+            default_target: SLO target of services not in targets
+            targets: SLO target per service
+            rules: Alert rules; every window must be a multiple of bucket_seconds
+            bucket_seconds: Bucket width (the shortest window)
+            services: Services to fetch (default: every service label value)
+            settle_seconds: Age after which a bucket's counts are complete
+        """
+        self.default_target = default_target
+        self.targets = dict(targets or {})
+        self.rules = tuple(rules)
+        self.bucket_seconds = bucket_seconds
+        self.query_services = list(services) if services else None
+        self.settle_seconds = settle_seconds
+        self.windows = sorted({rule.long_window for rule in rules} | {rule.short_window for rule in rules})
+        for window in self.windows:
+            if window % bucket_seconds:
+                raise ValueError(f"Window {window}s is not a multiple of the {bucket_seconds}s bucket")
+        self.span = self.windows[-1] // bucket_seconds
+        self.services: List[str] = []
+        self._index: Dict[str, int] = {}
+        # Ring buffers, one row per bucket (contiguous writes), one column per service
+        self._errors = np.zeros((self.span, 0))
+        self._total = np.zeros((self.span, 0))
+        # Running sums per window: what every rule reads, shared between rules
+        self._sums = {window: (np.zeros(0), np.zeros(0)) for window in self.windows}
+        self.head: Optional[int] = None  # Timestamp of the newest bucket
+        self._since_recompute = 0
+
+    def _add_services(self, services: Sequence[str]):
+        new = [service for service in services if service not in self._index]
+        if not new:
+            return
+        for service in new:
+            self._index[service] = len(self.services)
+            self.services.append(service)
+        padding = np.zeros((self.span, len(new)))
+        self._errors = np.hstack([self._errors, padding])
+        self._total = np.hstack([self._total, padding])
+        self._sums = {
+            window: (np.concatenate([errors, np.zeros(len(new))]), np.concatenate([total, np.zeros(len(new))]))
+            for window, (errors, total) in self._sums.items()
+        }
+
+    def ingest(self, timestamp: int, errors: np.ndarray, total: np.ndarray):
+        """
+        Append one bucket (counts of every known service, in self.services order).
+
+        Buckets at or before the head are ignored; skipped buckets count as
+        no traffic.
+        """
+        if self.head is not None:
+            if timestamp <= self.head:
+                return
+            missing = min(self.span, (timestamp - self.head) // self.bucket_seconds - 1)
+            zeros = np.zeros(len(self.services))
+            for i in range(missing, 0, -1):
+                self._append(timestamp - i * self.bucket_seconds, zeros, zeros)
+        self._append(timestamp, errors, total)
+
+    def _append(self, timestamp: int, errors: np.ndarray, total: np.ndarray):
+        position = (timestamp // self.bucket_seconds) % self.span
+        for window, (window_errors, window_total) in self._sums.items():
+            # The bucket leaving this window (for the longest one, the slot being overwritten)
+            leaving = (position - window // self.bucket_seconds) % self.span
+            window_errors += errors - self._errors[leaving]
+            window_total += total - self._total[leaving]
+        self._errors[position] = errors
+        self._total[position] = total
+        self.head = timestamp
+
+        # Rebuild the running sums now and then, so float drift cannot accumulate
+        self._since_recompute += 1
+        if self._since_recompute >= self.span:
+            self._recompute()
+
+    def _recompute(self):
+        position = (self.head // self.bucket_seconds) % self.span
+        for window in self.windows:
+            count = window // self.bucket_seconds
+            slots = (position - np.arange(count)) % self.span
+            self._sums[window] = (self._errors[slots].sum(axis=0), self._total[slots].sum(axis=0))
+        self._since_recompute = 0
+
+    def ingest_result(self, result: List[Dict], start: int, end: int):
+        """Append the buckets start..end of a planned query result (slo_queries.py)."""
+        series = parse_slo_series(result)
+        self._add_services(sorted(series))
+        count = (end - start) // self.bucket_seconds + 1
+        errors = np.zeros((count, len(self.services)))
+        total = np.zeros((count, len(self.services)))
+        for service, named in series.items():
+            row = self._index[service]
+            for name, matrix in (("errors", errors), ("total", total)):
+                for timestamps, values in named.get(name, []):
+                    columns = ((timestamps - start) // self.bucket_seconds).astype(int)
+                    valid = (columns >= 0) & (columns < count) & ~np.isnan(values)
+                    matrix[columns[valid], row] += values[valid]
+        errors = np.minimum(errors, total)
+        for column in range(count):
+            self.ingest(start + column * self.bucket_seconds, errors[column], total[column])
+
+    async def sync(self, client: PrometheusClient, now: Optional[float] = None) -> int:
+        """
+        Fetch and append every settled bucket after the head, in one query.
+
+        The first sync (or one after an outage longer than the longest
+        window) backfills the whole longest window.
+
+        Returns:
+            Number of buckets appended
+
+        Raises:
+            PrometheusError: If the query fails
+        """
+        now = time.time() if now is None else now
+        bucket = self.bucket_seconds
+        end = math.floor((now - self.settle_seconds) / bucket) * bucket
+        start = end - (self.span - 1) * bucket
+        if self.head is not None:
+            start = max(start, self.head + bucket)
+        if start > end:
+            return 0
+        query = slo_series_query(self.query_services, f"{bucket}s")
+        result = await client.query_range(query, start, end, f"{bucket}s")
+        self.ingest_result(result, start, end)
+        return (end - start) // bucket + 1
+
+    def evaluate(self) -> BurnRateReport:
+        """Burn rates of every window and rule decisions for all services."""
+        targets = np.array([self.targets.get(service, self.default_target) for service in self.services])
+        budget = np.maximum(1.0 - targets, 1e-12)
+        burn_rates = {}
+        for window, (errors, total) in self._sums.items():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.where(total > 0, np.clip(errors, 0.0, None) / total, 0.0)
+            burn_rates[window] = ratio / budget
+
+        decisions = np.zeros(len(self.services), dtype=int)
+        fired = {}
+        for rule in self.rules:
+            fired[rule] = (burn_rates[rule.long_window] >= rule.burn_rate) & (burn_rates[rule.short_window] >= rule.burn_rate)
+            decisions = np.where(fired[rule], np.maximum(decisions, DECISIONS.index(rule.severity)), decisions)
+        return BurnRateReport(
+            timestamp=float(self.head or 0),
+            services=list(self.services),
+            targets=targets,
+            burn_rates=burn_rates,
+            fired=fired,
+            decisions=decisions,
+        )
+
+
+class BurnRateAlertJob:
+    """Runs sync + evaluate every interval and keeps the latest report."""
+
+    def __init__(self, evaluator: BurnRateEvaluator, client: PrometheusClient, interval: float = 60.0):
+        """
+        Args:
+            evaluator: Evaluator to keep up to date
+            client: Prometheus client
+            interval: Seconds between cycles
+        """
+        self.evaluator = evaluator
+        self.client = client
+        self.interval = interval
+        self.report: Optional[BurnRateReport] = None
+        self.cycles = 0
+        self.failures = 0
+        self.last_duration: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> BurnRateReport:
+        """One cycle: fetch new buckets, evaluate, publish the report."""
+        started = time.perf_counter()
+        await self.evaluator.sync(self.client)
+        self.report = self.evaluator.evaluate()
+        self.cycles += 1
+        self.last_duration = time.perf_counter() - started
+        return self.report
+
+    async def run(self):
+        """Run forever; failures are logged and the previous report is kept."""
+        while True:
+            try:
+                await self.run_once()
+            except PrometheusError as e:
+                self.failures += 1
+                logger.warning("Burn rate alert cycle failed: %s", e)
+            except Exception:
+                # Malformed series or evaluation bugs must not end the job
+                self.failures += 1
+                logger.exception("Burn rate alert cycle failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> asyncio.Task:
+        """Start run() as a task on the running event loop."""
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Cancel the task started by start()."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Return cycle counters (cycles, failures, services, last duration)."""
+        return {
+            "cycles": self.cycles,
+            "failures": self.failures,
+            "services": len(self.evaluator.services),
+            "last_duration_s": self.last_duration,
+        }
+
+
+def parse_targets(value: str) -> Dict[str, float]:
+    """Parse "service=target,..." into a dict."""
+    targets = {}
+    for item in value.split(","):
+        if item.strip():
+            service, _, target = item.partition("=")
+            targets[service.strip()] = float(target)
+    return targets
+
+
+def run_benchmark(services: int, cycles: int) -> Dict[str, float]:
+    """Time backfill, per-cycle ingest and evaluation on a synthetic fleet."""
+    rng = np.random.default_rng(1)
+    evaluator = BurnRateEvaluator()
+    evaluator._add_services([f"service-{i}" for i in range(services)])
+    total = rng.uniform(100, 10000, services)
+
+    start = time.perf_counter()
+    for step in range(evaluator.span):
+        evaluator.ingest(step * evaluator.bucket_seconds, total * rng.uniform(0, 0.001, services), total)
+    backfill = time.perf_counter() - start
+
+    timings = []
+    for step in range(evaluator.span, evaluator.span + cycles):
+        start = time.perf_counter()
+        errors = total * rng.uniform(0, 0.001, services)
+        errors[:services // 100] = total[:services // 100] * 0.05  # 1% of the fleet burning hard
+        evaluator.ingest(step * evaluator.bucket_seconds, errors, total)
+        report = evaluator.evaluate()
+        timings.append(time.perf_counter() - start)
+    return {
+        "backfill_s": backfill,
+        "cycle_ms": sorted(timings)[len(timings) // 2] * 1000,
+        "paging": int((report.decisions == DECISIONS.index("page")).sum()),
+    }
+
+
+def main():
+    """CLI entry point for the burn rate alert evaluator."""
+    parser = argparse.ArgumentParser(
+        description="Evaluate multiwindow multi-burn-rate SLO alerts for a fleet",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        "--prometheus-url",
+        default="http://localhost:9090",
+        help="URL of Prometheus instance"
+    )
+
+    parser.add_argument(
+        "--default-target",
+        type=float,
+        default=0.9995,
+        help="SLO target of services without their own"
+    )
+
+    parser.add_argument(
+        "--targets",
+        default="",
+        help="Per-service targets: service=target,..."
+    )
+
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Time a synthetic fleet instead of querying Prometheus"
+    )
+
+    parser.add_argument(
+        "--services",
+        type=int,
+        default=5000,
+        help="Synthetic fleet size (--benchmark)"
+    )
+
+    parser.add_argument(
+        "--cycles",
+        type=int,
+        default=50,
+        help="Timed cycles (--benchmark)"
+    )
+
+    args = parser.parse_args()
+
+    if args.benchmark:
+        results = run_benchmark(args.services, args.cycles)
+        print(f"\nBurn rate evaluation ({args.services} services, 5m buckets, windows 5m-3d)\n")
+        print(f"Backfill (864 buckets):   {results['backfill_s']:.2f} s")
+        print(f"Cycle (ingest+evaluate):  {results['cycle_ms']:.2f} ms")
+        print(f"Services paging:          {results['paging']}")
+        return 0
+
+    evaluator = BurnRateEvaluator(args.default_target, parse_targets(args.targets))
+    client = PrometheusClient(args.prometheus_url)
+
+    async def run():
+        try:
+            await evaluator.sync(client)
+        finally:
+            await client.aclose()
+        return evaluator.evaluate()
+
+    try:
+        report = asyncio.run(run())
+    except PrometheusError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    firing = report.firing()
+    print(f"{len(report.services)} services evaluated, {len(firing)} firing")
+    for entry in firing:
+        rates = " ".join(f"{window}={rate:.1f}x" for window, rate in entry["burn_rates"].items())
+        print(f"  {entry['decision']:<7} {entry['service']:<30} {rates}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -5,14 +5,26 @@ Error Budget Calculator for SLO Management
 This script calculates error budgets based on SLO targets and tracks
 error budget consumption for services.
 
+StreamingErrorBudget keeps the window totals itself: it ingests request
+outcomes (one at a time or in batches) into time buckets held in a ring
+buffer, so remaining budget, burn rate and time to exhaustion are
+answered in O(1) with memory bounded by the number of buckets.
+
+Replay mode (--replay) feeds it from a historical request log instead,
+producing a budget time series per service and window (see
+request_log_replay.py).
+
 Usage:
     python error_budget.py --slo-target 0.9995 --total-requests 1000000 --error-requests 400
     python error_budget.py --slo-target 0.9995 --window-days 30 --interactive
+    python error_budget.py --slo-target 0.9995 --replay access.ndjson.gz --windows 7 30
 """
 
 import argparse
+import sys
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
 
 
 class ErrorBudget:
@@ -153,6 +165,331 @@ Budget:
 """
 
 
+def _window_label(seconds: int) -> str:
+    """Short label for a window length, e.g. 300 -> '5m', 21600 -> '6h'."""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+class StreamingErrorBudget(ErrorBudget):
+    """
+    Error budget fed directly by request outcomes.
+    
+    Outcomes are counted into fixed-size time buckets held in a ring buffer
+    that spans the SLO window. Every tracked window (the SLO window plus
+    the shorter burn rate windows) keeps running error/total sums that are
+    updated as outcomes arrive and as buckets slide out, so queries never
+    scan the buckets. Memory depends only on window_days / bucket_seconds,
+    not on the request volume.
+    
+    Outcomes may arrive slightly out of order: one that falls in a bucket
+    still inside the SLO window is counted in every window that contains
+    it; older ones are dropped and counted in `dropped`.
+    """
+    
+    def __init__(
+        self,
+        slo_target: float,
+        window_days: int = 30,
+        bucket_seconds: int = 300,
+        burn_windows: Sequence[int] = (3600, 21600),
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Initialize the streaming accumulator.
+        
+        Args:
+            slo_target: SLO target as decimal (e.g., 0.9995 for 99.95%)
+            window_days: SLO window in days (default: 30)
+            bucket_seconds: Bucket size in seconds; the time resolution of
+                every window (default: 300)
+            burn_windows: Burn rate windows in seconds, multiples of
+                bucket_seconds (default: 1h and 6h)
+            clock: Time source for outcomes and queries without a timestamp
+        """
+        super().__init__(slo_target, window_days)
+        if bucket_seconds <= 0 or self.window_seconds % bucket_seconds:
+            raise ValueError("bucket_seconds must divide the SLO window")
+        for seconds in burn_windows:
+            if seconds <= 0 or seconds % bucket_seconds or seconds > self.window_seconds:
+                raise ValueError(
+                    f"Burn window {seconds}s must be a multiple of {bucket_seconds}s "
+                    f"no longer than the SLO window"
+                )
+
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self.dropped = 0
+        self._span = self.window_seconds // bucket_seconds
+        self._totals = [0] * self._span
+        self._errors = [0] * self._span
+        self._head: Optional[int] = None  # Index of the newest bucket
+
+        # Window length in buckets -> running [total, errors]; the SLO window first
+        lengths = [self._span] + sorted(
+            {seconds // bucket_seconds for seconds in burn_windows} - {self._span}
+        )
+        self._windows = {length: [0, 0] for length in lengths}
+        self.burn_windows = {
+            _window_label(length * bucket_seconds): length for length in lengths[1:]
+        }
+
+    def _bucket(self, timestamp: Optional[float]) -> int:
+        if timestamp is None:
+            timestamp = self.clock()
+        return int(timestamp // self.bucket_seconds)
+
+    def _advance(self, bucket: int):
+        """Slide every window forward so that bucket is the newest one."""
+        if self._head is None:
+            self._head = bucket
+            return
+        if bucket <= self._head:
+            return
+        if bucket - self._head >= self._span:
+            # Nothing left in the window: start over
+            self._totals = [0] * self._span
+            self._errors = [0] * self._span
+            for sums in self._windows.values():
+                sums[0] = sums[1] = 0
+            self._head = bucket
+            return
+        span, totals, errors = self._span, self._totals, self._errors
+        for new in range(self._head + 1, bucket + 1):
+            for length, sums in self._windows.items():
+                leaving = (new - length) % span
+                sums[0] -= totals[leaving]
+                sums[1] -= errors[leaving]
+            # The SLO window's leaving bucket is this slot: subtracted above, now reused
+            slot = new % span
+            totals[slot] = 0
+            errors[slot] = 0
+        self._head = bucket
+
+    def record_counts(self, total: int, errors: int = 0, timestamp: Optional[float] = None):
+        """
+        Record a batch of outcomes that share one timestamp.
+        
+        Args:
+            total: Number of requests
+            errors: Number of those requests that failed
+            timestamp: Unix time of the requests (default: now)
+        """
+        bucket = self._bucket(timestamp)
+        self._advance(bucket)
+        age = self._head - bucket
+        if age >= self._span:
+            self.dropped += total
+            return
+        slot = bucket % self._span
+        self._totals[slot] += total
+        self._errors[slot] += errors
+        for length, sums in self._windows.items():
+            if age < length:
+                sums[0] += total
+                sums[1] += errors
+
+    def record(self, error: bool, timestamp: Optional[float] = None):
+        """
+        Record one request outcome.
+        
+        Args:
+            error: Whether the request failed
+            timestamp: Unix time of the request (default: now)
+        """
+        self.record_counts(1, 1 if error else 0, timestamp)
+
+    def record_many(self, outcomes: Iterable[Tuple[float, bool]]) -> int:
+        """
+        Record a batch of (timestamp, error) outcomes.
+        
+        Consecutive outcomes in the same bucket are added together before
+        touching the windows, so time-ordered batches cost little more
+        than a counter increment per outcome.
+        
+        Args:
+            outcomes: Iterable of (unix timestamp, failed) pairs
+            
+        Returns:
+            Number of outcomes read
+        """
+        count = 0
+        current = None
+        total = errors = 0
+        bucket_seconds = self.bucket_seconds
+        for timestamp, error in outcomes:
+            count += 1
+            bucket = int(timestamp // bucket_seconds)
+            if bucket != current:
+                if total:
+                    self.record_counts(total, errors, current * bucket_seconds)
+                current, total, errors = bucket, 0, 0
+            total += 1
+            if error:
+                errors += 1
+        if total:
+            self.record_counts(total, errors, current * bucket_seconds)
+        return count
+
+    def _sums(self, window_seconds: Optional[int], now: Optional[float]) -> Tuple[int, int]:
+        """Running (total, errors) of a tracked window as of now."""
+        self._advance(self._bucket(now))
+        length = self._span if window_seconds is None else window_seconds // self.bucket_seconds
+        if length not in self._windows:
+            raise ValueError(f"Window {window_seconds}s is not tracked")
+        total, errors = self._windows[length]
+        return total, errors
+
+    def window_totals(self, window_seconds: Optional[int] = None, now: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Total and failed requests in a tracked window.
+        
+        Args:
+            window_seconds: Window length (default: the SLO window)
+            now: Unix time to evaluate at (default: now)
+            
+        Returns:
+            Tuple of (total_requests, error_requests)
+        """
+        return self._sums(window_seconds, now)
+
+    def remaining_budget(self, now: Optional[float] = None) -> Dict:
+        """
+        Remaining error budget over the SLO window.
+        
+        Returns:
+            Same dictionary as calculate_remaining_budget
+        """
+        total, errors = self._sums(None, now)
+        return self.calculate_remaining_budget(total, errors)
+
+    def burn_rate(self, window_seconds: Optional[int] = None, now: Optional[float] = None) -> float:
+        """
+        Burn rate over a tracked window: its error ratio relative to the budget.
+        
+        A burn rate of 1 consumes exactly the whole budget over the SLO window.
+        
+        Args:
+            window_seconds: Window length (default: the shortest burn window,
+                or the SLO window if there is none)
+            now: Unix time to evaluate at (default: now)
+        """
+        if window_seconds is None:
+            window_seconds = min(self._windows) * self.bucket_seconds
+        total, errors = self._sums(window_seconds, now)
+        if total <= 0:
+            return 0.0
+        error_budget = self.calculate_error_budget()
+        if error_budget <= 0:
+            return float("inf") if errors > 0 else 0.0
+        return (errors / total) / error_budget
+
+    def time_to_exhaustion(self, window_seconds: Optional[int] = None, now: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds until the remaining budget runs out at the current burn rate.
+        
+        Args:
+            window_seconds: Window whose burn rate is extrapolated
+                (default: as in burn_rate)
+            now: Unix time to evaluate at (default: now)
+            
+        Returns:
+            Seconds (0 if already exhausted), or None if the budget is not burning
+        """
+        status = self.remaining_budget(now)
+        if status["remaining"] <= 0 and status["consumed"] > 0:
+            return 0.0
+        rate = self.burn_rate(window_seconds, now)
+        if rate <= 0:
+            return None
+        return status["remaining_percentage"] / 100 * self.window_seconds / rate
+
+    def status(self, now: Optional[float] = None) -> Dict:
+        """
+        Budget status plus burn rates and time to exhaustion.
+        
+        Returns:
+            calculate_remaining_budget's dictionary, plus:
+            - total_requests / error_requests: SLO window totals
+            - burn_rates: Burn rate per burn window label (e.g. '1h')
+            - time_to_exhaustion_seconds: At the shortest window's burn rate
+        """
+        total, errors = self._sums(None, now)
+        status = self.calculate_remaining_budget(total, errors)
+        status["total_requests"] = total
+        status["error_requests"] = errors
+        status["burn_rates"] = {
+            label: self.burn_rate(length * self.bucket_seconds, now)
+            for label, length in self.burn_windows.items()
+        }
+        status["time_to_exhaustion_seconds"] = self.time_to_exhaustion(now=now)
+        return status
+
+
+def replay(args) -> int:
+    """
+    Replay a request log into budget time series (the --replay mode).
+    
+    Args:
+        args: Parsed CLI arguments
+        
+    Returns:
+        Exit code
+    """
+    # Imported here: request_log_replay builds on this module
+    from request_log_replay import LogFields, aggregate_log, budget_series, series_points, write_series
+    
+    windows = args.windows or [args.window_days]
+    try:
+        # Validates the bucket size against every window before reading the log
+        for window_days in windows:
+            StreamingErrorBudget(args.slo_target, window_days, args.bucket_seconds, burn_windows=(args.bucket_seconds,))
+    except ValueError:
+        print(f"❌ Error: --bucket-seconds must divide a day (got {args.bucket_seconds})")
+        return 1
+    
+    fields = LogFields(
+        time=args.time_field,
+        service=args.service_field,
+        status=args.status_field,
+        error=args.error_field
+    )
+    log_format = None if args.format == "auto" else args.format
+    started = time.perf_counter()
+    try:
+        buckets, stats = aggregate_log(args.replay, args.bucket_seconds, fields, log_format, args.workers)
+    except (OSError, EOFError) as e:
+        # EOFError: truncated gzip file
+        print(f"❌ Error: cannot read {args.replay}: {e}")
+        return 1
+    
+    max_points = args.max_points or None
+    count = series_points(buckets, windows)
+    if max_points is not None and count > max_points:
+        print(
+            f"❌ Error: the series would have {count:,} points (--max-points {max_points:,}); "
+            f"use a larger --bucket-seconds or check the log's time range"
+        )
+        return 1
+    
+    points = budget_series(buckets, args.slo_target, windows, args.bucket_seconds, max_points)
+    if args.output:
+        with open(args.output, "w", newline="") as out:
+            written = write_series(points, out, args.output_format)
+    else:
+        written = write_series(points, sys.stdout, args.output_format)
+    
+    print(
+        f"Replayed {stats.records:,} requests ({stats.skipped:,} skipped) "
+        f"for {len(stats.services)} services in {time.perf_counter() - started:.1f}s: "
+        f"{written:,} points",
+        file=sys.stderr
+    )
+    return 0
+
+
 def main():
     """CLI entry point for error budget calculator."""
     parser = argparse.ArgumentParser(
@@ -168,6 +505,9 @@ Examples:
   
   # Custom window
   python error_budget.py --slo-target 0.9999 --window-days 7 --total-requests 500000 --error-requests 10
+  
+  # Replay a (gzip) request log into hourly budget series for 7 and 30-day windows
+  python error_budget.py --slo-target 0.9995 --replay access.ndjson.gz --windows 7 30 --output budget.ndjson
         """
     )
     
@@ -203,6 +543,83 @@ Examples:
         help="Interactive mode to input values"
     )
     
+    replay_group = parser.add_argument_group("replay mode")
+    
+    replay_group.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="Replay a request log (NDJSON or CSV, optionally gzip) into budget time series"
+    )
+    
+    replay_group.add_argument(
+        "--format",
+        choices=["auto", "ndjson", "csv"],
+        default="auto",
+        help="Log format (default: auto, from the file name)"
+    )
+    
+    replay_group.add_argument(
+        "--windows",
+        type=int,
+        nargs="+",
+        help="SLO windows in days, one series each (default: --window-days)"
+    )
+    
+    replay_group.add_argument(
+        "--bucket-seconds",
+        type=int,
+        default=3600,
+        help="Time series step in seconds; must divide a day (default: 3600)"
+    )
+    
+    replay_group.add_argument(
+        "--workers",
+        type=int,
+        help="Parser processes (default: CPU count)"
+    )
+    
+    replay_group.add_argument(
+        "--max-points",
+        type=int,
+        default=1_000_000,
+        help="Refuse to emit more points than this; 0 for no limit (default: 1000000)"
+    )
+    
+    replay_group.add_argument(
+        "--output",
+        help="Output file (default: stdout)"
+    )
+    
+    replay_group.add_argument(
+        "--output-format",
+        choices=["ndjson", "csv"],
+        default="ndjson",
+        help="Output format (default: ndjson)"
+    )
+    
+    replay_group.add_argument(
+        "--time-field",
+        default="timestamp",
+        help="Record field with the Unix (s, ms, us or ns) or ISO 8601 time (default: timestamp)"
+    )
+    
+    replay_group.add_argument(
+        "--service-field",
+        default="service",
+        help="Record field with the service name (default: service)"
+    )
+    
+    replay_group.add_argument(
+        "--status-field",
+        default="status",
+        help="Record field with the HTTP status; 5xx are errors (default: status)"
+    )
+    
+    replay_group.add_argument(
+        "--error-field",
+        help="Boolean record field marking errors, instead of --status-field"
+    )
+    
     args = parser.parse_args()
     
     # Validate SLO target
@@ -210,6 +627,9 @@ Examples:
         print("❌ Error: SLO target must be between 0 and 1 (e.g., 0.9995 for 99.95%%)")
         return 1
     
+    if args.replay:
+        return replay(args)
+    
     # Interactive mode
     if args.interactive:
         try:
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Fleet-wide Error Budget Calculation
+
+Vectorized ErrorBudget.calculate_remaining_budget for many SLOs at once,
+with NumPy: targets, windows, totals and errors are arrays (scalars are
+broadcast), and every output is an array with one entry per SLO. Results
+match the scalar calculator exactly, including the truncation of the
+budget to whole requests and the status thresholds.
+
+Statuses are returned as small integer codes; STATUS_NAMES maps them back
+to the names used by ErrorBudget.
+
+Usage:
+    from error_budget_batch import calculate_budgets
+
+    batch = calculate_budgets(
+        slo_targets=[0.999, 0.9995, 0.9999],
+        window_days=30,
+        total_requests=[1_000_000, 2_500_000, 800_000],
+        error_requests=[400, 2000, 10],
+    )
+    print(batch.remaining, batch.status_names())
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+# Status code -> name, by increasing consumption
+STATUS_NAMES = ("healthy", "caution", "at_risk", "exhausted")
+
+# Consumed percentage at which each status after "healthy" starts
+# (same thresholds as ErrorBudget._get_budget_status)
+STATUS_THRESHOLDS = (50.0, 75.0, 100.0)
+
+
+@dataclass
+class BudgetBatch:
+    """Error budget status of many SLOs, one array entry per SLO."""
+    slo_target: np.ndarray
+    window_days: np.ndarray
+    total_budget: np.ndarray  # Requests allowed to fail (int64)
+    consumed: np.ndarray  # Failed requests (int64)
+    remaining: np.ndarray  # total_budget - consumed (int64, negative when overspent)
+    remaining_percentage: np.ndarray
+    consumed_percentage: np.ndarray
+    status: np.ndarray  # Index into STATUS_NAMES (int8)
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    def status_names(self) -> List[str]:
+        """Status names, in SLO order."""
+        return [STATUS_NAMES[code] for code in self.status.tolist()]
+
+    def row(self, index: int) -> Dict:
+        """One SLO's status as the dictionary calculate_remaining_budget returns."""
+        return {
+            "total_budget": int(self.total_budget[index]),
+            "consumed": int(self.consumed[index]),
+            "remaining": int(self.remaining[index]),
+            "remaining_percentage": float(self.remaining_percentage[index]),
+            "consumed_percentage": float(self.consumed_percentage[index]),
+            "status": STATUS_NAMES[self.status[index]],
+        }
+
+
+def status_codes(consumed_percentage: np.ndarray) -> np.ndarray:
+    """Status code per SLO from its consumed budget percentage."""
+    return np.searchsorted(np.asarray(STATUS_THRESHOLDS), consumed_percentage, side="right").astype(np.int8)
+
+
+def calculate_budgets(
+    slo_targets,
+    total_requests,
+    error_requests,
+    window_days=30
+) -> BudgetBatch:
+    """
+    Calculate the remaining error budget of many SLOs.
+
+    Every argument is an array-like or a scalar; they are broadcast to a
+    common length. As in ErrorBudget, the window only labels the result:
+    totals and errors are the counts observed over each SLO's window.
+
+    Args:
+        slo_targets: SLO targets as decimals (e.g., 0.9995 for 99.95%)
+        total_requests: Total requests per SLO
+        error_requests: Failed requests per SLO
+        window_days: Evaluation window per SLO, in days (default: 30)
+
+    Returns:
+        BudgetBatch with one entry per SLO
+
+    Raises:
+        ValueError: If a target is outside (0, 1] or the arrays do not broadcast
+    """
+    targets, windows, totals, errors = np.broadcast_arrays(
+        np.asarray(slo_targets, dtype=np.float64),
+        np.asarray(window_days, dtype=np.int64),
+        np.asarray(total_requests, dtype=np.int64),
+        np.asarray(error_requests, dtype=np.int64),
+    )
+    if targets.ndim != 1:
+        targets, windows, totals, errors = (array.reshape(-1) for array in (targets, windows, totals, errors))
+    if not np.all((targets > 0) & (targets <= 1)):
+        raise ValueError("SLO targets must be between 0 and 1 (e.g., 0.9995 for 99.95%)")
+
+    # int(total * (1 - target)) in the scalar calculator
+    total_budget = np.trunc(totals * (1.0 - targets)).astype(np.int64)
+    remaining = total_budget - errors
+
+    has_budget = total_budget > 0
+    divisor = np.where(has_budget, total_budget, 1)
+    remaining_pct = np.where(has_budget, remaining / divisor * 100, 0.0)
+    consumed_pct = np.where(has_budget, errors / divisor * 100, 0.0)
+
+    return BudgetBatch(
+        slo_target=targets.copy(),
+        window_days=windows.copy(),
+        total_budget=total_budget,
+        consumed=errors.copy(),
+        remaining=remaining,
+        remaining_percentage=remaining_pct,
+        consumed_percentage=consumed_pct,
+        status=status_codes(consumed_pct),
+    )
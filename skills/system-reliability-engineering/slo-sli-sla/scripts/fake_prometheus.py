@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Fake Prometheus Server
+
+Minimal stand-in for the Prometheus HTTP API, for benchmarks and local
+runs of the SLO API without a real Prometheus:
+- /api/v1/query and /api/v1/query_range answer any PromQL expression with
+  synthetic, deterministic samples (availability-like ratios near 0.999)
+- Queries planned by slo_queries.py (label_replace(..., "slo_series", ...))
+  are answered per service and series instead: request rates (rate) or
+  counts (increase) of total, good (status!~"5..") and error (status=~"5..")
+  requests of a synthetic service with diurnal traffic
+- `group by (service) (...)` lists the fake's services (service discovery)
+- Configurable response latency, to model a loaded Prometheus
+- HTTP/1.1 keep-alive, and counters for requests and opened connections
+  (also served as JSON on /fake/stats, for a server in another process)
+
+Uses only the standard library (threaded http.server).
+
+Usage:
+    from fake_prometheus import FakePrometheus
+
+    with FakePrometheus(latency=0.05) as prometheus:
+        client = PrometheusClient(prometheus.url)
+        ...
+        print(prometheus.requests, prometheus.connections)
+
+    # CLI: serve on a fixed port
+    python fake_prometheus.py --port 9090 --latency 0.05
+"""
+
+import argparse
+import json
+import math
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def synthetic_value(query: str, timestamp: float) -> float:
+    """Deterministic availability-like value for a query at a timestamp."""
+    # Mostly 0.999, with an hourly dip so aggregations have something to do
+    phase = (timestamp // 3600 + zlib.crc32(query.encode()) % 24) % 24
+    return 0.999 - (0.004 if phase == 0 else 0.0) + 0.0005 * math.sin(timestamp / 7200)
+
+
+def synthetic_rates(service: str, timestamp: float) -> "tuple[float, float]":
+    """Deterministic (total, error) request rates per second of a service at a timestamp."""
+    seed = zlib.crc32(service.encode())
+    # Diurnal traffic between base and 3x base, phase-shifted per service
+    base = 20.0 + seed % 80
+    total = base * (2.0 + math.sin(2 * math.pi * timestamp / 86400 + seed % 24))
+    return total, total * (1.0 - synthetic_value(service, timestamp))
+
+
+# One labelled series of a planned query, and the matchers inside it
+_PLANNED_SERIES = re.compile(
+    r'label_replace\((?P<expr>.+?),\s*"slo_series",\s*"(?P<name>\w+)",\s*"",\s*""\)', re.S
+)
+_SERVICE_MATCHER = re.compile(r'service(?P<op>=~?)"(?P<value>(?:[^"\\]|\\.)*)"')
+_RANGE_SELECTOR = re.compile(r'\[(?P<range>\w+)\]')
+
+
+def _planned_services(expr: str, all_services: List[str]) -> List[str]:
+    match = _SERVICE_MATCHER.search(expr)
+    if match is None:
+        return all_services
+    # Undo string literal escapes, then (for =~) regex escapes
+    value = re.sub(r"\\(.)", r"\1", match["value"])
+    if match["op"] == "=":
+        return [value]
+    return [re.sub(r"\\(.)", r"\1", part) for part in re.split(r"(?<!\\)\|", value)]
+
+
+def planned_series(query: str, timestamps: List[float], all_services: List[str] = ()) -> Optional[List[Dict]]:
+    """
+    Synthetic samples for a query planned by slo_queries.py.
+
+    A query without a service matcher covers all_services.
+
+    Returns:
+        One {"metric", "values"} entry per (service, series name), or None
+        if the query is not a planned one
+    """
+    parts = list(_PLANNED_SERIES.finditer(query))
+    if not parts:
+        return None
+
+    result = []
+    for part in parts:
+        expr = part["expr"]
+        window = _RANGE_SELECTOR.search(expr)
+        # increase() over a range is the rate times the range; rate() is per second
+        scale = parse_step(window["range"]) if window and "increase(" in expr else 1.0
+        for service in _planned_services(expr, list(all_services)):
+            values = []
+            for timestamp in timestamps:
+                total, errors = synthetic_rates(service, timestamp)
+                if 'status=~"5.."' in expr:
+                    value = errors
+                elif 'status!~"5.."' in expr:
+                    value = total - errors
+                else:
+                    value = total
+                values.append([timestamp, repr(value * scale)])
+            if values:
+                result.append({"metric": {"service": service, "slo_series": part["name"]}, "values": values})
+    return result
+
+
+def parse_step(step: str) -> float:
+    """Parse a Prometheus step ("1h", "5m", "30s" or plain seconds) into seconds."""
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "y": 31536000}
+    for suffix in sorted(units, key=len, reverse=True):
+        if step.endswith(suffix) and step[:-len(suffix)].replace(".", "", 1).isdigit():
+            return float(step[:-len(suffix)]) * units[suffix]
+    return float(step)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for a whole connection pool connecting at once (default backlog: 5)
+    request_queue_size = 128
+
+
+class FakePrometheus:
+    """Threaded fake Prometheus HTTP API on localhost."""
+
+    def __init__(self, port: int = 0, latency: float = 0.0, services: int = 20):
+        """
+        Args:
+            port: Port to listen on (0 picks a free one)
+            latency: Seconds each request waits before answering
+            services: Services listed by discovery queries (service-0, service-1, ...)
+        """
+        self.latency = latency
+        self.services = [f"service-{i}" for i in range(services)]
+        self.requests = 0
+        self.connections = 0
+        self.queries: List[Dict[str, str]] = []
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL, as passed to PrometheusClient / SLOService."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; avoid delayed-ACK stalls
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                if url.path == "/fake/stats":
+                    self._send_json({"requests": fake.requests, "connections": fake.connections})
+                    return
+                with fake._lock:
+                    fake.requests += 1
+                    fake.queries.append({"path": url.path, **params})
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                if url.path == "/api/v1/query_range":
+                    body = fake.range_response(params)
+                elif url.path == "/api/v1/query":
+                    body = fake.instant_response(params)
+                else:
+                    self.send_error(404)
+                    return
+                self._send_json(body)
+
+            def _send_json(self, body):
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def range_response(self, params: Dict[str, str]) -> Dict:
+        """Matrix response with one sample per step between start and end."""
+        query = params.get("query", "")
+        start = float(params["start"])
+        end = float(params["end"])
+        step = parse_step(params.get("step", "60"))
+        first = math.ceil(start / step) * step
+        count = max(0, int((end - first) // step) + 1)
+        timestamps = [first + i * step for i in range(count)]
+        result = planned_series(query, timestamps, self.services)
+        if result is None:
+            values = [[timestamp, repr(synthetic_value(query, timestamp))] for timestamp in timestamps]
+            result = [{"metric": {}, "values": values}] if values else []
+        return {"status": "success", "data": {"resultType": "matrix", "result": result}}
+
+    def instant_response(self, params: Dict[str, str]) -> Dict:
+        """Vector response with one sample at the requested time."""
+        query = params.get("query", "")
+        timestamp = float(params.get("time", time.time()))
+        planned = planned_series(query, [timestamp], self.services)
+        if query.startswith("group by (service)"):
+            result = [{"metric": {"service": service}, "value": [timestamp, "1"]} for service in self.services]
+        elif planned is None:
+            result = [{"metric": {}, "value": [timestamp, repr(synthetic_value(query, timestamp))]}]
+        else:
+            result = [{"metric": series["metric"], "value": series["values"][0]} for series in planned]
+        return {"status": "success", "data": {"resultType": "vector", "result": result}}
+
+    def start(self) -> "FakePrometheus":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakePrometheus":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    """CLI entry point for serving a fake Prometheus."""
+    parser = argparse.ArgumentParser(
+        description="Serve a fake Prometheus HTTP API with synthetic data",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=9090,
+        help="Port to listen on"
+    )
+
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds each request waits before answering"
+    )
+
+    parser.add_argument(
+        "--services",
+        type=int,
+        default=20,
+        help="Services listed by discovery queries"
+    )
+
+    args = parser.parse_args()
+
+    with FakePrometheus(port=args.port, latency=args.latency, services=args.services) as prometheus:
+        print(f"Fake Prometheus listening on {prometheus.url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
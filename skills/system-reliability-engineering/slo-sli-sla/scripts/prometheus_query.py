@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Async Prometheus Query Client
+
+Non-blocking client for the Prometheus HTTP API used by the SLO API:
+- One shared keep-alive connection pool (httpx.AsyncClient) per process
+- Bounded concurrency: at most max_concurrency queries in flight
+- Connect and total timeouts per attempt
+- Retries with exponential backoff and full jitter on transport errors,
+  429 and 502/503/504; other errors (e.g. an invalid query) fail at once
+
+Usage:
+    from prometheus_query import PrometheusClient, PrometheusError
+
+    client = PrometheusClient("http://prometheus:9090", max_concurrency=16)
+    series = await client.query_range(query, start, end, step="1h")
+    samples = await client.query(query)
+    await client.aclose()
+"""
+
+import asyncio
+import random
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+
+
+# Statuses worth retrying: Prometheus overloaded or a proxy in front of it failing
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class PrometheusError(Exception):
+    """Prometheus could not be reached or did not answer the query."""
+
+
+def parse_duration(value: Union[str, float]) -> float:
+    """Parse a Prometheus duration ("1h", "5m", "30s", "1d") or plain seconds into seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "y": 31536000}
+    for suffix in sorted(units, key=len, reverse=True):
+        number = value[:-len(suffix)]
+        if value.endswith(suffix) and number.replace(".", "", 1).isdigit():
+            return float(number) * units[suffix]
+    return float(value)
+
+
+def _timestamp(value: Union[datetime, float]) -> float:
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+class PrometheusClient:
+    """
+    Async Prometheus HTTP API client with a shared connection pool.
+
+    The underlying httpx.AsyncClient is created on first use and must be
+    used from a single event loop; call aclose() on shutdown.
+    """
+
+    def __init__(
+        self,
+        prometheus_url: str,
+        max_concurrency: int = 16,
+        timeout: float = 10.0,
+        connect_timeout: float = 2.0,
+        retries: int = 2,
+        backoff_base: float = 0.1,
+        backoff_max: float = 2.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        Initialize Prometheus client.
+
+        Args:
+            prometheus_url: URL of Prometheus instance
+            max_concurrency: Maximum queries in flight (and pooled connections)
+            timeout: Seconds allowed per attempt (connect, write, read, pool)
+            connect_timeout: Seconds allowed to open a connection
+            retries: Additional attempts after a retryable failure
+            backoff_base: First backoff ceiling in seconds (doubles per attempt)
+            backoff_max: Maximum backoff ceiling in seconds
+            transport: Custom httpx transport (e.g. httpx.MockTransport)
+        """
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self.prometheus_url = prometheus_url
+        self.api_url = f"{prometheus_url.rstrip('/')}/api/v1"
+        self.max_concurrency = max_concurrency
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared httpx client (created on first use)."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.api_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=30.0,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter backoff before retry number attempt (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _get(self, path: str, params: Dict[str, Any]) -> Any:
+        """GET an API path and return the "data" field of a successful response."""
+        last_error = ""
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                await asyncio.sleep(self._backoff(attempt - 1))
+            self.requests += 1
+            try:
+                async with self._semaphore:
+                    response = await self.client.get(path, params=params)
+            except httpx.TransportError as e:
+                last_error = f"{type(e).__name__}: {e}"
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                last_error = f"HTTP {response.status_code}"
+                continue
+
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            if response.status_code != 200 or body.get("status") != "success":
+                self.failures += 1
+                error = body.get("error") or f"HTTP {response.status_code}"
+                raise PrometheusError(f"Prometheus query failed: {error}")
+            return body["data"]
+
+        self.failures += 1
+        raise PrometheusError(f"Prometheus unavailable after {self.retries + 1} attempts: {last_error}")
+
+    async def query(self, query: str, time: Optional[Union[datetime, float]] = None) -> List[Dict]:
+        """
+        Run an instant query.
+
+        Args:
+            query: PromQL query
+            time: Evaluation time (default: now, as chosen by Prometheus)
+
+        Returns:
+            Result list (one {"metric", "value"} entry per series)
+
+        Raises:
+            PrometheusError: If the query fails after retries
+        """
+        params: Dict[str, Any] = {"query": query}
+        if time is not None:
+            params["time"] = _timestamp(time)
+        return (await self._get("/query", params))["result"]
+
+    async def query_range(
+        self,
+        query: str,
+        start: Union[datetime, float],
+        end: Union[datetime, float],
+        step: str = "1h"
+    ) -> List[Dict]:
+        """
+        Run a range query.
+
+        Args:
+            query: PromQL query
+            start: Start time
+            end: End time
+            step: Query resolution step width
+
+        Returns:
+            Result list (one {"metric", "values"} entry per series)
+
+        Raises:
+            PrometheusError: If the query fails after retries
+        """
+        params = {"query": query, "start": _timestamp(start), "end": _timestamp(end), "step": step}
+        return (await self._get("/query_range", params))["result"]
+
+    async def aclose(self):
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        # A later event loop (e.g. the next app lifespan) starts afresh
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def stats(self) -> Dict[str, int]:
+        """Return request counters (requests, retried, failures)."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "requests": self.requests,
+            "retried": self.retried,
+            "failures": self.failures,
+        }
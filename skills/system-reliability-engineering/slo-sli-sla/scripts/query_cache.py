@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Range Query Result Cache
+
+Caches Prometheus range query results for the SLO API, so dashboards that
+poll the same 30-day queries every few seconds do not re-run them:
+- Keys are the normalized query (whitespace collapsed) and the step;
+  start and end are aligned down to the step, so requests made within the
+  same step evaluate at the same timestamps and share results
+- A cached range is extended incrementally: when the window moves, only the
+  missing tail is fetched and merged. Requests of different windows
+  (7d, 30d, 90d) over the same query share an entry, so only samples older
+  than the longest window requested for it are dropped
+- Samples newer than settle_seconds may still change (late scrapes, rate()
+  windows that are not complete yet); they are served but fetched again
+- Concurrent identical requests share one fetch (single flight)
+- Sample values are parsed to floats once, when fetched; a hit returns
+  floats where Prometheus returns strings (float() accepts both), so
+  repeated 30/90-day evaluations do not parse the same strings again
+
+Usage:
+    from query_cache import RangeQueryCache
+
+    cache = RangeQueryCache(client, max_entries=1000)
+    series = await cache.query_range(query, start, end, step="1h")
+"""
+
+import asyncio
+import math
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Hashable, List, Tuple, Union
+
+from prometheus_query import PrometheusClient, _timestamp, parse_duration
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace, so formatting differences share a cache entry."""
+    return " ".join(query.split())
+
+
+@dataclass
+class _Series:
+    metric: Dict[str, str]
+    timestamps: List[float] = field(default_factory=list)
+    values: List[float] = field(default_factory=list)
+
+
+@dataclass
+class _CachedRange:
+    """Samples of one query at one step, settled from start through end."""
+    start: float
+    end: float
+    span: float = 0.0  # Longest window (end - start) requested; kept when trimming
+    series: Dict[Tuple[Tuple[str, str], ...], _Series] = field(default_factory=dict)
+
+    def merge(self, result: List[Dict], after: float):
+        """Replace samples newer than `after` with the fetched ones."""
+        for series in self.series.values():
+            cut = bisect_right(series.timestamps, after)
+            del series.timestamps[cut:]
+            del series.values[cut:]
+        for item in result:
+            key = tuple(sorted(item["metric"].items()))
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = _Series(item["metric"])
+            for timestamp, value in item["values"]:
+                if timestamp > after:
+                    series.timestamps.append(float(timestamp))
+                    series.values.append(float(value))
+
+    def trim(self, start: float):
+        """Drop samples before start, and series left empty."""
+        # Concurrent fetches may trim out of order; never claim older data again
+        self.start = max(self.start, start)
+        for key, series in list(self.series.items()):
+            cut = bisect_left(series.timestamps, start)
+            del series.timestamps[:cut]
+            del series.values[:cut]
+            if not series.timestamps:
+                del self.series[key]
+
+    def slice(self, start: float, end: float) -> List[Dict]:
+        """Samples between start and end, in the Prometheus result format."""
+        result = []
+        for series in self.series.values():
+            lo = bisect_left(series.timestamps, start)
+            hi = bisect_right(series.timestamps, end)
+            if lo < hi:
+                result.append({
+                    "metric": series.metric,
+                    "values": [list(pair) for pair in zip(series.timestamps[lo:hi], series.values[lo:hi])],
+                })
+        return result
+
+
+class RangeQueryCache:
+    """
+    Step-aligned, incrementally extended cache of range query results.
+
+    Meant for one event loop (one API worker). Entries are evicted least
+    recently used first past max_entries.
+    """
+
+    def __init__(
+        self,
+        client: PrometheusClient,
+        max_entries: int = 1000,
+        settle_seconds: float = 300.0
+    ):
+        """
+        Initialize range query cache.
+
+        Args:
+            client: Prometheus client used for fetches
+            max_entries: Maximum cached (query, step) pairs
+            settle_seconds: Age after which a sample no longer changes
+                (scrape interval plus the longest rate() window is enough)
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.client = client
+        self.max_entries = max_entries
+        self.settle_seconds = settle_seconds
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, _CachedRange]" = OrderedDict()
+        # (key, start, end) -> future resolved by the request fetching it
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def query_range(
+        self,
+        query: str,
+        start: Union[datetime, float],
+        end: Union[datetime, float],
+        step: Union[str, float] = "1h"
+    ) -> List[Dict]:
+        """
+        Run a range query through the cache.
+
+        Start and end are aligned down to the step. Same arguments and
+        result format as PrometheusClient.query_range, except that sample
+        values are floats.
+
+        Raises:
+            PrometheusError: If a needed fetch fails
+        """
+        step_seconds = parse_duration(step)
+        start_ts = math.floor(_timestamp(start) / step_seconds) * step_seconds
+        end_ts = math.floor(_timestamp(end) / step_seconds) * step_seconds
+        key = (normalize_query(query), step_seconds)
+        flight = (key, start_ts, end_ts)
+
+        pending = self._inflight.get(flight)
+        if pending is not None:
+            self.coalesced += 1
+            # Shield so a cancelled waiter does not cancel the shared fetch
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight] = future
+        try:
+            result = await self._fetch(key, query, start_ts, end_ts, step)
+        except Exception as e:
+            # Waiters see the same error
+            future.set_exception(e)
+            # Retrieved here, so a future nobody waits on does not log a warning
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[flight]
+        future.set_result(result)
+        return result
+
+    async def _fetch(self, key: Hashable, query: str, start: float, end: float, step: Union[str, float]) -> List[Dict]:
+        step_seconds = key[1]
+        entry = self._entries.get(key)
+        if entry is not None and entry.start <= start and entry.end >= end:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry.slice(start, end)
+
+        if entry is not None and entry.start <= start <= entry.end + step_seconds:
+            # Window moved forward: fetch only what follows the settled part
+            self.partial_hits += 1
+            tail = await self.client.query_range(query, entry.end + step_seconds, end, step)
+            entry.merge(tail, entry.end)
+        else:
+            self.misses += 1
+            full = await self.client.query_range(query, start, end, step)
+            span = entry.span if entry is not None else 0.0
+            entry = _CachedRange(start, start - step_seconds, span)
+            entry.merge(full, entry.end)
+
+        settled = math.floor((time.time() - self.settle_seconds) / step_seconds) * step_seconds
+        entry.end = max(entry.end, min(end, settled))
+        # Trim by the longest window served, not this one: a 7d request must
+        # not drop the samples the next 30d request for the same query needs
+        entry.span = max(entry.span, end - start)
+        entry.trim(end - entry.span)
+        self._store(key, entry)
+        return entry.slice(start, end)
+
+    def _store(self, key: Hashable, entry: _CachedRange):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Remove all entries."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters (entries, hits, partial hits, misses, coalesced)."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
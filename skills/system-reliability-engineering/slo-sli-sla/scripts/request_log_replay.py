@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Request Log Replay for Error Budgets
+
+Replays historical request records (NDJSON or CSV access logs, plain or
+gzip-compressed) into per-service error budget time series:
+- The file is read in blocks of whole lines (a few MB each) and parsed by
+  a pool of worker processes; at most a few blocks are in flight, so
+  memory does not grow with the size of the log
+- Each worker counts requests and errors per (service, time bucket);
+  the partial counts are merged in the main process, so what is kept is
+  bounded by services x buckets, not by the number of requests
+- The merged buckets are replayed in time order through
+  StreamingErrorBudget, one per service and SLO window, emitting the
+  budget status at the end of every bucket
+
+A record needs a timestamp (Unix seconds, milliseconds, microseconds or
+nanoseconds, or ISO 8601), a service and an outcome: an HTTP status (5xx
+are errors, as in the Prometheus queries) or a boolean error field. The
+unit of a numeric timestamp is told by its magnitude. Records without a
+valid timestamp, or with one outside 2000-2100, are skipped and counted.
+CSV files need a header row and one record per line.
+
+Usage:
+    python error_budget.py --slo-target 0.9995 --replay access.log.gz --windows 7 30
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from error_budget import StreamingErrorBudget
+
+# Service -> bucket index -> [total, errors]
+ServiceBuckets = Dict[str, Dict[int, List[int]]]
+
+CHUNK_BYTES = 4 * 1024 * 1024
+# Accepted timestamps: 2000-01-01 to 2100-01-01 UTC. The ranges of the
+# numeric units do not overlap, so the unit follows from the magnitude.
+MIN_TIMESTAMP = 946684800.0
+MAX_TIMESTAMP = 4102444800.0
+TIMESTAMP_SCALES = (1.0, 1e3, 1e6, 1e9)  # s, ms, us, ns
+# Default limit on the points budget_series may emit
+MAX_SERIES_POINTS = 1_000_000
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+
+
+@dataclass(frozen=True)
+class LogFields:
+    """Names of the record fields used by the replay."""
+    time: str = "timestamp"
+    service: str = "service"
+    status: str = "status"
+    error: Optional[str] = None  # Boolean error field; overrides status when set
+    default_service: str = "unknown"
+
+
+@dataclass
+class ReplayStats:
+    """Counters of one replay."""
+    records: int = 0
+    skipped: int = 0
+    chunks: int = 0
+    services: List[str] = field(default_factory=list)
+
+
+def open_log(path: str) -> io.BufferedIOBase:
+    """Open a log file for binary reading, decompressing gzip transparently."""
+    with open(path, "rb") as probe:
+        compressed = probe.read(2) == b"\x1f\x8b"
+    return gzip.open(path, "rb") if compressed else open(path, "rb")
+
+
+def detect_format(path: str) -> str:
+    """'csv' for .csv / .csv.gz files, 'ndjson' otherwise."""
+    name = path[:-3] if path.endswith(".gz") else path
+    return "csv" if name.endswith(".csv") else "ndjson"
+
+
+def read_chunks(stream: io.BufferedIOBase, chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    """Yield blocks of about chunk_bytes that end at a line boundary."""
+    pending = b""
+    while True:
+        block = stream.read(chunk_bytes)
+        if not block:
+            break
+        block = pending + block
+        cut = block.rfind(b"\n")
+        if cut < 0:
+            pending = block
+            continue
+        pending = block[cut + 1:]
+        yield block[:cut + 1]
+    if pending:
+        yield pending
+
+
+def _epoch_seconds(value: float) -> Optional[float]:
+    """Seconds from a number of s, ms, us or ns; None outside the accepted range."""
+    for scale in TIMESTAMP_SCALES:
+        seconds = value / scale
+        if seconds <= MAX_TIMESTAMP:
+            return seconds if seconds >= MIN_TIMESTAMP else None
+    return None
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """
+    Unix seconds from a number, a numeric string or an ISO 8601 string (naive = UTC).
+
+    Numbers may be in seconds, milliseconds, microseconds or nanoseconds.
+    Returns None for values that do not parse or fall outside 2000-2100.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return _epoch_seconds(float(value))
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return _epoch_seconds(float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return _epoch_seconds(parsed.timestamp())
+
+
+def _is_error(record: Dict, fields: LogFields) -> bool:
+    if fields.error is not None:
+        value = record.get(fields.error)
+        if isinstance(value, str):
+            return value.strip().lower() in TRUE_VALUES
+        return bool(value)
+    try:
+        return int(record.get(fields.status)) >= 500
+    except (TypeError, ValueError):
+        return False
+
+
+def _records(chunk: bytes, log_format: str, header: Optional[List[str]]) -> Iterator[Optional[Dict]]:
+    """Records of a chunk; None for lines that cannot be parsed."""
+    text = chunk.decode("utf-8", errors="replace")
+    if log_format == "csv":
+        yield from csv.DictReader(io.StringIO(text), fieldnames=header)
+        return
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield record if isinstance(record, dict) else None
+
+
+def aggregate_chunk(
+    chunk: bytes,
+    log_format: str,
+    header: Optional[List[str]],
+    fields: LogFields,
+    bucket_seconds: int
+) -> Tuple[ServiceBuckets, int, int]:
+    """
+    Count requests and errors per service and bucket in one chunk (runs in a worker).
+
+    Returns:
+        Tuple of (buckets, records counted, records skipped)
+    """
+    buckets: ServiceBuckets = {}
+    counted = skipped = 0
+    for record in _records(chunk, log_format, header):
+        timestamp = parse_timestamp(record.get(fields.time)) if record else None
+        if timestamp is None:
+            skipped += 1
+            continue
+        service = record.get(fields.service) or fields.default_service
+        counts = buckets.setdefault(str(service), {}).setdefault(int(timestamp // bucket_seconds), [0, 0])
+        counts[0] += 1
+        if _is_error(record, fields):
+            counts[1] += 1
+        counted += 1
+    return buckets, counted, skipped
+
+
+def _merge(into: ServiceBuckets, partial: ServiceBuckets):
+    for service, buckets in partial.items():
+        target = into.setdefault(service, {})
+        for bucket, (total, errors) in buckets.items():
+            counts = target.get(bucket)
+            if counts is None:
+                target[bucket] = [total, errors]
+            else:
+                counts[0] += total
+                counts[1] += errors
+
+
+def aggregate_log(
+    path: str,
+    bucket_seconds: int,
+    fields: LogFields = LogFields(),
+    log_format: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_bytes: int = CHUNK_BYTES
+) -> Tuple[ServiceBuckets, ReplayStats]:
+    """
+    Count requests and errors per service and time bucket over a whole log.
+
+    Args:
+        path: NDJSON or CSV file, optionally gzip-compressed
+        bucket_seconds: Bucket size in seconds
+        fields: Record field names
+        log_format: 'ndjson' or 'csv' (default: from the file name)
+        workers: Worker processes (default: CPU count)
+        chunk_bytes: Approximate size of the blocks handed to workers
+
+    Returns:
+        Tuple of (service -> bucket -> [total, errors], ReplayStats)
+    """
+    log_format = log_format or detect_format(path)
+    workers = workers or os.cpu_count() or 1
+    stats = ReplayStats()
+    merged: ServiceBuckets = {}
+
+    with open_log(path) as stream, ProcessPoolExecutor(max_workers=workers) as pool:
+        header = None
+        if log_format == "csv":
+            first = stream.readline().decode("utf-8", errors="replace")
+            header = next(csv.reader([first]), [])
+
+        pending = []
+        for chunk in read_chunks(stream, chunk_bytes):
+            pending.append(pool.submit(aggregate_chunk, chunk, log_format, header, fields, bucket_seconds))
+            stats.chunks += 1
+            # Bound the blocks in flight; merge results in submission order
+            while len(pending) >= workers * 2:
+                buckets, counted, skipped = pending.pop(0).result()
+                _merge(merged, buckets)
+                stats.records += counted
+                stats.skipped += skipped
+        for future in pending:
+            buckets, counted, skipped = future.result()
+            _merge(merged, buckets)
+            stats.records += counted
+            stats.skipped += skipped
+
+    stats.services = sorted(merged)
+    return merged, stats
+
+
+def series_points(buckets: ServiceBuckets, windows: Sequence[int]) -> int:
+    """Number of points budget_series emits for these buckets and windows."""
+    last = max((max(series) for series in buckets.values() if series), default=None)
+    if last is None:
+        return 0
+    return sum(last + 1 - min(series) for series in buckets.values() if series) * len(windows)
+
+
+def budget_series(
+    buckets: ServiceBuckets,
+    slo_target: float,
+    windows: Sequence[int],
+    bucket_seconds: int,
+    max_points: Optional[int] = MAX_SERIES_POINTS
+) -> Iterator[Dict]:
+    """
+    Error budget status per service and window at the end of every bucket.
+
+    Each series runs from the service's first bucket to the last bucket of
+    the whole log, so every series ends at the same time.
+
+    Args:
+        buckets: Output of aggregate_log
+        slo_target: SLO target as decimal
+        windows: SLO windows in days
+        bucket_seconds: Bucket size used by aggregate_log
+        max_points: Largest number of points to emit (None for no limit)
+
+    Yields:
+        Points with service, window_days, timestamp (bucket end, ISO 8601),
+        the window totals, calculate_remaining_budget's fields and the
+        burn rate of the bucket
+
+    Raises:
+        ValueError: If the series would have more than max_points points
+            (checked before the first point is emitted)
+    """
+    points = series_points(buckets, windows)
+    if max_points is not None and points > max_points:
+        raise ValueError(
+            f"The series would have {points:,} points (limit: {max_points:,}); "
+            f"use larger buckets or check the log's time range"
+        )
+    if not points:
+        return
+    last = max(max(series) for series in buckets.values() if series)
+    for service in sorted(buckets):
+        series = buckets[service]
+        for window_days in windows:
+            budget = StreamingErrorBudget(
+                slo_target, window_days, bucket_seconds, burn_windows=(bucket_seconds,)
+            )
+            for bucket in range(min(series), last + 1):
+                start = bucket * bucket_seconds
+                counts = series.get(bucket)
+                if counts:
+                    budget.record_counts(counts[0], counts[1], start)
+                status = budget.status(now=start)
+                yield {
+                    "service": service,
+                    "window_days": window_days,
+                    "timestamp": datetime.fromtimestamp(start + bucket_seconds, timezone.utc).isoformat(),
+                    "total_requests": status["total_requests"],
+                    "error_requests": status["error_requests"],
+                    "total_budget": status["total_budget"],
+                    "remaining": status["remaining"],
+                    "consumed_percentage": round(status["consumed_percentage"], 4),
+                    "remaining_percentage": round(status["remaining_percentage"], 4),
+                    "status": status["status"],
+                    "burn_rate": round(budget.burn_rate(bucket_seconds, start), 4),
+                }
+
+
+def write_series(points: Iterator[Dict], out: TextIO, output_format: str = "ndjson") -> int:
+    """
+    Write points as NDJSON or CSV as they are produced.
+
+    Returns:
+        Number of points written
+    """
+    written = 0
+    writer = None
+    for point in points:
+        if output_format == "csv":
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(point))
+                writer.writeheader()
+            writer.writerow(point)
+        else:
+            out.write(json.dumps(point) + "\n")
+        written += 1
+    return written
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+SLO Aggregation Engine
+
+Request-weighted availability from per-step request counts, with NumPy:
+- Every step contributes in proportion to its traffic: availability is
+  sum(good) / sum(total) over the window, not the mean of per-step ratios
+  (which lets a quiet night hour weigh as much as the peak hour)
+- Several series with the same name (e.g. one per instance or status
+  class) are summed per step on a common timestamp grid
+- Gaps: a step with no total sample carries no data and is skipped; a step
+  with traffic but no errors sample counts as error-free (5xx series
+  usually do not exist until the first 5xx). NaN samples are gaps.
+- Error counts are clipped to [0, total] (increase() extrapolation and
+  counter resets can push them slightly outside)
+
+Usage:
+    from slo_aggregation import aggregate_counts, evaluate_slo
+
+    counts = aggregate_counts({"errors": [(timestamps, values)], "total": [(timestamps, values)]})
+    print(counts.availability())
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Series name ("errors", "total") -> [(timestamps, values)], both float64 arrays
+SLOSeries = Dict[str, List[Tuple[np.ndarray, np.ndarray]]]
+
+
+@dataclass
+class StepCounts:
+    """Error and total request counts per step, for steps with data."""
+    timestamps: np.ndarray
+    errors: np.ndarray
+    total: np.ndarray
+
+    @property
+    def good(self) -> np.ndarray:
+        return self.total - self.errors
+
+    def availability(self) -> Optional[float]:
+        """Request-weighted availability, or None without traffic."""
+        requests = float(self.total.sum())
+        if requests <= 0:
+            return None
+        return 1.0 - float(self.errors.sum()) / requests
+
+
+def _sum_on_grid(grid: np.ndarray, series: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum series onto grid; return (sums, mask of steps with at least one sample)."""
+    sums = np.zeros(len(grid))
+    present = np.zeros(len(grid), dtype=bool)
+    for timestamps, values in series:
+        valid = ~np.isnan(values)
+        index = np.searchsorted(grid, timestamps[valid])
+        # Timestamps are unique within a series, so plain fancy-index adds are safe
+        sums[index] += values[valid]
+        present[index] = True
+    return sums, present
+
+
+def aggregate_counts(series: SLOSeries) -> StepCounts:
+    """
+    Align errors and total count series on one grid and keep steps with traffic.
+
+    Args:
+        series: {"errors": [...], "total": [...]} per-step counts
+    """
+    total_series = series.get("total", [])
+    error_series = series.get("errors", [])
+    if not total_series:
+        empty = np.empty(0)
+        return StepCounts(empty, empty, empty)
+
+    all_series = total_series + error_series
+    first = all_series[0][0]
+    if all(np.array_equal(timestamps, first) for timestamps, _ in all_series[1:]):
+        # Usual case: every series has a sample at every step of the range
+        grid = first
+    else:
+        grid = np.unique(np.concatenate([timestamps for timestamps, _ in all_series]))
+    total, has_total = _sum_on_grid(grid, total_series)
+    errors, _ = _sum_on_grid(grid, error_series)
+
+    steps = has_total & (total > 0)
+    total = total[steps]
+    errors = np.clip(errors[steps], 0.0, total)
+    return StepCounts(grid[steps], errors, total)
+
+
+@dataclass
+class SLOEvaluation:
+    """Figures derived from one service's per-step counts."""
+    availability: float  # Request-weighted over the window
+    error_ratio: float  # Of the most recent step with traffic
+    burn_rate: float  # Daily share of the window's error budget, at error_ratio
+    steps: int  # Steps with traffic in the window
+    good: float  # Requests in the window
+    total: float
+
+
+def burn_rate_for(error_ratio: float, slo_target: float, window_days: int) -> float:
+    """Daily burn rate: share of the window's error budget consumed per day at error_ratio."""
+    error_budget = 1.0 - slo_target
+    if error_budget <= 0:
+        return math.inf if error_ratio > 0 else 0.0
+    return error_ratio / error_budget / window_days
+
+
+def evaluate_counts(counts: StepCounts, slo_target: float, window_days: int) -> Optional[SLOEvaluation]:
+    """
+    Availability, latest error ratio and burn rate from aligned step counts.
+
+    Returns:
+        SLOEvaluation, or None if the window has no traffic at all
+    """
+    availability = counts.availability()
+    if availability is None:
+        return None
+    error_ratio = float(counts.errors[-1] / counts.total[-1])
+    total = float(counts.total.sum())
+    return SLOEvaluation(
+        availability=availability,
+        error_ratio=error_ratio,
+        burn_rate=burn_rate_for(error_ratio, slo_target, window_days),
+        steps=len(counts.total),
+        good=total - float(counts.errors.sum()),
+        total=total,
+    )
+
+
+def evaluate_slo(series: SLOSeries, slo_target: float, window_days: int) -> Optional[SLOEvaluation]:
+    """
+    Evaluate a service's SLO from its errors/total count series.
+
+    Returns:
+        SLOEvaluation, or None if the window has no traffic at all
+    """
+    return evaluate_counts(aggregate_counts(series), slo_target, window_days)
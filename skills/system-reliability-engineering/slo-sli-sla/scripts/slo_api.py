@@ -5,29 +5,111 @@ SLO API Service
 FastAPI service for querying SLO compliance and error budget status
 from Prometheus metrics.
 
+Prometheus is queried through an async client (prometheus_query.py) with a
+shared keep-alive connection pool, bounded concurrency, timeouts and
+retries with jitter, so slow queries never block the event loop. Range
+query results are cached with step-aligned keys and extended incrementally
+(query_cache.py). Availability, error ratio and burn rate of an evaluation
+all come from one planned range query of per-step request counts
+(slo_queries.py), aggregated request-weighted with NumPy (slo_aggregation.py).
+With ROLLUP_DB set, windows are answered from hourly/daily rollups kept by
+a background job (slo_rollups.py), plus a live query for the hours since
+the last rollup. With BURN_RATE_ALERTS=1, a background evaluator keeps
+multiwindow burn-rate alert decisions for the fleet (burn_rate_alerts.py).
+/slo/stream pushes live error budget status as server-sent events; one
+background evaluator refreshes each watched status and fans it out to all
+its subscribers (slo_stream.py).
+
 Usage:
     uvicorn slo_api:app --host 0.0.0.0 --port 8000
     # Or with custom Prometheus URL:
     PROMETHEUS_URL=http://prometheus:9090 uvicorn slo_api:app --reload
 """
 
+import asyncio
+import json
+import logging
+import math
 import os
+import sys
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Optional
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-import requests
+
+sys.path.insert(0, str(Path(__file__).parent))
+from burn_rate_alerts import BurnRateAlertJob, BurnRateEvaluator, parse_targets
+from prometheus_query import PrometheusClient, PrometheusError
+from query_cache import RangeQueryCache
+from slo_aggregation import SLOEvaluation, SLOSeries, aggregate_counts, evaluate_slo
+from slo_queries import parse_slo_series, slo_series_query
+from slo_rollups import RollupJob, RollupStore, WindowTotals
+from slo_stream import SLOStatusHub, StatusEvent, StatusKey
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the rollup, alert and live status jobs; close the store and pooled Prometheus connections on shutdown."""
+    if rollup_job is not None:
+        rollup_job.start()
+    if alert_job is not None:
+        alert_job.start()
+    status_hub.start()
+    yield
+    await status_hub.stop()
+    if alert_job is not None:
+        await alert_job.stop()
+    if rollup_job is not None:
+        await rollup_job.stop()
+    if rollup_store is not None:
+        rollup_store.close()
+    await slo_service.client.aclose()
+
 
 app = FastAPI(
     title="SLO API Service",
     description="API for querying SLO compliance and error budget status",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configuration
 PROMETHEUS_URL = os.getenv("PROMETHEUS_URL", "http://localhost:9090")
-PROMETHEUS_API = f"{PROMETHEUS_URL}/api/v1"
+PROMETHEUS_MAX_CONCURRENCY = int(os.getenv("PROMETHEUS_MAX_CONCURRENCY", "16"))
+PROMETHEUS_TIMEOUT = float(os.getenv("PROMETHEUS_TIMEOUT", "10"))
+PROMETHEUS_RETRIES = int(os.getenv("PROMETHEUS_RETRIES", "2"))
+# Cached (query, step) pairs; 0 disables the range query cache
+QUERY_CACHE_ENTRIES = int(os.getenv("QUERY_CACHE_ENTRIES", "1000"))
+QUERY_CACHE_SETTLE_SECONDS = float(os.getenv("QUERY_CACHE_SETTLE_SECONDS", "300"))
+# Resolution of SLO evaluations: one request count sample per step
+EVALUATION_STEP = "1h"
+# Bulk evaluation: services per request, services per grouped query, grouped queries in flight
+BULK_MAX_SERVICES = int(os.getenv("BULK_MAX_SERVICES", "1000"))
+BULK_GROUP_SIZE = int(os.getenv("BULK_GROUP_SIZE", "50"))
+BULK_MAX_PARALLEL = int(os.getenv("BULK_MAX_PARALLEL", "4"))
+# Rollups: SQLite file ("" disables), whether this process runs the job,
+# and how far behind the rollups may be before falling back to live queries
+ROLLUP_DB = os.getenv("ROLLUP_DB", "")
+ROLLUP_JOB = os.getenv("ROLLUP_JOB", "1") == "1"
+ROLLUP_INTERVAL = float(os.getenv("ROLLUP_INTERVAL", "300"))
+ROLLUP_RETENTION_DAYS = int(os.getenv("ROLLUP_RETENTION_DAYS", "90"))
+ROLLUP_SERVICES = [s.strip() for s in os.getenv("ROLLUP_SERVICES", "").split(",") if s.strip()]
+ROLLUP_MAX_LAG_SECONDS = float(os.getenv("ROLLUP_MAX_LAG_SECONDS", "7200"))
+# Multiwindow burn-rate alerts: enabled, cycle interval, SLO targets ("service=target,...")
+BURN_RATE_ALERTS = os.getenv("BURN_RATE_ALERTS", "0") == "1"
+ALERT_INTERVAL = float(os.getenv("ALERT_INTERVAL", "60"))
+ALERT_DEFAULT_TARGET = float(os.getenv("ALERT_DEFAULT_TARGET", "0.9995"))
+ALERT_SLO_TARGETS = parse_targets(os.getenv("ALERT_SLO_TARGETS", ""))
+
+# Live status stream (/slo/stream)
+STREAM_INTERVAL = float(os.getenv("STREAM_INTERVAL", "60"))
+STREAM_KEEPALIVE = float(os.getenv("STREAM_KEEPALIVE", "15"))
 
 
 class SLOComplianceResponse(BaseModel):
@@ -48,6 +130,18 @@ class ErrorBudgetResponse(SLOComplianceResponse):
     status: str
 
 
+class BulkSLOItem(BaseModel):
+    """One service to evaluate in a bulk request."""
+    service: str = Field(..., min_length=1)
+    slo_target: float = Field(0.9995, ge=0, le=1)
+    window_days: int = Field(30, ge=1, le=365)
+
+
+class BulkSLORequest(BaseModel):
+    """Request model for bulk error budget evaluation."""
+    services: List[BulkSLOItem] = Field(..., min_length=1)
+
+
 class SLOService:
     """
     Service for querying SLO compliance from Prometheus.
@@ -60,17 +154,39 @@ class SLOService:
     - Time to exhaustion
     """
     
-    def __init__(self, prometheus_url: str = PROMETHEUS_URL):
+    def __init__(
+        self,
+        prometheus_url: str = PROMETHEUS_URL,
+        client: Optional[PrometheusClient] = None,
+        cache: Optional[RangeQueryCache] = None,
+        rollups: Optional[RollupStore] = None,
+        max_rollup_lag: float = ROLLUP_MAX_LAG_SECONDS
+    ):
         """
         Initialize SLO Service.
         
         Args:
             prometheus_url: URL of Prometheus instance
+            client: Prometheus client (default: pooled client configured
+                from the PROMETHEUS_* environment variables)
+            cache: Range query cache (default: none)
+            rollups: Rollup store answering windows it covers (default: none)
+            max_rollup_lag: Seconds the rollups may trail now before
+                windows are evaluated live instead
         """
         self.prometheus_url = prometheus_url
         self.api_url = f"{prometheus_url}/api/v1"
+        self.client = client or PrometheusClient(
+            prometheus_url,
+            max_concurrency=PROMETHEUS_MAX_CONCURRENCY,
+            timeout=PROMETHEUS_TIMEOUT,
+            retries=PROMETHEUS_RETRIES,
+        )
+        self.cache = cache
+        self.rollups = rollups
+        self.max_rollup_lag = max_rollup_lag
 
-    def _query_prometheus(self, query: str, start: datetime, end: datetime, step: str = "1h") -> list:
+    async def _query_prometheus(self, query: str, start: datetime, end: datetime, step: str = "1h") -> list:
         """
         Query Prometheus range API.
         
@@ -81,127 +197,102 @@ class SLOService:
             step: Query resolution step width
             
         Returns:
-            List of time series values
+            Result list (one {"metric", "values"} entry per series)
         """
-        params = {
-            "query": query,
-            "start": start.timestamp(),
-            "end": end.timestamp(),
-            "step": step
-        }
-        
         try:
-            response = requests.get(f"{self.api_url}/query_range", params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data["status"] != "success":
-                raise ValueError(f"Prometheus query failed: {data.get('error', 'Unknown error')}")
-            
-            result = data["data"]["result"]
-            if not result:
-                return []
-            
-            # Extract values from time series
-            values = []
-            for series in result:
-                values.extend([float(v[1]) for v in series["values"]])
-            
-            return values
-            
-        except requests.exceptions.RequestException as e:
+            if self.cache is not None:
+                return await self.cache.query_range(query, start, end, step)
+            return await self.client.query_range(query, start, end, step)
+        except PrometheusError as e:
             raise HTTPException(
                 status_code=503,
                 detail=f"Failed to query Prometheus: {str(e)}"
             )
 
-    def _query_prometheus_instant(self, query: str) -> float:
+    async def _evaluate(self, service: str, slo_target: float, window_days: int) -> SLOEvaluation:
         """
-        Query Prometheus instant API.
-        
-        Args:
-            query: PromQL query
-            
-        Returns:
-            Single value result
-        """
-        params = {"query": query}
-        
-        try:
-            response = requests.get(f"{self.api_url}/query", params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data["status"] != "success":
-                raise ValueError(f"Prometheus query failed: {data.get('error', 'Unknown error')}")
-            
-            result = data["data"]["result"]
-            if not result:
-                return 0.0
-            
-            return float(result[0]["value"][1])
-            
-        except requests.exceptions.RequestException as e:
-            raise HTTPException(
-                status_code=503,
-                detail=f"Failed to query Prometheus: {str(e)}"
-            )
-
-    def get_slo_compliance(
-        self,
-        service: str,
-        slo_target: float,
-        window_days: int = 30
-    ) -> SLOComplianceResponse:
-        """
-        Get SLO compliance status for a service.
+        Evaluate a service's SLO with a single range query (see slo_queries.py).
         
         Args:
             service: Service name
-            slo_target: SLO target as decimal (e.g., 0.9995)
+            slo_target: SLO target as decimal
             window_days: Evaluation window in days
             
         Returns:
-            SLOComplianceResponse with compliance status
+            Availability, latest error ratio and burn rate
         """
+        now = time.time()
+        (totals,) = await self._rollup_totals([(service, window_days)], now)
+        if totals is not None:
+            recent = await self._counts_since([service], totals.covered_until, now)
+            evaluation = totals.add(*recent.get(service, (0.0, 0.0))).evaluate(slo_target, window_days)
+            if evaluation is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"No metrics data available for service '{service}'"
+                )
+            return evaluation
+
         end_time = datetime.now()
         start_time = end_time - timedelta(days=window_days)
 
-        # Query availability
-        availability_query = f"""
-        sum(rate(http_requests_total{{service="{service}", status!~"5.."}}[5m]))[{window_days}d:]
-        /
-        sum(rate(http_requests_total{{service="{service}"}}[5m]))[{window_days}d:]
-        """
-
-        values = self._query_prometheus(availability_query, start_time, end_time, step="1h")
+        result = await self._query_prometheus(slo_series_query(service, EVALUATION_STEP), start_time, end_time, EVALUATION_STEP)
+        evaluation = evaluate_slo(parse_slo_series(result).get(service, {}), slo_target, window_days)
 
-        if not values:
+        if evaluation is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"No metrics data available for service '{service}'"
             )
+        return evaluation
 
-        # Calculate average availability
-        avg_availability = sum(values) / len(values) if values else 0.0
-        is_compliant = avg_availability >= slo_target
+    def _compliance(
+        self,
+        service: str,
+        slo_target: float,
+        window_days: int,
+        evaluation: SLOEvaluation
+    ) -> SLOComplianceResponse:
+        """Build the compliance response from an evaluation."""
+        availability = evaluation.availability
+        is_compliant = availability >= slo_target
 
         # Calculate error budget
         error_budget_pct = 1.0 - slo_target
-        current_error_rate = 1.0 - avg_availability
+        current_error_rate = 1.0 - availability
         error_budget_remaining = max(0.0, (error_budget_pct - current_error_rate) / error_budget_pct) if error_budget_pct > 0 else 0.0
 
         return SLOComplianceResponse(
             service=service,
             slo_target=slo_target,
-            current_availability=avg_availability,
+            current_availability=availability,
             is_compliant=is_compliant,
             error_budget_remaining=error_budget_remaining,
             window_days=window_days,
             timestamp=datetime.now().isoformat()
         )
 
-    def get_error_budget_status(
+    async def get_slo_compliance(
+        self,
+        service: str,
+        slo_target: float,
+        window_days: int = 30
+    ) -> SLOComplianceResponse:
+        """
+        Get SLO compliance status for a service.
+        
+        Args:
+            service: Service name
+            slo_target: SLO target as decimal (e.g., 0.9995)
+            window_days: Evaluation window in days
+            
+        Returns:
+            SLOComplianceResponse with compliance status
+        """
+        evaluation = await self._evaluate(service, slo_target, window_days)
+        return self._compliance(service, slo_target, window_days, evaluation)
+
+    async def get_error_budget_status(
         self,
         service: str,
         slo_target: float,
@@ -210,6 +301,9 @@ class SLOService:
         """
         Get detailed error budget status.
         
+        Compliance and burn rate come from the same query result, so this
+        costs one Prometheus round trip (none on a cache hit).
+        
         Args:
             service: Service name
             slo_target: SLO target as decimal
@@ -218,18 +312,21 @@ class SLOService:
         Returns:
             ErrorBudgetResponse with detailed budget status
         """
-        compliance = self.get_slo_compliance(service, slo_target, window_days)
-
-        # Calculate burn rate (daily consumption rate)
-        burn_rate_query = f"""
-        (
-          sum(rate(http_requests_total{{service="{service}", status=~"5.."}}[5m]))
-          /
-          sum(rate(http_requests_total{{service="{service}"}}[5m]))
-        ) / (1 - {slo_target}) / ({window_days} * 24 * 3600) * 86400
-        """
+        evaluation = await self._evaluate(service, slo_target, window_days)
+        return self._error_budget(service, slo_target, window_days, evaluation)
 
-        burn_rate = self._query_prometheus_instant(burn_rate_query)
+    def _error_budget(
+        self,
+        service: str,
+        slo_target: float,
+        window_days: int,
+        evaluation: SLOEvaluation
+    ) -> ErrorBudgetResponse:
+        """Build the error budget response from an evaluation."""
+        compliance = self._compliance(service, slo_target, window_days, evaluation)
+
+        # Daily burn rate, at the error ratio of the most recent hour
+        burn_rate = evaluation.burn_rate
 
         # Calculate time to exhaustion
         remaining_budget = compliance.error_budget_remaining
@@ -247,6 +344,153 @@ class SLOService:
             status=status
         )
 
+    async def _rollup_totals(self, windows: List[Tuple[str, int]], now: float) -> List[Optional[WindowTotals]]:
+        """
+        Rolled-up counts of each (service, window_days) window's hours, or
+        None where the rollups do not cover it or are not recent enough.
+        
+        The SQLite reads for all windows run in one worker thread, off the
+        event loop.
+        """
+        if self.rollups is None:
+            return [None] * len(windows)
+        # Same hours as the live range query, whose start and end the cache aligns to the step
+        end = math.floor(now / 3600) * 3600
+        ranges = [
+            (service, math.floor((now - window_days * 86400) / 3600) * 3600, end)
+            for service, window_days in windows
+        ]
+        results = await asyncio.to_thread(self.rollups.window_totals_many, ranges)
+        return [
+            totals if totals is not None and now - totals.covered_until <= self.max_rollup_lag else None
+            for totals in results
+        ]
+
+    async def _counts_since(self, services: List[str], since: float, now: float) -> Dict[str, tuple]:
+        """
+        Live (errors, total) counts of services after the last rolled-up hour.
+        
+        One instant query for all services. If Prometheus fails, the
+        rollups answer on their own (logged), without these recent counts.
+        """
+        query = slo_series_query(services, f"{max(1, math.ceil(now - since))}s")
+        try:
+            result = await self.client.query(query, time=now)
+        except PrometheusError as e:
+            logger.warning("Live counts after rollups unavailable: %s", e)
+            return {}
+        counts = {}
+        for service, series in parse_slo_series(result).items():
+            step_counts = aggregate_counts(series)
+            counts[service] = (float(step_counts.errors.sum()), float(step_counts.total.sum()))
+        return counts
+
+    def _bulk_result(self, item: BulkSLOItem, evaluation: Optional[SLOEvaluation]) -> Union[ErrorBudgetResponse, Dict]:
+        if evaluation is None:
+            return {
+                "service": item.service,
+                "error": f"No metrics data available for service '{item.service}'",
+                "status_code": 404,
+            }
+        return self._error_budget(item.service, item.slo_target, item.window_days, evaluation)
+
+    async def _query_group(self, services: List[str], window_days: int) -> Dict[str, SLOSeries]:
+        """Series of several services over the same window, from one grouped query."""
+        end_time = datetime.now()
+        start_time = end_time - timedelta(days=window_days)
+        result = await self._query_prometheus(slo_series_query(services, EVALUATION_STEP), start_time, end_time, EVALUATION_STEP)
+        return parse_slo_series(result)
+
+    async def stream_error_budgets(
+        self,
+        items: List[BulkSLOItem],
+        group_size: int = BULK_GROUP_SIZE,
+        max_parallel: int = BULK_MAX_PARALLEL
+    ) -> AsyncIterator[Union[ErrorBudgetResponse, Dict]]:
+        """
+        Evaluate many services with grouped queries, yielding results as groups complete.
+        
+        Services sharing a window are evaluated by one `by (service)` query
+        per group of up to group_size services (targets only matter after
+        the query); at most max_parallel group queries run at once. Services
+        covered by rollups only need a grouped instant query for the hours
+        since the last rollup.
+        
+        Args:
+            items: Services with their targets and windows
+            group_size: Maximum services per grouped query
+            max_parallel: Maximum grouped queries in flight
+            
+        Yields:
+            ErrorBudgetResponse per item, or {"service", "error",
+            "status_code"} for a service without data or a failed query
+        """
+        now = time.time()
+        by_window: Dict[int, List[BulkSLOItem]] = {}
+        # covered_until -> [(item, rolled-up totals)]
+        by_rollup: Dict[int, List[tuple]] = {}
+        rolled_up = await self._rollup_totals([(item.service, item.window_days) for item in items], now)
+        for item, totals in zip(items, rolled_up):
+            if totals is not None:
+                by_rollup.setdefault(totals.covered_until, []).append((item, totals))
+            else:
+                by_window.setdefault(item.window_days, []).append(item)
+
+        def chunks(members: List, service_of) -> List[List]:
+            services = list(dict.fromkeys(service_of(member) for member in members))
+            groups = []
+            for i in range(0, len(services), group_size):
+                group_services = set(services[i:i + group_size])
+                groups.append([member for member in members if service_of(member) in group_services])
+            return groups
+
+        semaphore = asyncio.Semaphore(max_parallel)
+
+        async def run_group(window_days: int, group_items: List[BulkSLOItem]) -> List:
+            async with semaphore:
+                try:
+                    series = await self._query_group(sorted({item.service for item in group_items}), window_days)
+                except HTTPException as e:
+                    return [
+                        {"service": item.service, "error": e.detail, "status_code": e.status_code}
+                        for item in group_items
+                    ]
+            return [
+                self._bulk_result(item, evaluate_slo(series.get(item.service, {}), item.slo_target, item.window_days))
+                for item in group_items
+            ]
+
+        async def run_rollup_group(covered_until: int, pairs: List[tuple]) -> List:
+            async with semaphore:
+                recent = await self._counts_since(sorted({item.service for item, _ in pairs}), covered_until, now)
+            return [
+                self._bulk_result(
+                    item,
+                    totals.add(*recent.get(item.service, (0.0, 0.0))).evaluate(item.slo_target, item.window_days)
+                )
+                for item, totals in pairs
+            ]
+
+        coroutines = [
+            run_group(window_days, group)
+            for window_days, window_items in by_window.items()
+            for group in chunks(window_items, lambda item: item.service)
+        ] + [
+            run_rollup_group(covered_until, group)
+            for covered_until, pairs in by_rollup.items()
+            for group in chunks(pairs, lambda pair: pair[0].service)
+        ]
+
+        tasks = [asyncio.create_task(coroutine) for coroutine in coroutines]
+        try:
+            for next_group in asyncio.as_completed(tasks):
+                for result in await next_group:
+                    yield result
+        finally:
+            # Client went away or the generator was closed early
+            for task in tasks:
+                task.cancel()
+
     def _get_budget_status(self, remaining: float, burn_rate: float) -> str:
         """
         Get budget status based on remaining budget and burn rate.
@@ -271,7 +515,69 @@ class SLOService:
 
 
 # Initialize service
-slo_service = SLOService(PROMETHEUS_URL)
+prometheus_client = PrometheusClient(
+    PROMETHEUS_URL,
+    max_concurrency=PROMETHEUS_MAX_CONCURRENCY,
+    timeout=PROMETHEUS_TIMEOUT,
+    retries=PROMETHEUS_RETRIES,
+)
+rollup_store = RollupStore(ROLLUP_DB) if ROLLUP_DB else None
+rollup_job = (
+    RollupJob(
+        rollup_store,
+        prometheus_client,
+        services=ROLLUP_SERVICES or None,
+        interval=ROLLUP_INTERVAL,
+        retention_days=ROLLUP_RETENTION_DAYS,
+        settle_seconds=QUERY_CACHE_SETTLE_SECONDS,
+        group_size=BULK_GROUP_SIZE,
+    )
+    if rollup_store is not None and ROLLUP_JOB
+    else None
+)
+alert_job = (
+    BurnRateAlertJob(
+        BurnRateEvaluator(ALERT_DEFAULT_TARGET, ALERT_SLO_TARGETS),
+        prometheus_client,
+        interval=ALERT_INTERVAL,
+    )
+    if BURN_RATE_ALERTS
+    else None
+)
+slo_service = SLOService(
+    PROMETHEUS_URL,
+    client=prometheus_client,
+    cache=(
+        RangeQueryCache(prometheus_client, QUERY_CACHE_ENTRIES, QUERY_CACHE_SETTLE_SECONDS)
+        if QUERY_CACHE_ENTRIES > 0
+        else None
+    ),
+    rollups=rollup_store,
+)
+
+
+async def evaluate_statuses(keys: List[StatusKey]) -> AsyncIterator[Tuple[StatusKey, StatusEvent]]:
+    """
+    Evaluate live statuses with the bulk evaluation (grouped queries), for the status hub.
+    
+    Yields:
+        (key, "error-budget" event) per status, or an "error" event for a
+        service without data or a failed query
+    """
+    # A service may be watched with several targets/windows: one bulk pass per pair
+    by_objective: Dict[Tuple[float, int], List[str]] = {}
+    for service, slo_target, window_days in keys:
+        by_objective.setdefault((slo_target, window_days), []).append(service)
+    for (slo_target, window_days), services in by_objective.items():
+        items = [BulkSLOItem(service=service, slo_target=slo_target, window_days=window_days) for service in services]
+        async for result in slo_service.stream_error_budgets(items):
+            if isinstance(result, BaseModel):
+                yield (result.service, slo_target, window_days), StatusEvent("error-budget", result.model_dump_json())
+            else:
+                yield (result["service"], slo_target, window_days), StatusEvent("error", json.dumps(result))
+
+
+status_hub = SLOStatusHub(evaluate_statuses, interval=STREAM_INTERVAL)
 
 
 @app.get("/")
@@ -283,6 +589,9 @@ async def root():
         "endpoints": {
             "compliance": "/slo/{service}/compliance",
             "error_budget": "/slo/{service}/error-budget",
+            "bulk": "/slo/bulk",
+            "alerts": "/slo/alerts",
+            "stream": "/slo/stream?service={service}",
             "health": "/health"
         }
     }
@@ -293,18 +602,126 @@ async def health():
     """Health check endpoint."""
     try:
         # Try to query Prometheus
-        response = requests.get(f"{PROMETHEUS_API}/query", params={"query": "up"}, timeout=5)
-        prometheus_healthy = response.status_code == 200
-    except:
+        await slo_service.client.query("up")
+        prometheus_healthy = True
+    except PrometheusError:
         prometheus_healthy = False
     
     return {
         "status": "healthy" if prometheus_healthy else "degraded",
         "prometheus_connected": prometheus_healthy,
+        "prometheus_client": slo_service.client.stats(),
+        "query_cache": slo_service.cache.stats() if slo_service.cache is not None else None,
+        "rollups": {
+            "store": rollup_store.stats(),
+            "job": rollup_job.stats() if rollup_job is not None else None,
+        } if rollup_store is not None else None,
+        "burn_rate_alerts": alert_job.stats() if alert_job is not None else None,
+        "status_stream": status_hub.stats(),
         "timestamp": datetime.now().isoformat()
     }
 
 
+@app.post("/slo/bulk")
+async def bulk_error_budgets(request: BulkSLORequest):
+    """
+    Evaluate the error budget of many services in one request.
+    
+    Services are evaluated with grouped `by (service)` queries and results
+    are streamed as NDJSON (one JSON object per line) as groups complete,
+    so their order may differ from the request.
+    
+    Args:
+        request: Services with their SLO targets and windows
+        
+    Returns:
+        NDJSON stream of error budget statuses (or per-service errors)
+    """
+    if len(request.services) > BULK_MAX_SERVICES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BULK_MAX_SERVICES} services per bulk request"
+        )
+
+    async def lines():
+        async for result in slo_service.stream_error_budgets(request.services):
+            # model_dump_json writes infinite days_to_exhaustion as null, like the other endpoints
+            line = result.model_dump_json() if isinstance(result, BaseModel) else json.dumps(result)
+            yield line + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/slo/alerts")
+async def get_alerts(
+    decision: str = Query("ticket", pattern="^(none|ticket|page)$", description="Minimum decision to list")
+):
+    """
+    Get the latest multiwindow burn-rate alert decisions of the fleet.
+    
+    Args:
+        decision: List services at or above this decision (default: ticket)
+        
+    Returns:
+        Services with their decision, burn rate per window and fired rules
+    """
+    if alert_job is None:
+        raise HTTPException(status_code=404, detail="Burn rate alerts are disabled (BURN_RATE_ALERTS=1)")
+    report = alert_job.report
+    if report is None:
+        raise HTTPException(status_code=503, detail="No burn rate evaluation yet")
+    return {
+        "evaluated_at": datetime.fromtimestamp(report.timestamp).isoformat(),
+        "services_evaluated": len(report.services),
+        "alerts": report.firing(decision),
+    }
+
+
+@app.get("/slo/stream")
+async def stream_status(
+    service: List[str] = Query(..., min_length=1, description="Service to watch (repeat for several)"),
+    slo_target: float = Query(0.9995, ge=0, le=1, description="SLO target as decimal"),
+    window_days: int = Query(30, ge=1, le=365, description="Evaluation window in days")
+):
+    """
+    Stream live error budget status as server-sent events.
+    
+    Sends an `error-budget` event (an ErrorBudgetResponse) per service on
+    connect and every STREAM_INTERVAL seconds, or an `error` event for a
+    service without data. Statuses are evaluated by one shared background
+    evaluator, so subscribers watching the same service add no queries.
+    
+    Args:
+        service: Services to watch
+        slo_target: SLO target (default: 0.9995 = 99.95%%)
+        window_days: Evaluation window (default: 30 days)
+        
+    Returns:
+        text/event-stream of status events, with keep-alive comments
+    """
+    services = list(dict.fromkeys(service))
+    if len(services) > BULK_MAX_SERVICES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BULK_MAX_SERVICES} services per stream"
+        )
+
+    async def events():
+        subscription = status_hub.subscribe([(name, slo_target, window_days) for name in services])
+        try:
+            async for chunk in subscription.events(STREAM_KEEPALIVE):
+                yield chunk
+        finally:
+            # Client disconnected
+            status_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/slo/{service}/compliance", response_model=SLOComplianceResponse)
 async def get_compliance(
     service: str,
@@ -322,7 +739,7 @@ async def get_compliance(
     Returns:
         SLO compliance status
     """
-    return slo_service.get_slo_compliance(service, slo_target, window_days)
+    return await slo_service.get_slo_compliance(service, slo_target, window_days)
 
 
 @app.get("/slo/{service}/error-budget", response_model=ErrorBudgetResponse)
@@ -342,7 +759,7 @@ async def get_error_budget(
     Returns:
         Detailed error budget status including burn rate and time to exhaustion
     """
-    return slo_service.get_error_budget_status(service, slo_target, window_days)
+    return await slo_service.get_error_budget_status(service, slo_target, window_days)
 
 
 if __name__ == "__main__":
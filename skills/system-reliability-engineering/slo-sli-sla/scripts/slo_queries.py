@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+SLO Query Planner
+
+Builds the PromQL for an SLO evaluation, so every figure the SLO API
+reports comes from a single range query:
+- Error and total request counts per step (increase() over exactly one
+  step, so steps neither overlap nor leave gaps) come back as two series
+  of one query, told apart by a slo_series="errors" / "total" label
+  (label_replace + or), instead of one query per figure
+- Availability over the window, the latest error ratio and the burn rate
+  are all computed from those counts (slo_aggregation.py)
+
+Series are aggregated `by (service)`, so one query can also cover a group
+of services (service=~"a|b|c") and the same result parser serves both.
+
+Usage:
+    from slo_aggregation import evaluate_slo
+    from slo_queries import parse_slo_series, slo_series_query
+
+    result = await client.query_range(slo_series_query("payment", step="1h"), start, end, "1h")
+    evaluation = evaluate_slo(parse_slo_series(result)["payment"], slo_target=0.999, window_days=30)
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from slo_aggregation import SLOSeries
+
+# Label that tells the series of one planned query apart
+SERIES_LABEL = "slo_series"
+
+
+def escape_label_value(value: str) -> str:
+    """Escape a string for use inside a double-quoted PromQL label matcher."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _requests(*matchers: str) -> str:
+    matchers = ", ".join(matcher for matcher in matchers if matcher)
+    return f"http_requests_total{{{matchers}}}" if matchers else "http_requests_total"
+
+
+def _labelled(expr: str, name: str) -> str:
+    return f'label_replace({expr}, "{SERIES_LABEL}", "{name}", "", "")'
+
+
+def service_selector(services: Optional[Union[str, Sequence[str]]]) -> str:
+    """Label matcher for one service (exact), several (anchored regex alternation) or all (None)."""
+    if services is None:
+        return ""
+    if isinstance(services, str):
+        return f'service="{escape_label_value(services)}"'
+    if not services:
+        raise ValueError("services must not be empty")
+    if len(services) == 1:
+        return service_selector(services[0])
+    pattern = "|".join(re.escape(service) for service in sorted(set(services)))
+    return f'service=~"{escape_label_value(pattern)}"'
+
+
+def slo_series_query(services: Optional[Union[str, Sequence[str]]], step: str = "1h") -> str:
+    """
+    One query returning the error and total request count series of services.
+
+    Args:
+        services: Service name, several names to evaluate in one query, or
+            None for every service
+        step: Step of the range query it is run with (counts cover one step each)
+    """
+    selector = service_selector(services)
+    error_requests = _requests(selector, 'status=~"5.."')
+    errors = f"sum by (service) (increase({error_requests}[{step}]))"
+    total = f"sum by (service) (increase({_requests(selector)}[{step}]))"
+    return f"{_labelled(errors, 'errors')} or {_labelled(total, 'total')}"
+
+
+def parse_slo_series(result: List[Dict]) -> Dict[str, SLOSeries]:
+    """
+    Group a planned query's result (range or instant) by service and series name.
+
+    Returns:
+        {service: {"errors": [(timestamps, values)], "total": [...]}} as
+        float64 arrays; a series with no samples (e.g. no 5xx at all in the
+        window) is absent
+    """
+    services: Dict[str, SLOSeries] = {}
+    for series in result:
+        metric = series["metric"]
+        name = metric.get(SERIES_LABEL)
+        samples = series["values"] if "values" in series else [series["value"]]
+        if name is None or not samples:
+            continue
+        timestamps, values = zip(*samples)
+        arrays = (np.asarray(timestamps, dtype=np.float64), np.asarray(values, dtype=np.float64))
+        services.setdefault(metric.get("service", ""), {}).setdefault(name, []).append(arrays)
+    return services
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+SLO Rollups
+
+Precomputed hourly and daily request counts per service, so SLO windows
+of 7, 30 or 90 days are answered from a local store in milliseconds
+instead of re-running range queries over raw counters:
+- RollupStore: SQLite (WAL) tables of error/total counts per service and
+  hour (hourly) and per service and UTC day (daily), plus the hours each
+  service is covered for. A window sums whole days from daily and the
+  edges from hourly.
+- RollupJob: background job that discovers services, backfills the
+  retention period and then appends each settled hour, with the same
+  planned per-step count query as the live API (slo_queries.py)
+
+Only what happened after the last rolled-up hour (the current partial
+hour, plus the job's lag) needs a live query.
+
+Usage:
+    from slo_rollups import RollupJob, RollupStore
+
+    store = RollupStore("/var/lib/slo/rollups.db")
+    job = RollupJob(store, client, interval=300)
+    job.start()
+    totals = store.window_totals("payment", start, end)
+
+    # CLI: run the job on its own (one writer for several API workers)
+    python slo_rollups.py --prometheus-url http://prometheus:9090 --db rollups.db
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from prometheus_query import PrometheusClient, PrometheusError
+from slo_aggregation import SLOEvaluation, StepCounts, aggregate_counts, burn_rate_for
+from slo_queries import parse_slo_series, slo_series_query
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hourly (
+    service TEXT NOT NULL,
+    ts INTEGER NOT NULL,  -- End of the hour, as the range query step timestamp
+    errors REAL NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (service, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily (
+    service TEXT NOT NULL,
+    day INTEGER NOT NULL,  -- UTC midnight; holds hourly rows with day <= ts < day + 86400
+    errors REAL NOT NULL,
+    total REAL NOT NULL,
+    steps INTEGER NOT NULL,
+    PRIMARY KEY (service, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    service TEXT PRIMARY KEY,
+    first_ts INTEGER NOT NULL,
+    last_ts INTEGER NOT NULL
+);
+"""
+
+
+@dataclass
+class WindowTotals:
+    """Counts of a window from rollups, through covered_until."""
+    errors: float
+    total: float
+    steps: int  # Hours with traffic
+    last_errors: float  # Most recent hour with traffic
+    last_total: float
+    covered_until: int
+
+    def add(self, errors: float, total: float) -> "WindowTotals":
+        """Add counts after covered_until (e.g. the live partial hour)."""
+        return WindowTotals(
+            self.errors + errors, self.total + total, self.steps,
+            self.last_errors, self.last_total, self.covered_until
+        )
+
+    def evaluate(self, slo_target: float, window_days: int) -> Optional[SLOEvaluation]:
+        """Same figures as slo_aggregation.evaluate_counts; None without traffic."""
+        if self.total <= 0:
+            return None
+        error_ratio = self.last_errors / self.last_total if self.last_total > 0 else 0.0
+        return SLOEvaluation(
+            availability=1.0 - self.errors / self.total,
+            error_ratio=error_ratio,
+            burn_rate=burn_rate_for(error_ratio, slo_target, window_days),
+            steps=self.steps,
+            good=self.total - self.errors,
+            total=self.total,
+        )
+
+
+class RollupStore:
+    """
+    SQLite store of hourly and daily error/total counts per service.
+
+    Safe to share between threads (one connection per thread); WAL mode
+    lets API readers proceed while the job writes.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize rollup store.
+
+        Args:
+            path: SQLite database file (created if missing)
+        """
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._db.executescript(SCHEMA)
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=5000")
+            self._local.db = db
+            with self._lock:
+                self._connections.append(db)
+        return db
+
+    def write_hours(self, counts: Dict[str, StepCounts], services: Sequence[str], start: int, end: int):
+        """
+        Replace the hours start..end of services with fetched counts.
+
+        Args:
+            counts: Step counts per service (services without traffic may be absent)
+            services: Every service the fetch covered
+            start: First hour (step timestamp) fetched
+            end: Last hour fetched
+        """
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for service in services:
+                db.execute("DELETE FROM hourly WHERE service = ? AND ts BETWEEN ? AND ?", (service, start, end))
+                step_counts = counts.get(service)
+                if step_counts is not None and len(step_counts.timestamps):
+                    db.executemany(
+                        "INSERT INTO hourly (service, ts, errors, total) VALUES (?, ?, ?, ?)",
+                        zip(
+                            [service] * len(step_counts.timestamps),
+                            step_counts.timestamps.astype(int).tolist(),
+                            step_counts.errors.tolist(),
+                            step_counts.total.tolist(),
+                        ),
+                    )
+
+                first_day = start // DAY * DAY
+                last_day = end // DAY * DAY
+                db.execute("DELETE FROM daily WHERE service = ? AND day BETWEEN ? AND ?", (service, first_day, last_day))
+                db.execute(
+                    "INSERT INTO daily (service, day, errors, total, steps) "
+                    "SELECT service, ts / ? * ?, SUM(errors), SUM(total), COUNT(*) FROM hourly "
+                    "WHERE service = ? AND ts >= ? AND ts < ? GROUP BY 2",
+                    (DAY, DAY, service, first_day, last_day + DAY),
+                )
+
+                row = db.execute("SELECT first_ts, last_ts FROM coverage WHERE service = ?", (service,)).fetchone()
+                if row is not None and start <= row[1] + HOUR and end >= row[0] - HOUR:
+                    # Contiguous with (or overlapping) what is already covered
+                    first_ts, last_ts = min(row[0], start), max(row[1], end)
+                else:
+                    first_ts, last_ts = start, end
+                db.execute(
+                    "INSERT OR REPLACE INTO coverage (service, first_ts, last_ts) VALUES (?, ?, ?)",
+                    (service, first_ts, last_ts),
+                )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def prune(self, before: int):
+        """Drop hours (and whole days) before a timestamp."""
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM hourly WHERE ts < ?", (before,))
+            db.execute("DELETE FROM daily WHERE day < ?", (before // DAY * DAY,))
+            # The first remaining day may have lost hours
+            db.execute(
+                "INSERT OR REPLACE INTO daily (service, day, errors, total, steps) "
+                "SELECT service, ts / ? * ?, SUM(errors), SUM(total), COUNT(*) FROM hourly "
+                "WHERE ts < ? GROUP BY service, 2",
+                (DAY, DAY, before // DAY * DAY + DAY),
+            )
+            db.execute("UPDATE coverage SET first_ts = ? WHERE first_ts < ?", (before, before))
+            db.execute("DELETE FROM coverage WHERE last_ts < first_ts")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def coverage(self, service: str) -> Optional[tuple]:
+        """(first, last) hour covered for a service, or None."""
+        return self._db.execute(
+            "SELECT first_ts, last_ts FROM coverage WHERE service = ?", (service,)
+        ).fetchone()
+
+    def window_totals(self, service: str, start: int, end: int) -> Optional[WindowTotals]:
+        """
+        Counts of the hours start..end (step timestamps) through the last covered hour.
+
+        Returns:
+            WindowTotals (covered_until <= end), or None if the window start
+            is not covered for the service
+        """
+        covered = self.coverage(service)
+        if covered is None or covered[0] > start or covered[1] < start:
+            return None
+        until = min(end, covered[1])
+
+        db = self._db
+        # Whole days inside the window come from daily, the edges from hourly
+        first_day = -(-start // DAY) * DAY
+        days_end = (until + HOUR) // DAY * DAY
+        if first_day < days_end:
+            edges = [(start, first_day - 1), (days_end, until)]
+            errors, total, steps = db.execute(
+                "SELECT COALESCE(SUM(errors), 0), COALESCE(SUM(total), 0), COALESCE(SUM(steps), 0) "
+                "FROM daily WHERE service = ? AND day >= ? AND day < ?",
+                (service, first_day, days_end),
+            ).fetchone()
+        else:
+            edges = [(start, until)]
+            errors = total = 0.0
+            steps = 0
+        for low, high in edges:
+            if low > high:
+                continue
+            row = db.execute(
+                "SELECT COALESCE(SUM(errors), 0), COALESCE(SUM(total), 0), COUNT(*) "
+                "FROM hourly WHERE service = ? AND ts BETWEEN ? AND ?",
+                (service, low, high),
+            ).fetchone()
+            errors, total, steps = errors + row[0], total + row[1], steps + row[2]
+
+        last = db.execute(
+            "SELECT errors, total FROM hourly WHERE service = ? AND ts BETWEEN ? AND ? AND total > 0 "
+            "ORDER BY ts DESC LIMIT 1",
+            (service, start, until),
+        ).fetchone() or (0.0, 0.0)
+        return WindowTotals(errors, total, steps, last[0], last[1], until)
+
+    def window_totals_many(self, windows: Sequence[Tuple[str, int, int]]) -> List[Optional[WindowTotals]]:
+        """window_totals of many (service, start, end) windows, in input order."""
+        return [self.window_totals(service, start, end) for service, start, end in windows]
+
+    def stats(self) -> Dict[str, int]:
+        """Return row counts (services covered, hourly and daily rows)."""
+        db = self._db
+        return {
+            "services": db.execute("SELECT COUNT(*) FROM coverage").fetchone()[0],
+            "hourly_rows": db.execute("SELECT COUNT(*) FROM hourly").fetchone()[0],
+            "daily_rows": db.execute("SELECT COUNT(*) FROM daily").fetchone()[0],
+        }
+
+    def close(self):
+        """Close every thread's connection."""
+        with self._lock:
+            for db in self._connections:
+                db.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class RollupJob:
+    """
+    Periodically rolls up settled hours of every service into a RollupStore.
+
+    Each run fetches, per group of services, only the hours after what the
+    store already covers (the whole retention period on first run).
+    """
+
+    def __init__(
+        self,
+        store: RollupStore,
+        client: PrometheusClient,
+        services: Optional[Sequence[str]] = None,
+        interval: float = 300.0,
+        retention_days: int = 90,
+        settle_seconds: float = 300.0,
+        group_size: int = 50
+    ):
+        """
+        Initialize rollup job.
+
+        Args:
+            store: Store to write to
+            client: Prometheus client
+            services: Services to roll up (default: discovered from
+                http_requests_total on every run)
+            interval: Seconds between runs
+            retention_days: Days of hours kept (longest window answered from rollups)
+            settle_seconds: Age after which an hour's counts no longer change
+            group_size: Maximum services per grouped query
+        """
+        self.store = store
+        self.client = client
+        self.services = list(services) if services else None
+        self.interval = interval
+        self.retention_days = retention_days
+        self.settle_seconds = settle_seconds
+        self.group_size = group_size
+        self.runs = 0
+        self.failures = 0
+        self.hours_written = 0
+        self.last_run: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def discover(self) -> List[str]:
+        """Services to roll up: the configured list, or every service label value."""
+        if self.services is not None:
+            return self.services
+        result = await self.client.query("group by (service) (http_requests_total)")
+        return sorted({series["metric"]["service"] for series in result if series["metric"].get("service")})
+
+    async def run_once(self, now: Optional[float] = None) -> int:
+        """
+        Roll up every settled hour not covered yet.
+
+        Returns:
+            Number of hourly rows written
+
+        Raises:
+            PrometheusError: If discovery or a fetch fails (groups written
+                before the failure are kept)
+        """
+        started = time.perf_counter()
+        now = time.time() if now is None else now
+        end = math.floor((now - self.settle_seconds) / HOUR) * HOUR
+        # One spare hour before the longest window's first step
+        retention_start = math.floor((now - self.retention_days * DAY) / HOUR) * HOUR - HOUR
+
+        by_start: Dict[int, List[str]] = {}
+        for service in await self.discover():
+            covered = await asyncio.to_thread(self.store.coverage, service)
+            if covered is not None and covered[0] <= retention_start + HOUR and covered[1] >= retention_start:
+                start = covered[1] + HOUR
+            else:
+                start = retention_start
+            if start <= end:
+                by_start.setdefault(start, []).append(service)
+
+        written = 0
+        for start, services in by_start.items():
+            for i in range(0, len(services), self.group_size):
+                group = services[i:i + self.group_size]
+                result = await self.client.query_range(slo_series_query(group, "1h"), start, end, "1h")
+                counts = {service: aggregate_counts(series) for service, series in parse_slo_series(result).items()}
+                await asyncio.to_thread(self.store.write_hours, counts, group, start, end)
+                written += sum(len(step_counts.timestamps) for step_counts in counts.values())
+
+        await asyncio.to_thread(self.store.prune, retention_start)
+        self.runs += 1
+        self.hours_written += written
+        self.last_run = now
+        self.last_duration = time.perf_counter() - started
+        return written
+
+    async def run(self):
+        """Run forever, every interval seconds; failures are logged and retried next run."""
+        while True:
+            try:
+                await self.run_once()
+            except PrometheusError as e:
+                self.failures += 1
+                logger.warning("SLO rollup run failed: %s", e)
+            except Exception:
+                # SQLite or unexpected data errors must not stop the rollups for good
+                self.failures += 1
+                logger.exception("SLO rollup run failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> asyncio.Task:
+        """Start run() as a task on the running event loop."""
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Cancel the task started by start()."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Return job counters (runs, failures, hours written, last run)."""
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "hours_written": self.hours_written,
+            "last_run": self.last_run,
+            "last_duration_s": self.last_duration,
+        }
+
+
+def main():
+    """CLI entry point for running the rollup job on its own."""
+    parser = argparse.ArgumentParser(
+        description="Roll up hourly and daily SLO request counts from Prometheus into SQLite",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        "--prometheus-url",
+        default="http://localhost:9090",
+        help="URL of Prometheus instance"
+    )
+
+    parser.add_argument(
+        "--db",
+        required=True,
+        help="SQLite database file"
+    )
+
+    parser.add_argument(
+        "--services",
+        help="Comma-separated services (default: discover from http_requests_total)"
+    )
+
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=300.0,
+        help="Seconds between runs"
+    )
+
+    parser.add_argument(
+        "--retention-days",
+        type=int,
+        default=90,
+        help="Days of hourly counts kept"
+    )
+
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Run once and exit"
+    )
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    store = RollupStore(args.db)
+    client = PrometheusClient(args.prometheus_url)
+    services = [s.strip() for s in args.services.split(",") if s.strip()] if args.services else None
+    job = RollupJob(store, client, services=services, interval=args.interval, retention_days=args.retention_days)
+
+    async def run():
+        try:
+            if args.once:
+                written = await job.run_once()
+                print(f"Rolled up {written} hours")
+                print(store.stats())
+            else:
+                await job.run()
+        finally:
+            await client.aclose()
+
+    try:
+        asyncio.run(run())
+    except PrometheusError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Live SLO Status Fan-out
+
+One background evaluator shared by every live status subscriber (the SLO
+API's server-sent events endpoint):
+- Subscribers register the (service, target, window) statuses they want;
+  the hub refreshes each distinct status once per interval, however many
+  subscribers share it, so Prometheus load depends on what is watched,
+  not on how many clients watch it
+- Each refresh evaluates all watched statuses in one pass (the SLO API
+  uses its grouped bulk evaluation) and fans every result out to the
+  subscribers of that status
+- A new subscriber gets the latest known events at once; statuses nobody
+  has seen yet are evaluated right away instead of at the next refresh
+- Statuses nobody watches are neither evaluated nor kept
+- Each subscriber has a bounded queue; a slow client loses its oldest
+  pending events rather than growing memory (the newest status wins)
+
+Events are server-sent events: `event: <name>` and one `data:` JSON line.
+
+Usage:
+    hub = SLOStatusHub(evaluate, interval=60)
+    hub.start()
+
+    subscription = hub.subscribe([("payment-service", 0.9995, 30)])
+    try:
+        async for chunk in subscription.events(keepalive=15):
+            ...  # Write chunk to the client
+    finally:
+        hub.unsubscribe(subscription)
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (service, slo_target, window_days)
+StatusKey = Tuple[str, float, int]
+
+
+@dataclass(frozen=True)
+class StatusEvent:
+    """One server-sent event."""
+    event: str
+    data: str  # JSON, on a single line
+
+    def encode(self) -> str:
+        return f"event: {self.event}\ndata: {self.data}\n\n"
+
+
+# Evaluates statuses, yielding (key, event) per key as results arrive
+Evaluate = Callable[[List[StatusKey]], AsyncIterator[Tuple[StatusKey, StatusEvent]]]
+
+KEEPALIVE = ": keep-alive\n\n"
+
+
+class Subscription:
+    """One subscriber's statuses and pending events."""
+
+    def __init__(self, keys: List[StatusKey], queue_size: int):
+        self.keys = list(dict.fromkeys(keys))
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(queue_size, 2 * len(self.keys)))
+        self.dropped = 0
+
+    def put(self, event: StatusEvent):
+        """Queue an event, dropping the oldest pending one if the queue is full."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def events(self, keepalive: float = 15.0) -> AsyncIterator[str]:
+        """
+        Encoded events as they arrive, forever.
+
+        Args:
+            keepalive: Seconds without events before sending an SSE comment,
+                so proxies keep the connection open
+        """
+        while True:
+            try:
+                event = await asyncio.wait_for(self.queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE
+                continue
+            yield event.encode()
+
+
+class SLOStatusHub:
+    """Refreshes watched statuses on a schedule and fans results out to subscribers."""
+
+    def __init__(self, evaluate: Evaluate, interval: float = 60.0, queue_size: int = 16):
+        """
+        Args:
+            evaluate: Async generator function evaluating a list of statuses
+            interval: Seconds between refreshes of every watched status
+            queue_size: Minimum pending events per subscriber
+        """
+        self.evaluate = evaluate
+        self.interval = interval
+        self.queue_size = queue_size
+        self.cycles = 0
+        self.evaluations = 0
+        self.events_sent = 0
+        self.failures = 0
+        self.last_duration: Optional[float] = None
+        self._subscribers: Dict[StatusKey, Set[Subscription]] = {}
+        self._latest: Dict[StatusKey, StatusEvent] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, keys: List[StatusKey]) -> Subscription:
+        """Register a subscriber; it starts with the latest known event of each status."""
+        subscription = Subscription(keys, self.queue_size)
+        unseen = False
+        for key in subscription.keys:
+            self._subscribers.setdefault(key, set()).add(subscription)
+            latest = self._latest.get(key)
+            if latest is not None:
+                subscription.put(latest)
+            else:
+                unseen = True
+        if unseen:
+            self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscriber; statuses left without subscribers are forgotten."""
+        for key in subscription.keys:
+            subscribers = self._subscribers.get(key)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[key]
+                self._latest.pop(key, None)
+
+    async def run_once(self, keys: List[StatusKey]):
+        """Evaluate keys and publish each result to its subscribers."""
+        started = time.perf_counter()
+        async for key, event in self.evaluate(keys):
+            self.evaluations += 1
+            subscribers = self._subscribers.get(key)
+            if not subscribers:
+                continue  # Everyone left while it was being evaluated
+            self._latest[key] = event
+            for subscription in subscribers:
+                subscription.put(event)
+            self.events_sent += len(subscribers)
+        self.cycles += 1
+        self.last_duration = time.perf_counter() - started
+
+    async def run(self):
+        """
+        Run forever: refresh every watched status each interval, and
+        statuses without a result as soon as someone subscribes to them.
+        """
+        next_refresh = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if now >= next_refresh:
+                keys = list(self._subscribers)
+                next_refresh = now + self.interval
+            else:
+                keys = [key for key in self._subscribers if key not in self._latest]
+            self._wake.clear()
+            if keys:
+                try:
+                    await self.run_once(keys)
+                except Exception:
+                    # Keep serving the previous events; retry at the next refresh
+                    self.failures += 1
+                    logger.exception("Live SLO status refresh failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, next_refresh - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> asyncio.Task:
+        """Start run() as a task on the running event loop."""
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Cancel the task started by start()."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Return subscriber and refresh counters."""
+        subscriptions = {subscription for subscribers in self._subscribers.values() for subscription in subscribers}
+        return {
+            "subscribers": len(subscriptions),
+            "statuses": len(self._subscribers),
+            "cycles": self.cycles,
+            "evaluations": self.evaluations,
+            "events_sent": self.events_sent,
+            "events_dropped": sum(subscription.dropped for subscription in subscriptions),
+            "failures": self.failures,
+            "last_duration_s": self.last_duration,
+        }